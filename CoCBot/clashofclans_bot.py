@@ -2,19 +2,20 @@ import os
 import logging
 import sqlite3
 import asyncio
+import time
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-
-# Log-Konfiguration
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s] [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("clashofclans_bot.log"),
-        logging.StreamHandler()
-    ]
-)
+from common.command_sync import sync_command_tree
+from common.logging_setup import setup_logging
+from common.http import acquire_http_client, release_http_client
+from common.metrics import instrument_bot
+from common.outbound import OutboundScheduler
+from common.timer_wheel import TimerWheel
+from CoCBot.db import ClashDatabase
+from CoCBot.utils.capital import CapitalStore
+from CoCBot.utils.coc_api import CocApi
+from CoCBot.utils.event_bus import EventBus
 
 # .env-Datei laden
 load_dotenv()
@@ -46,7 +47,7 @@ def initialize_database():
         connection.close()
         logging.info("Datenbank erfolgreich initialisiert.")
     except sqlite3.Error as e:
-        logging.error(f"Fehler bei der Initialisierung der Datenbank: {e}")
+        logging.error("Fehler bei der Initialisierung der Datenbank: %s", e)
 
 
 class ClashBot(commands.Bot):
@@ -55,48 +56,118 @@ class ClashBot(commands.Bot):
     def __init__(self, command_prefix, intents, database_file):
         super().__init__(command_prefix=command_prefix, intents=intents)
         self.database_file = database_file
+        self.http_client = acquire_http_client()  # Gemeinsamer HTTP-Connector des Prozesses
+        self.coc_api = CocApi(self.http_client)
+        # Ein Poller pro (Endpunkt, Clan) für alle Cogs; startet erst nach `on_ready`
+        self.event_bus = EventBus(self.coc_api, wait_ready=self.wait_until_ready)
+        self.outbound = OutboundScheduler("clash")  # Priorisierte Discord-REST-Aufrufe der Cogs
+        self.db = ClashDatabase(database_file)
+        self.timers = TimerWheel(name="clash")  # Kriegserinnerungen aller Cogs mit einem einzigen Task
+        self.capital = CapitalStore(self.coc_api, self.db)  # Raid-Wochenenden der Clanstadt
+        instrument_bot(self, "clash")
         self.cogs_list = [
-            "cogs.clanspiele",
-            "cogs.clanwar",
-            "cogs.clancapital",
-            "cogs.verification",
-            "cogs.general"
+            "CoCBot.cogs.clanspiele",
+            "CoCBot.cogs.clanwar",
+            "CoCBot.cogs.warstats",
+            "CoCBot.cogs.warreminders",
+            "CoCBot.cogs.clancapital",
+            "CoCBot.cogs.verification",
+            "CoCBot.cogs.general"
         ]
+        self.startup_timings = {}  # Cog -> {"load": Sekunden, "warmup": Sekunden}
+        self.warmup_tasks = set()
+        self.startup_reported = False
 
     async def setup_hook(self):
         """Setup-Hook für den Bot."""
+        await self.db.initialize()
+
+        # Cogs parallel laden; Netzwerkaufrufe laufen erst nach `on_ready` (siehe `defer_until_ready`)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self.load_cog(cog) for cog in self.cogs_list), return_exceptions=True)
+
         loaded_cogs = []
         failed_cogs = []
-
-        # Cogs laden
-        for cog in self.cogs_list:
-            try:
-                await self.load_extension(cog)
+        for cog, result in zip(self.cogs_list, results):
+            if isinstance(result, BaseException):
+                failed_cogs.append((cog, str(result)))
+            else:
                 loaded_cogs.append(cog)
-            except Exception as e:
-                failed_cogs.append((cog, str(e)))
-                logging.error(f"Fehler beim Laden des Cogs {cog}: {e}")
+                self.startup_timings[cog] = {"load": result}
 
         # Zusammenfassung der geladenen Cogs
         if loaded_cogs:
-            logging.info(f"{len(loaded_cogs)} Cogs erfolgreich geladen: {', '.join(loaded_cogs)}")
+            logging.info("%s Cogs in %.0f ms geladen: %s", len(loaded_cogs),
+                         (time.perf_counter() - started) * 1000, ", ".join(loaded_cogs))
         if failed_cogs:
             for cog, error in failed_cogs:
-                logging.error(f"Cog {cog} konnte nicht geladen werden: {error}")
+                logging.error("Cog %s konnte nicht geladen werden: %s", cog, error)
 
-        # Command-Tree synchronisieren
+        # Command-Tree synchronisieren (nur bei Änderungen)
         try:
-            synced_commands = await self.tree.sync()
-            logging.info(f"{len(synced_commands)} Befehle erfolgreich synchronisiert:")
-            for command in synced_commands:
-                logging.info(f" - {command.name} ({command.description})")
+            guild_id = os.getenv("CLASH_GUILD_ID")
+            await sync_command_tree(self, "clash", guild_ids=[int(guild_id)] if guild_id else [])
         except Exception as e:
-            logging.error(f"Fehler beim Synchronisieren des Command-Trees: {e}")
+            logging.error("Fehler beim Synchronisieren des Command-Trees: %s", e)
+
+    async def load_cog(self, cog: str) -> float:
+        """Lädt ein Cog und gibt die benötigte Zeit in Sekunden zurück."""
+        started = time.perf_counter()
+        await self.load_extension(cog)
+        return time.perf_counter() - started
+
+    def defer_until_ready(self, cog: str, coroutine_function):
+        """
+        Führt Aufwärmarbeit eines Cogs (z. B. Embeds posten) im Hintergrund aus, sobald der Bot bereit ist.
+
+        So hängt der Start nicht von der Latenz externer APIs ab. Die Dauer landet im Startbericht.
+        """
+        async def runner():
+            await self.wait_until_ready()
+            started = time.perf_counter()
+            try:
+                await coroutine_function()
+            except Exception as e:
+                logging.error("Fehler beim Aufwärmen von %s: %s", cog, e)
+            finally:
+                self.startup_timings.setdefault(cog, {})["warmup"] = time.perf_counter() - started
+                self.warmup_tasks.discard(task)
+                if not self.warmup_tasks:
+                    self.log_startup_report()
+
+        task = asyncio.create_task(runner(), name=f"warmup-{cog}")
+        self.warmup_tasks.add(task)
+        return task
+
+    def log_startup_report(self):
+        """Protokolliert Lade- und Aufwärmzeiten aller Cogs (einmal pro Start)."""
+        if self.startup_reported:
+            return
+        self.startup_reported = True
+        logging.info("Startbericht der Cogs:")
+        for cog, timings in sorted(self.startup_timings.items(),
+                                   key=lambda item: -sum(item[1].values())):
+            warmup = timings.get("warmup")
+            logging.info(" - %s: Laden %.0f ms%s", cog, timings.get("load", 0) * 1000,
+                         f", Aufwärmen {warmup * 1000:.0f} ms" if warmup is not None else "")
+
+    async def close(self):
+        """Bricht laufende Aufwärmarbeit ab, beendet den Bot und gibt HTTP-Client und Datenbank frei."""
+        for task in self.warmup_tasks:
+            task.cancel()
+        await self.event_bus.close()
+        await self.timers.close()
+        await self.outbound.close()
+        await super().close()
+        await self.db.close()
+        await release_http_client()
 
     async def on_ready(self):
         """Event: Bot ist bereit."""
-        logging.info(f"Eingeloggt als {self.user} (ID: {self.user.id})")
+        logging.info("Eingeloggt als %s (ID: %s)", self.user, self.user.id)
         logging.info("Bot ist bereit und läuft...")
+        if not self.warmup_tasks:
+            self.log_startup_report()
 
 
 async def main():
@@ -113,8 +184,9 @@ async def main():
     try:
         await bot.start(BOT_TOKEN)
     except Exception as e:
-        logging.error(f"Fehler beim Starten des Bots: {e}")
+        logging.error("Fehler beim Starten des Bots: %s", e)
 
 
 if __name__ == "__main__":
+    setup_logging("clashofclans_bot")
     asyncio.run(main())
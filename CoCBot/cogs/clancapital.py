@@ -0,0 +1,172 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import os
+import logging
+from datetime import datetime
+from typing import Optional
+from common.metrics import LOOP_DURATION
+from CoCBot.utils.capital import LEADERBOARD_METRICS
+from CoCBot.utils.capital_analytics import CapitalAnalytics
+
+logger = logging.getLogger(__name__)
+
+CLAN_TAG = os.getenv("CLAN_TAG")
+# So viele Wochenenden wertet `/capital_stats` standardmäßig aus
+DEFAULT_STATS_SEASONS = 4
+
+
+def format_season(start_time: str) -> str:
+    """`20240105T070000.000Z` -> `05.01.2024`"""
+    return datetime.strptime(start_time[:8], "%Y%m%d").strftime("%d.%m.%Y")
+
+
+class LeaderboardView(discord.ui.View):
+    """Blättert durch eine Rangliste; die Seiten kommen aus dem Cache von `CapitalLeaderboard`."""
+
+    def __init__(self, cog: "ClanCapital", season: Optional[str], metric: str, page: int, pages: int):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.season = season
+        self.metric = metric
+        self.page = page
+        self.pages = pages
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page <= 1
+        self.next_page.disabled = self.page >= self.pages
+
+    async def show(self, interaction: discord.Interaction, page: int):
+        embed, self.page, self.pages = await self.cog.build_leaderboard_embed(self.season, self.metric, page)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+
+class ClanCapital(commands.Cog):
+    """Cog für die Raid-Wochenenden der Clanstadt."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = bot.capital
+        self.analytics = CapitalAnalytics(bot.db, bot.capital)
+
+    @tasks.loop(hours=1)
+    async def ingest_raid_seasons(self):
+        """Übernimmt stündlich neue und laufende Raid-Wochenenden."""
+        with LOOP_DURATION.time(loop="ingest_raid_seasons"):
+            try:
+                await self.store.ingest(CLAN_TAG)
+            except Exception as e:
+                logger.error("Fehler beim Speichern der Raid-Wochenenden: %s", e)
+
+    @ingest_raid_seasons.before_loop
+    async def before_ingest_raid_seasons(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name="capital_refresh", description="Lädt neue Raid-Wochenenden der Clanstadt.")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def capital_refresh(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            seasons = await self.store.ingest(CLAN_TAG)
+        except Exception as e:
+            logger.error("Fehler beim Speichern der Raid-Wochenenden: %s", e)
+            await interaction.followup.send("Fehler beim Laden der Raid-Wochenenden.", ephemeral=True)
+            return
+        await interaction.followup.send(f"{len(seasons)} Raid-Wochenenden aktualisiert.", ephemeral=True)
+
+    async def build_leaderboard_embed(self, season: Optional[str], metric: str,
+                                      page: int) -> tuple[discord.Embed, int, int]:
+        """Embed einer Ranglistenseite samt tatsächlicher Seite und Seitenzahl."""
+        entries, pages = await self.store.leaderboard.page(CLAN_TAG, season, metric, page)
+        page = min(max(page, 1), pages)
+        label = LEADERBOARD_METRICS[metric][1]
+        period = f"Raid-Wochenende vom {format_season(season)}" if season else "Alle Raid-Wochenenden"
+        embed = discord.Embed(
+            title=f"Clanstadt-Bestenliste: {label}",
+            description="\n".join(f"**{rank}.** {name} – {value:,}".replace(",", ".")
+                                   for rank, _, name, value in entries) or "Noch keine Daten vorhanden.",
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=f"{period} · Seite {page}/{pages}")
+        return embed, page, pages
+
+    @app_commands.command(name="capital_leaderboard", description="Zeigt die Bestenliste der Clanstadt-Raids.")
+    @app_commands.describe(wertung="Wonach sortiert wird", zeitraum="Letztes Raid-Wochenende oder alle",
+                           seite="Seite der Bestenliste")
+    @app_commands.choices(
+        wertung=[app_commands.Choice(name=label, value=key) for key, (_, label) in LEADERBOARD_METRICS.items()],
+        zeitraum=[app_commands.Choice(name="Alle Wochenenden", value="all"),
+                  app_commands.Choice(name="Letztes Wochenende", value="latest")])
+    async def capital_leaderboard(self, interaction: discord.Interaction, wertung: app_commands.Choice[str],
+                                  zeitraum: Optional[app_commands.Choice[str]] = None, seite: int = 1):
+        season = None
+        if zeitraum is not None and zeitraum.value == "latest":
+            season = await self.store.latest_season(CLAN_TAG)
+            if season is None:
+                await interaction.response.send_message("Noch keine Raid-Wochenenden gespeichert.", ephemeral=True)
+                return
+        try:
+            embed, page, pages = await self.build_leaderboard_embed(season, wertung.value, seite)
+        except Exception as e:
+            logger.error("Fehler beim Laden der Clanstadt-Bestenliste: %s", e)
+            await interaction.response.send_message("Fehler beim Laden der Bestenliste.", ephemeral=True)
+            return
+        view = LeaderboardView(self, season, wertung.value, page, pages) if pages > 1 else discord.utils.MISSING
+        await interaction.response.send_message(embed=embed, view=view)
+
+    def build_stats_embed(self, count: int, districts: list, players: list) -> discord.Embed:
+        embed = discord.Embed(
+            title="Clanstadt-Auswertung",
+            description=f"Letzte {count} Raid-Wochenenden",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Angriffe bis zur Zerstörung",
+            value="\n".join(f"{district.name}: {district.attacks_to_clear:.1f} ({district.cleared}×)"
+                             for district in districts[:8]) or "Keine zerstörten Distrikte.",
+            inline=False
+        )
+        embed.add_field(
+            name="Effizienteste Angreifer",
+            value="\n".join(f"**{rank}.** {player.name} – {player.loot_per_attack:.0f} Beute, "
+                             f"{player.destruction_per_attack:.0f} % pro Angriff ({player.attacks} Angriffe)"
+                             for rank, player in enumerate(players[:10], start=1)) or "Noch keine Daten vorhanden.",
+            inline=False
+        )
+        return embed
+
+    @app_commands.command(name="capital_stats", description="Wertet Distrikte und Angreifer der Clanstadt aus.")
+    @app_commands.describe(wochenenden="Anzahl der letzten Raid-Wochenenden")
+    async def capital_stats(self, interaction: discord.Interaction,
+                            wochenenden: app_commands.Range[int, 1, 52] = DEFAULT_STATS_SEASONS):
+        try:
+            districts, players = await self.analytics.report(CLAN_TAG, wochenenden)
+        except Exception as e:
+            logger.error("Fehler bei der Clanstadt-Auswertung: %s", e)
+            await interaction.response.send_message("Fehler bei der Auswertung.", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=self.build_stats_embed(wochenenden, districts, players))
+
+    async def cog_load(self):
+        if CLAN_TAG:
+            self.ingest_raid_seasons.start()
+            # Abgeschlossene Wochenenden für `/capital_stats` vorab spaltenweise laden
+            self.bot.defer_until_ready(__name__,
+                                       lambda: self.analytics.recent_seasons(CLAN_TAG, DEFAULT_STATS_SEASONS))
+
+    async def cog_unload(self):
+        self.ingest_raid_seasons.cancel()
+
+
+async def setup(bot):
+    await bot.add_cog(ClanCapital(bot))
@@ -4,13 +4,11 @@ from typing import Any, Optional
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
-import requests
 import logging
 import math
 import asyncio
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 TOTAL_POINTS = 50000
 MAX_PLAYER_POINTS = 4000
@@ -30,7 +28,7 @@ class Clanspiele(commands.Cog):
                 result = cursor.fetchone()
             return result[0] if result else "Unbekannt"
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen des Spielernamens: {e}")
+            logger.error("Fehler beim Abrufen des Spielernamens: %s", e)
             return "Unbekannt"
 
     def get_event_channel(self) -> Optional[discord.TextChannel]:
@@ -41,7 +39,7 @@ class Clanspiele(commands.Cog):
                 result = cursor.fetchone()
             return self.bot.get_channel(result[0]) if result else None
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen des Clanspiele-Channels: {e}")
+            logger.error("Fehler beim Abrufen des Clanspiele-Channels: %s", e)
             return None
 
     def get_clanspiele_data(self) -> Optional[dict[str, Any]]:
@@ -64,7 +62,7 @@ class Clanspiele(commands.Cog):
                 }
             return None
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Clanspiele-Daten: {e}")
+            logger.error("Fehler beim Abrufen der Clanspiele-Daten: %s", e)
             return None
 
     def get_user_data(self, player_tag: str) -> Optional[dict[str, Any]]:
@@ -75,7 +73,7 @@ class Clanspiele(commands.Cog):
                 result = cursor.fetchone()
             return {"coc_name": result[0], "discord_id": result[1]} if result else None
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Benutzerdaten: {e}")
+            logger.error("Fehler beim Abrufen der Benutzerdaten: %s", e)
             return None
 
     def get_player_points(self, clanspiele_id: int) -> dict[str, int]:
@@ -86,7 +84,7 @@ class Clanspiele(commands.Cog):
                 result = cursor.fetchall()
             return {coc_name: points for coc_name, points in result}
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Spielerpunkte: {e}")
+            logger.error("Fehler beim Abrufen der Spielerpunkte: %s", e)
             return {}
 
     def update_player_points(self, clanspiele_id: int, player_tag: str, coc_name: str, points: int):
@@ -116,7 +114,7 @@ class Clanspiele(commands.Cog):
                 """, (total_progress, clanspiele_id))
             self.bot.db_connection.commit()
         except Exception as e:
-            logger.error(f"Fehler beim Aktualisieren der Spielerpunkte: {e}")
+            logger.error("Fehler beim Aktualisieren der Spielerpunkte: %s", e)
 
     def create_progress_bar(self, current: int, maximum: int) -> str:
         """Generates a progress bar."""
@@ -195,9 +193,9 @@ class Clanspiele(commands.Cog):
         try:
             message = await channel.fetch_message(clanspiele_data["message_id"])
             if message:
-                await message.edit(embed=embed)
+                await self.bot.outbound.edit(message, embed=embed)
         except discord.NotFound:
-            logger.error(f"Nachricht mit ID {clanspiele_data['message_id']} nicht gefunden.")
+            logger.error("Nachricht mit ID %s nicht gefunden.", clanspiele_data['message_id'])
 
     @app_commands.command(name="start_clanspiele", description="Startet ein neues Clanspiel.")
     @app_commands.checks.has_permissions(administrator=True)
@@ -212,7 +210,7 @@ class Clanspiele(commands.Cog):
                 clanspiele_id = cursor.lastrowid
             self.bot.db_connection.commit()
 
-            logger.info(f"Neue Clan-Spiele gestartet mit Startzeit {start_time} und Endzeit {end_time}.")
+            logger.info("Neue Clan-Spiele gestartet mit Startzeit %s und Endzeit %s.", start_time, end_time)
 
             # Embed posten
             clanspiele_data = self.get_clanspiele_data()
@@ -221,7 +219,7 @@ class Clanspiele(commands.Cog):
             if not channel:
                 await interaction.response.send_message("Clanspiele-Kanal nicht gefunden.", ephemeral=True)
                 return
-            message = await channel.send(embed=embed)
+            message = await self.bot.outbound.send(channel, embed=embed)
 
             # Nachricht speichern
             with self.bot.db_connection.cursor() as cursor:
@@ -234,7 +232,7 @@ class Clanspiele(commands.Cog):
 
             await interaction.response.send_message("Clanspiele erfolgreich gestartet.", ephemeral=True)
         except Exception as e:
-            logger.error(f"Fehler beim Starten der Clanspiele: {e}")
+            logger.error("Fehler beim Starten der Clanspiele: %s", e)
             await interaction.response.send_message("Fehler beim Starten der Clanspiele.", ephemeral=True)
 
     @app_commands.command(name="update_points", description="Aktualisiert die Punkte eines Spielers.")
@@ -259,7 +257,7 @@ class Clanspiele(commands.Cog):
             await interaction.response.send_message(f"Punkte von {coc_name} wurden auf {points} aktualisiert.",
                                                     ephemeral=True)
         except Exception as e:
-            logger.error(f"Fehler beim Aktualisieren der Punkte: {e}")
+            logger.error("Fehler beim Aktualisieren der Punkte: %s", e)
             await interaction.response.send_message("Fehler beim Aktualisieren der Punkte.", ephemeral=True)
 
     @app_commands.command(name="update_embed", description="Aktualisiert das Clan-Spiele-Embed.")
@@ -276,7 +274,7 @@ class Clanspiele(commands.Cog):
             await interaction.response.send_message(f"Das Clan-Spiele-Embed wurde auf Seite {page} aktualisiert.",
                                                     ephemeral=True)
         except Exception as e:
-            logger.error(f"Fehler beim Aktualisieren des Clan-Spiele-Embeds: {e}")
+            logger.error("Fehler beim Aktualisieren des Clan-Spiele-Embeds: %s", e)
             await interaction.response.send_message("Fehler beim Aktualisieren des Embeds.", ephemeral=True)
 
     async def post_initial_embed(self, clanspiele_id: int):
@@ -292,7 +290,7 @@ class Clanspiele(commands.Cog):
             logger.error("Clanspiele-Kanal nicht gefunden.")
             return
 
-        message = await channel.send(embed=embed)
+        message = await self.bot.outbound.send(channel, embed=embed)
         with self.bot.db_connection.cursor() as cursor:
             cursor.execute("""
                 UPDATE clanspiele
@@ -312,27 +310,12 @@ class Clanspiele(commands.Cog):
                 """, (message_id, channel_id, clanspiele_id))
             self.bot.db_connection.commit()
         except Exception as e:
-            logger.error(f"Fehler beim Speichern der Embed-Nachricht: {e}")
+            logger.error("Fehler beim Speichern der Embed-Nachricht: %s", e)
 
-    def fetch_player_name(self, player_tag: str) -> Optional[str]:
-        """Holt den Spielernamen von der Clash of Clans API."""
-        try:
-            coc_api_token = os.getenv('COC_API_TOKEN')
-            if not coc_api_token:
-                logger.error("Clash of Clans API token is missing.")
-                return None
-            url = f"https://api.clashofclans.com/v1/players/{player_tag.replace('#', '%23')}"
-
-            headers = {"Authorization": f"Bearer {coc_api_token}"}
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                return response.json().get("name")
-            logger.error(f"API-Fehler beim Abrufen des Spielernamens für Tag {player_tag}. "
-                         f"Status: {response.status_code}, Antwort: {response.text}")
-            return None
-        except Exception as e:
-            logger.error(f"Fehler beim Abrufen des Spielernamens: {e}")
-            return None
+    async def fetch_player_name(self, player_tag: str) -> Optional[str]:
+        """Holt den Spielernamen von der Clash of Clans API (über den Event-Bus gebündelt)."""
+        player_data = await self.bot.event_bus.get_player(player_tag)
+        return player_data.get("name") if player_data else None
 
     def save_embed_state(self, clanspiele_id: int, message_id: int, sort_order: str, current_page: int):
         """Speichert den Status des interaktiven Embeds."""
@@ -345,7 +328,11 @@ class Clanspiele(commands.Cog):
                 """, (message_id, sort_order, current_page, clanspiele_id))
             self.bot.db_connection.commit()
         except Exception as e:
-            logger.error(f"Fehler beim Speichern des Embed-Status: {e}")
+            logger.error("Fehler beim Speichern des Embed-Status: %s", e)
+
+    async def clear_reactions(self, message: discord.Message):
+        await self.bot.outbound.submit(lambda: message.clear_reactions(),
+                                       route=f"channel:{message.channel.id}:reactions", kind="clear_reactions")
 
     async def interactive_embed(self, interaction: Optional[discord.Interaction], clanspiele_id: int,
                                 message: Optional[discord.Message] = None, sort_order: str = "desc",
@@ -369,7 +356,7 @@ class Clanspiele(commands.Cog):
             sorted_points = sort_players(player_points, sort_order)
             paginated_points = dict(list(sorted_points)[(current_page - 1) * 10: current_page * 10])
             embed = self.build_embed(clanspiele_data, paginated_points)
-            await message.edit(embed=embed)
+            await self.bot.outbound.edit(message, embed=embed)
             self.save_embed_state(clanspiele_id, message.id, sort_order, current_page)
 
         if not message and interaction:
@@ -381,13 +368,13 @@ class Clanspiele(commands.Cog):
                 await interaction.response.send_message("Fehler: Kanal nicht gefunden.", ephemeral=True)
                 return
 
-            message = await channel.send(embed=embed)
+            message = await self.bot.outbound.send(channel, embed=embed)
             await interaction.response.send_message("Interaktive Clan-Spiele-Navigation gestartet.", ephemeral=True)
             self.save_embed_state(clanspiele_id, message.id, sort_order, current_page)
 
         reactions = {"⬅️": "prev", "➡️": "next", "🔼": "asc", "🔽": "desc", "❌": "stop"}
         for emoji in reactions.keys():
-            await message.add_reaction(emoji)
+            await self.bot.outbound.add_reaction(message, emoji)
 
         def check(reaction, user):
             return (
@@ -416,12 +403,13 @@ class Clanspiele(commands.Cog):
                     current_page = 1
                     await update_embed_message()
                 elif action == "stop":
-                    await message.clear_reactions()
+                    await self.clear_reactions(message)
                     break
 
-                await message.remove_reaction(reaction.emoji, user)
+                await self.bot.outbound.submit(lambda: message.remove_reaction(reaction.emoji, user),
+                                               route=f"channel:{message.channel.id}:reactions", kind="remove_reaction")
             except asyncio.TimeoutError:
-                await message.clear_reactions()
+                await self.clear_reactions(message)
                 break
 
     async def reinitialize_embeds(self):
@@ -437,23 +425,23 @@ class Clanspiele(commands.Cog):
             for clanspiele_id, message_id, channel_id, sort_order, current_page in embeds:
                 channel = self.bot.get_channel(channel_id)
                 if not channel:
-                    logger.warning(f"Kanal mit ID {channel_id} nicht gefunden.")
+                    logger.warning("Kanal mit ID %s nicht gefunden.", channel_id)
                     continue
 
                 try:
                     message = await channel.fetch_message(message_id)
                     reactions = ["⬅️", "➡️", "🔼", "🔽", "❌"]
                     for emoji in reactions:
-                        await message.add_reaction(emoji)
+                        await self.bot.outbound.add_reaction(message, emoji)
 
                     # Starte die Interaktion erneut
                     await self.interactive_embed(None, clanspiele_id, message, sort_order, current_page)
                 except discord.NotFound:
-                    logger.warning(f"Nachricht mit ID {message_id} nicht gefunden.")
+                    logger.warning("Nachricht mit ID %s nicht gefunden.", message_id)
                 except Exception as e:
-                    logger.error(f"Fehler bei der Reinitialisierung: {e}")
+                    logger.error("Fehler bei der Reinitialisierung: %s", e)
         except Exception as e:
-            logger.error(f"Fehler beim Laden gespeicherter Embeds: {e}")
+            logger.error("Fehler beim Laden gespeicherter Embeds: %s", e)
 
     @app_commands.command(name="interactive_clanspiele", description="Startet ein interaktives Clan-Spiele-Embed.")
     @app_commands.checks.has_permissions(administrator=False)
@@ -467,7 +455,7 @@ class Clanspiele(commands.Cog):
 
             await self.interactive_embed(interaction, clanspiele_data["id"])
         except Exception as e:
-            logger.error(f"Fehler beim Starten des interaktiven Embeds: {e}")
+            logger.error("Fehler beim Starten des interaktiven Embeds: %s", e)
             await interaction.response.send_message("Fehler beim Starten des interaktiven Embeds.", ephemeral=True)
 
 async def setup(bot):
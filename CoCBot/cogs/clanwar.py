@@ -2,16 +2,12 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import os
-import requests
-import certifi
 import logging
 from typing import Any
 from datetime import datetime
+from CoCBot.utils.event_bus import CURRENT_WAR, WarSnapshot
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
-
-API_BASE_URL = "https://api.clashofclans.com/v1"
 
 TOWNHALL_ICONS = {
     1: "<:th1:1333826242805497929>",
@@ -42,65 +38,30 @@ class CK(commands.Cog):
         self.coc_api_token = os.getenv("COC_API_TOKEN")
         if not self.coc_api_token:
             raise ValueError("COC_API_TOKEN ist nicht in den Umgebungsvariablen gesetzt.")
+        self.clan_tag = os.getenv("CLAN_TAG")
+        self.unsubscribe = None
 
     def get_headers(self) -> dict:
         """Headers für die Clash of Clans API."""
         return {"Authorization": f"Bearer {self.coc_api_token}"}
 
-    def fetch_current_event(self, clan_tag: str, is_cwl: bool = False) -> dict:
-        """
-        Holt die aktuellen Daten für Clan-Krieg oder CWL basierend auf dem Parameter is_cwl.
-
-        :param clan_tag: Das Clan-Tag des Clans.
-        :param is_cwl: Wenn True, werden die CWL-Daten abgerufen. Ansonsten die CW-Daten.
-        :return: Ein Dictionary mit den abgerufenen Daten oder None bei einem Fehler.
-        """
-        try:
-            # URL basierend auf is_cwl bestimmen
-            if is_cwl:
-                url = f"{API_BASE_URL}/clans/{clan_tag.replace('#', '%23')}/currentwarleaguegroup"
-                event_type = "CWL"
-            else:
-                url = f"{API_BASE_URL}/clans/{clan_tag.replace('#', '%23')}/currentwar"
-                event_type = "Clan-Krieg"
-
-            # Anfrage an die API senden
-            response = requests.get(url, headers=self.get_headers(), verify=certifi.where())
-            if response.status_code == 200:
-                logger.info(f"{event_type}-Daten erfolgreich abgerufen.")
-                return response.json()
-
-            logger.error(f"Fehler beim Abrufen der {event_type}-Daten: {response.status_code} - {response.text}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Fehler bei der Verbindung zur API: {e}")
-            return None
-
-    def fetch_current_war(self, clan_tag: str) -> dict:
-        """Holt die aktuellen Clan-Kriegsdaten von der API."""
-        try:
-            url = f"{API_BASE_URL}/clans/{clan_tag.replace('#', '%23')}/currentwar"
-            response = requests.get(url, headers=self.get_headers(), verify=certifi.where())
-            if response.status_code == 200:
-                return response.json()
-            logger.error(f"Fehler beim Abrufen der Clan-Kriegsdaten: {response.status_code} - {response.text}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Fehler bei der Verbindung zur API: {e}")
-            return None
+    async def fetch_current_war(self, clan_tag: str) -> dict:
+        """Aktuelle Clan-Kriegsdaten vom Event-Bus (höchstens ein Abfrageintervall alt)."""
+        snapshot = await self.bot.event_bus.get(CURRENT_WAR, clan_tag)
+        return snapshot.data
 
     async def fetch_channel_by_id(self, channel_id: int) -> discord.TextChannel:
         """Versucht, einen Kanal direkt über die Discord-API zu holen."""
         try:
             channel = await self.bot.fetch_channel(channel_id)
-            logger.info(f"Kanal direkt gefunden: {channel.name} (ID: {channel_id})")
+            logger.info("Kanal direkt gefunden: %s (ID: %s)", channel.name, channel_id)
             return channel
         except discord.NotFound:
-            logger.error(f"Kanal mit ID {channel_id} existiert nicht.")
+            logger.error("Kanal mit ID %s existiert nicht.", channel_id)
         except discord.Forbidden:
-            logger.error(f"Zugriff auf Kanal mit ID {channel_id} verweigert.")
+            logger.error("Zugriff auf Kanal mit ID %s verweigert.", channel_id)
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen des Kanals mit ID {channel_id}: {e}")
+            logger.error("Fehler beim Abrufen des Kanals mit ID %s: %s", channel_id, e)
         return None
 
     async def get_event_channel(self) -> discord.TextChannel:
@@ -111,31 +72,31 @@ class CK(commands.Cog):
             result = cursor.fetchone()
             if result:
                 channel_id = int(result[0])
-                logger.info(f"Abgerufene Kanal-ID aus der Datenbank: {channel_id}")
+                logger.debug("Abgerufene Kanal-ID aus der Datenbank: %s", channel_id)
 
                 # Prüfen, ob der Kanal im Cache verfügbar ist
                 channel = self.bot.get_channel(channel_id)
                 if channel:
-                    logger.info(f"Kanal direkt aus Cache gefunden: {channel.name} (ID: {channel_id})")
+                    logger.debug("Kanal direkt aus Cache gefunden: %s (ID: %s)", channel.name, channel_id)
                     return channel
 
                 # Falls nicht im Cache, versuche den Kanal über die API zu laden
-                logger.warning(f"Kanal mit ID {channel_id} nicht im Cache. Versuche, ihn über die API abzurufen.")
+                logger.warning("Kanal mit ID %s nicht im Cache. Versuche, ihn über die API abzurufen.", channel_id)
                 for guild in self.bot.guilds:
                     try:
                         fetched_channel = await guild.fetch_channel(channel_id)
                         if fetched_channel:
                             logger.info(
-                                f"Kanal erfolgreich über API gefunden: {fetched_channel.name} (ID: {channel_id})")
+                                "Kanal erfolgreich über API gefunden: %s (ID: %s)", fetched_channel.name, channel_id)
                             return fetched_channel
                     except discord.NotFound:
-                        logger.warning(f"Kanal mit ID {channel_id} in {guild.name} nicht gefunden.")
+                        logger.warning("Kanal mit ID %s in %s nicht gefunden.", channel_id, guild.name)
                     except discord.Forbidden:
                         logger.error(
-                            f"Bot hat keine Berechtigung, Kanal mit ID {channel_id} in {guild.name} abzurufen.")
-                logger.error(f"Kanal mit ID {channel_id} konnte nicht gefunden werden.")
+                            "Bot hat keine Berechtigung, Kanal mit ID %s in %s abzurufen.", channel_id, guild.name)
+                logger.error("Kanal mit ID %s konnte nicht gefunden werden.", channel_id)
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen des Event-Channels: {e}")
+            logger.error("Fehler beim Abrufen des Event-Channels: %s", e)
 
         return None
 
@@ -149,7 +110,7 @@ class CK(commands.Cog):
             result = cursor.fetchone()
             return {"message_id": result[0], "channel_id": result[1]} if result else None
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Embed-Daten: {e}")
+            logger.error("Fehler beim Abrufen der Embed-Daten: %s", e)
         return None
 
     def save_embed_data(self, message_id: int, channel_id: int):
@@ -163,20 +124,24 @@ class CK(commands.Cog):
             """, (message_id, channel_id))
             self.bot.db_connection.commit()
         except Exception as e:
-            logger.error(f"Fehler beim Speichern der Embed-Daten: {e}")
+            logger.error("Fehler beim Speichern der Embed-Daten: %s", e)
+
+    async def post_or_update_war_embed(self, snapshot: WarSnapshot = None):
+        """
+        Postet oder aktualisiert das Embed für den aktuellen Clan-Krieg.
 
-    async def post_or_update_war_embed(self):
-        """Postet oder aktualisiert das Embed für den aktuellen Clan-Krieg."""
+        :param snapshot: Vom Event-Bus zugestellte Kriegsdaten; ohne Angabe wird die letzte Antwort verwendet.
+        """
         try:
-            # Clan-Tag abrufen
-            clan_tag = os.getenv("CLAN_TAG")
-            if not clan_tag:
+            if not self.clan_tag:
                 logger.error("Clan-Tag ist nicht gesetzt.")
                 return
 
             # Clan-Kriegsdaten abrufen
-            war_data = self.fetch_current_event(clan_tag, is_cwl=False)
-            if not war_data or war_data.get("state") not in ["inWar", "preparation"]:
+            if snapshot is None:
+                snapshot = await self.bot.event_bus.get(CURRENT_WAR, self.clan_tag)
+            war_data = snapshot.data
+            if not war_data or not snapshot.active:
                 logger.info("Kein laufender oder vorbereitender Clan-Krieg gefunden.")
                 return
 
@@ -208,29 +173,29 @@ class CK(commands.Cog):
                             try:
                                 channel = await guild.fetch_channel(stored_embed_data["channel_id"])
                                 if channel:
-                                    logger.info(f"Kanal über API abgerufen: {channel.name} (ID: {channel.id})")
+                                    logger.info("Kanal über API abgerufen: %s (ID: %s)", channel.name, channel.id)
                                     break
                             except discord.NotFound:
                                 continue
                     if channel is None:
-                        logger.error(f"Kanal mit ID {stored_embed_data['channel_id']} nicht gefunden.")
+                        logger.error("Kanal mit ID %s nicht gefunden.", stored_embed_data['channel_id'])
                         return
 
                     # Nachricht abrufen und aktualisieren
                     message = await channel.fetch_message(stored_embed_data["message_id"])
                     if message:
-                        await message.edit(embed=embed)
+                        await self.bot.outbound.edit(message, embed=embed)
                         logger.info("Clan-Kriegs-Embed erfolgreich aktualisiert.")
                         return
                 except discord.NotFound:
                     logger.warning("Vorheriges Embed nicht gefunden. Neues Embed wird erstellt.")
 
             # Neues Embed posten
-            message = await event_channel.send(embed=embed)
+            message = await self.bot.outbound.send(event_channel, embed=embed)
             self.save_embed_data(message.id, event_channel.id)
             logger.info("Neues Clan-Kriegs-Embed gepostet und gespeichert.")
         except Exception as e:
-            logger.error(f"Fehler beim Posten/Aktualisieren des Clan-Kriegs-Embeds: {e}")
+            logger.error("Fehler beim Posten/Aktualisieren des Clan-Kriegs-Embeds: %s", e)
 
     @staticmethod
     def shorten_text(text: str, max_length: int = 1024) -> str:
@@ -301,7 +266,7 @@ class CK(commands.Cog):
                 await interaction.response.send_message("Clan-Tag ist nicht gesetzt.", ephemeral=True)
                 return
 
-            war_data = self.fetch_current_war(clan_tag)
+            war_data = await self.fetch_current_war(clan_tag)
             if not war_data:
                 await interaction.response.send_message("Es konnte kein Clan-Krieg gefunden werden.", ephemeral=True)
                 return
@@ -328,22 +293,31 @@ class CK(commands.Cog):
             embed = self.build_war_embed(war_data, page, description)
             await interaction.response.send_message(embed=embed, ephemeral=True)
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der privaten Clan-Krieg-Statistiken: {e}")
+            logger.error("Fehler beim Abrufen der privaten Clan-Krieg-Statistiken: %s", e)
             await interaction.response.send_message("Fehler beim Abrufen der Statistiken.", ephemeral=True)
 
     @app_commands.command(name="ck_refresh", description="Aktualisiert das Clan-Kriegs-Embed manuell.")
     async def ck_refresh(self, interaction: discord.Interaction):
         """Manuelles Aktualisieren des Clan-Kriegs-Embeds."""
         try:
-            await self.post_or_update_war_embed()
+            if not self.clan_tag:
+                await interaction.response.send_message("Clan-Tag ist nicht gesetzt.", ephemeral=True)
+                return
+            # Neuer Abruf; das Embed aktualisiert der Abonnent `post_or_update_war_embed`
+            await self.bot.event_bus.refresh(CURRENT_WAR, self.clan_tag)
             await interaction.response.send_message("Clan-Kriegs-Embed wurde aktualisiert.", ephemeral=True)
         except Exception as e:
-            logger.error(f"Fehler beim Aktualisieren des Clan-Kriegs-Embeds: {e}")
+            logger.error("Fehler beim Aktualisieren des Clan-Kriegs-Embeds: %s", e)
             await interaction.response.send_message("Fehler beim Aktualisieren des Embeds.", ephemeral=True)
 
     async def cog_load(self):
-        """Automatisch ausführen beim Laden des Cogs."""
-        await self.post_or_update_war_embed()
+        """Abonniert die Kriegsdaten; der erste Abruf und damit das Embed folgen erst nach `on_ready`."""
+        if self.clan_tag:
+            self.unsubscribe = self.bot.event_bus.subscribe(CURRENT_WAR, self.clan_tag, self.post_or_update_war_embed)
+
+    async def cog_unload(self):
+        if self.unsubscribe is not None:
+            self.unsubscribe()
 
 async def setup(bot):
     await bot.add_cog(CK(bot))
@@ -2,16 +2,12 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import os
-import requests
-import certifi
 import logging
 from typing import Any
 from datetime import datetime
+from CoCBot.utils.event_bus import LEAGUE_GROUP, LeagueGroupSnapshot
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
-
-API_BASE_URL = "https://api.clashofclans.com/v1"
 
 TOWNHALL_ICONS = {
     1: "<:th1:1333826242805497929>",
@@ -41,6 +37,8 @@ class CWL(commands.Cog):
         self.coc_api_token = os.getenv("COC_API_TOKEN")
         if not self.coc_api_token:
             raise ValueError("COC_API_TOKEN ist nicht in den Umgebungsvariablen gesetzt.")
+        self.clan_tag = os.getenv("CLAN_TAG")
+        self.unsubscribe = None
 
     def get_headers(self) -> dict:
         """Headers für die Clash of Clans API."""
@@ -63,7 +61,7 @@ class CWL(commands.Cog):
             result = cursor.fetchone()
             return {"message_id": result[0], "channel_id": result[1]} if result else None
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der gespeicherten CWL-Embed-Daten: {e}")
+            logger.error("Fehler beim Abrufen der gespeicherten CWL-Embed-Daten: %s", e)
         return None
 
     def save_embed_data(self, message_id: int, channel_id: int):
@@ -77,7 +75,7 @@ class CWL(commands.Cog):
             """, (message_id, channel_id))
             self.bot.db_connection.commit()
         except Exception as e:
-            logger.error(f"Fehler beim Speichern der CWL-Embed-Daten: {e}")
+            logger.error("Fehler beim Speichern der CWL-Embed-Daten: %s", e)
 
     @staticmethod
     def build_cwl_embed(war_data: dict, page: int, description: str = None) -> discord.Embed:
@@ -155,11 +153,11 @@ class CWL(commands.Cog):
             try:
                 channel = await guild.fetch_channel(channel_id)
                 if channel:
-                    logger.info(f"Kanal über API gefunden: {channel.name} (ID: {channel.id})")
+                    logger.info("Kanal über API gefunden: %s (ID: %s)", channel.name, channel.id)
                     return channel
             except discord.NotFound:
                 continue
-        logger.error(f"Kanal mit ID {channel_id} konnte nicht gefunden werden.")
+        logger.error("Kanal mit ID %s konnte nicht gefunden werden.", channel_id)
         return None
 
     async def get_event_channel(self) -> discord.TextChannel:
@@ -172,96 +170,88 @@ class CWL(commands.Cog):
             result = cursor.fetchone()
             if result:
                 channel_id = int(result[0])
-                logger.info(f"Abgerufene Kanal-ID aus der Datenbank: {channel_id}")
+                logger.debug("Abgerufene Kanal-ID aus der Datenbank: %s", channel_id)
 
                 # Prüfen, ob der Kanal im Cache ist
                 channel = self.bot.get_channel(channel_id)
                 if channel:
-                    logger.info(f"Kanal aus Cache gefunden: {channel.name} (ID: {channel_id})")
+                    logger.debug("Kanal aus Cache gefunden: %s (ID: %s)", channel.name, channel_id)
                     return channel
 
                 # Falls nicht im Cache, über API abrufen
                 try:
                     channel = await self.bot.fetch_channel(channel_id)
-                    logger.info(f"Kanal über API gefunden: {channel.name} (ID: {channel_id})")
+                    logger.info("Kanal über API gefunden: %s (ID: %s)", channel.name, channel_id)
                     return channel
                 except discord.NotFound:
-                    logger.error(f"Kanal mit ID {channel_id} konnte nicht gefunden werden.")
+                    logger.error("Kanal mit ID %s konnte nicht gefunden werden.", channel_id)
                 except discord.Forbidden:
-                    logger.error(f"Bot hat keine Berechtigung für Kanal {channel_id}.")
+                    logger.error("Bot hat keine Berechtigung für Kanal %s.", channel_id)
 
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen des Event-Channels: {e}")
+            logger.error("Fehler beim Abrufen des Event-Channels: %s", e)
 
         return None
 
-    def fetch_current_event(self, clan_tag: str, is_cwl: bool = False) -> dict:
-        """Holt die aktuellen Daten für Clan-Krieg oder CWL."""
-        try:
-            url = f"{API_BASE_URL}/clans/{clan_tag.replace('#', '%23')}/currentwarleaguegroup" if is_cwl else f"{API_BASE_URL}/clans/{clan_tag.replace('#', '%23')}/currentwar"
-            response = requests.get(url, headers=self.get_headers(), verify=certifi.where())
-
-            if response.status_code == 200:
-                logger.info(f"Erfolgreich Daten abgerufen für {'CWL' if is_cwl else 'Clan-Krieg'}.")
-                return response.json()
-            elif response.status_code == 404:
-                logger.info(f"Keine gültigen {'CWL' if is_cwl else 'Clan-Krieg'}-Daten gefunden (404).")
-            else:
-                logger.error(f"Fehler beim Abrufen der Daten: {response.status_code} - {response.text}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Fehler bei der Verbindung zur API: {e}")
-            return None
+    async def post_or_update_cwl_embed(self, snapshot: LeagueGroupSnapshot = None):
+        """
+        Postet oder aktualisiert das Embed für die CWL.
 
-    def fetch_current_warleaguegroup(self, clan_tag: str) -> dict:
-        url = f"{API_BASE_URL}/clans/{clan_tag.replace('#', '%23')}/currentwarleaguegroup"
-        return self._fetch_data(url, "CWL")
-
-    async def post_or_update_cwl_embed(self):
-        """Postet oder aktualisiert das Embed für die CWL."""
+        :param snapshot: Vom Event-Bus zugestellte Liga-Gruppe; ohne Angabe wird die letzte Antwort verwendet.
+        """
         try:
-            clan_tag = os.getenv("CLAN_TAG")
-            if not clan_tag:
+            if not self.clan_tag:
                 logger.error("Clan-Tag ist nicht gesetzt.")
                 return
 
-            cwl_data = self.fetch_current_event(clan_tag, is_cwl=True)
+            if snapshot is None:
+                snapshot = await self.bot.event_bus.get(LEAGUE_GROUP, self.clan_tag)
+            cwl_data = snapshot.data
             if not cwl_data:
                 logger.info("Keine gültigen CWL-Daten gefunden. Keine Aktion erforderlich.")
                 return
 
             # Weitere Verarbeitung der CWL-Daten hier...
         except Exception as e:
-            logger.error(f"Fehler beim Posten/Aktualisieren des CWL-Embeds: {e}")
+            logger.error("Fehler beim Posten/Aktualisieren des CWL-Embeds: %s", e)
 
-    def process_cwl_data(self, clan_tag: str):
+    async def process_cwl_data(self, clan_tag: str):
         """Prozessiert die CWL-Daten und gibt die Rundeninformationen zurück."""
-        cwl_data = self.fetch_current_event(clan_tag, is_cwl=True)  # CWL-Daten abrufen
-        if not cwl_data or "rounds" not in cwl_data:
+        snapshot = await self.bot.event_bus.get(LEAGUE_GROUP, clan_tag)  # CWL-Daten vom Event-Bus
+        if not snapshot.data or "rounds" not in snapshot.data:
             logger.info("Keine gültigen CWL-Daten gefunden.")
             return None
 
-        rounds = cwl_data.get("rounds", [])
+        rounds = list(snapshot.rounds)
         if not rounds:
             logger.info("Keine Runden-Daten in der CWL gefunden.")
             return None
 
-        logger.info(f"CWL-Daten erfolgreich verarbeitet: {len(rounds)} Runden gefunden.")
+        logger.info("CWL-Daten erfolgreich verarbeitet: %s Runden gefunden.", len(rounds))
         return rounds
 
     @app_commands.command(name="cwl_refresh", description="Aktualisiert das CWL-Embed manuell.")
     async def cwl_refresh(self, interaction: discord.Interaction):
         """Manuelles Aktualisieren des CWL-Embeds."""
         try:
-            await self.post_or_update_cwl_embed()
+            if not self.clan_tag:
+                await interaction.response.send_message("Clan-Tag ist nicht gesetzt.", ephemeral=True)
+                return
+            # Neuer Abruf; das Embed aktualisiert der Abonnent `post_or_update_cwl_embed`
+            await self.bot.event_bus.refresh(LEAGUE_GROUP, self.clan_tag)
             await interaction.response.send_message("CWL-Embed wurde aktualisiert.", ephemeral=True)
         except Exception as e:
-            logger.error(f"Fehler beim Aktualisieren des CWL-Embeds: {e}")
+            logger.error("Fehler beim Aktualisieren des CWL-Embeds: %s", e)
             await interaction.response.send_message("Fehler beim Aktualisieren des CWL-Embeds.", ephemeral=True)
 
     async def cog_load(self):
-        """Wird beim Laden des Cogs automatisch ausgeführt."""
-        await self.post_or_update_cwl_embed()
+        """Abonniert die Liga-Gruppe; der erste Abruf und damit das Embed folgen erst nach `on_ready`."""
+        if self.clan_tag:
+            self.unsubscribe = self.bot.event_bus.subscribe(LEAGUE_GROUP, self.clan_tag, self.post_or_update_cwl_embed)
+
+    async def cog_unload(self):
+        if self.unsubscribe is not None:
+            self.unsubscribe()
 
 async def setup(bot):
     await bot.add_cog(CWL(bot))
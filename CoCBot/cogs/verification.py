@@ -2,13 +2,13 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import os
-import requests
 import logging
 import sqlite3
+from common.metrics import LOOP_DURATION
+from CoCBot.utils.event_bus import CLAN
 
 logger = logging.getLogger(__name__)
 
-API_BASE_URL = "https://api.clashofclans.com/v1"
 CLAN_TAG = os.getenv("CLAN_TAG")
 COC_API_TOKEN = os.getenv("COC_API_TOKEN")
 CLAN_ROLE_NAME = "Clan-Mitglied"
@@ -19,7 +19,6 @@ class Verification(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.verify_clan_members.start()  # Automatische Überprüfung starten
 
     def cog_unload(self):
         """Stoppt die Überprüfung bei Cog-Unload."""
@@ -29,31 +28,14 @@ class Verification(commands.Cog):
         """Gibt die Header für die Clash of Clans API zurück."""
         return {"Authorization": f"Bearer {COC_API_TOKEN}"}
 
-    def fetch_player_data(self, player_tag: str) -> dict:
-        """Holt die Spieler-Daten von der Clash of Clans API."""
-        try:
-            url = f"{API_BASE_URL}/players/{player_tag.replace('#', '%23')}"
-            response = requests.get(url, headers=self.get_headers())
-            if response.status_code == 200:
-                return response.json()
-            logger.error(f"Fehler beim Abrufen der Spieler-Daten: {response.status_code} - {response.text}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Fehler bei der Verbindung zur API: {e}")
-            return None
-
-    def fetch_clan_members(self) -> list:
-        """Holt die aktuellen Clan-Mitglieder von der Clash of Clans API."""
-        try:
-            url = f"{API_BASE_URL}/clans/{CLAN_TAG.replace('#', '%23')}"
-            response = requests.get(url, headers=self.get_headers())
-            if response.status_code == 200:
-                return [member["tag"] for member in response.json().get("memberList", [])]
-            logger.error(f"Fehler beim Abrufen der Clan-Daten: {response.status_code} - {response.text}")
-            return []
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Fehler bei der Verbindung zur API: {e}")
-            return []
+    async def fetch_player_data(self, player_tag: str) -> dict:
+        """Holt die Spieler-Daten; gleichzeitige Abrufe desselben Spielers bündelt der Event-Bus."""
+        return await self.bot.event_bus.get_player(player_tag)
+
+    async def fetch_clan_members(self) -> list:
+        """Tags der aktuellen Clan-Mitglieder aus der letzten Clan-Antwort des Event-Busses."""
+        snapshot = await self.bot.event_bus.get(CLAN, CLAN_TAG)
+        return list(snapshot.member_tags)
 
     @app_commands.command(name="verify", description="Verifiziert einen Spieler basierend auf seinem Spielertag.")
     @app_commands.guilds(GUILD_ID)
@@ -61,7 +43,7 @@ class Verification(commands.Cog):
         """Verifiziert einen Spieler basierend auf seinem Spielertag."""
         await interaction.response.defer(ephemeral=True)
 
-        player_data = self.fetch_player_data(player_tag)
+        player_data = await self.fetch_player_data(player_tag)
         if not player_data:
             await interaction.followup.send("Spieler-Daten konnten nicht abgerufen werden.", ephemeral=True)
             return
@@ -87,14 +69,14 @@ class Verification(commands.Cog):
                 )
                 conn.commit()
         except Exception as e:
-            logger.error(f"Fehler beim Speichern des Spielers in der Datenbank: {e}")
+            logger.error("Fehler beim Speichern des Spielers in der Datenbank: %s", e)
             await interaction.followup.send("Fehler beim Speichern des Spielers.", ephemeral=True)
             return
 
         # Rolle zuweisen
         role = discord.utils.get(interaction.guild.roles, name=CLAN_ROLE_NAME)
         if role:
-            await interaction.user.add_roles(role)
+            await self.bot.outbound.add_roles(interaction.user, role)
             await interaction.followup.send(f"Du wurdest als **{player_data.get('name')}** verifiziert.", ephemeral=True)
         else:
             await interaction.followup.send("Rolle für Clan-Mitglieder nicht gefunden. Bitte kontaktiere einen Admin.", ephemeral=True)
@@ -102,7 +84,12 @@ class Verification(commands.Cog):
     @tasks.loop(hours=24)
     async def verify_clan_members(self):
         """Überprüft täglich, ob verifizierte Mitglieder noch im Clan sind."""
-        clan_members = self.fetch_clan_members()
+        with LOOP_DURATION.time(loop="verify_clan_members"):
+            await self.reconcile_clan_members()
+
+    async def reconcile_clan_members(self):
+        """Ein Durchlauf von `verify_clan_members`."""
+        clan_members = await self.fetch_clan_members()
         if not clan_members:
             logger.warning("Clan-Mitglieder konnten nicht abgerufen werden.")
             return
@@ -122,16 +109,22 @@ class Verification(commands.Cog):
                     if player_tag not in clan_members:
                         role = discord.utils.get(member.guild.roles, name=CLAN_ROLE_NAME)
                         if role and role in member.roles:
-                            await member.remove_roles(role)
-                            logger.info(f"Rolle für {member} entfernt (nicht mehr im Clan).")
+                            # Bulk-Priorität: Interaktionen und Embeds laufen während des Abgleichs vor
+                            await self.bot.outbound.remove_roles(member, role)
+                            logger.info("Rolle für %s entfernt (nicht mehr im Clan).", member)
 
                         # Spieler aus der Datenbank entfernen
                         cursor.execute("DELETE FROM verified_players WHERE player_tag = ?", (player_tag,))
                         conn.commit()
-                        logger.info(f"{player_tag} wurde aus der Datenbank entfernt.")
+                        logger.info("%s wurde aus der Datenbank entfernt.", player_tag)
 
         except Exception as e:
-            logger.error(f"Fehler bei der Überprüfung der Clan-Mitglieder: {e}")
+            logger.error("Fehler bei der Überprüfung der Clan-Mitglieder: %s", e)
+
+    @verify_clan_members.before_loop
+    async def before_verify_clan_members(self):
+        """Die erste Überprüfung braucht den Guild-Cache, also erst nach `on_ready` starten."""
+        await self.bot.wait_until_ready()
 
     @app_commands.command(name="check_clan", description="Überprüft alle verifizierten Spieler auf Mitgliedschaft.")
     @app_commands.guilds(GUILD_ID)
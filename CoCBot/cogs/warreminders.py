@@ -0,0 +1,138 @@
+import discord
+from discord.ext import commands
+import os
+import logging
+import sqlite3
+import time
+from typing import Optional
+from CoCBot.utils.coc_api import parse_time
+from CoCBot.utils.event_bus import CURRENT_WAR, WarSnapshot
+
+logger = logging.getLogger(__name__)
+
+CLAN_TAG = os.getenv("CLAN_TAG")
+# Erinnerungen in Stunden vor Kriegsende
+REMINDER_HOURS = sorted((int(hours) for hours in os.getenv("CLASH_WAR_REMINDER_HOURS", "12,4,1").split(",")
+                         if hours.strip()), reverse=True)
+# Höchstlänge einer Discord-Nachricht
+MESSAGE_LIMIT = 2000
+
+
+def members_with_attacks_left(data: dict) -> list[tuple[dict, int]]:
+    """Mitglieder des eigenen Clans mit ihren verbleibenden Angriffen."""
+    attacks_per_member = data.get("attacksPerMember", 2)
+    remaining = []
+    for member in data.get("clan", {}).get("members", []):
+        left = attacks_per_member - len(member.get("attacks", []))
+        if left > 0:
+            remaining.append((member, left))
+    return sorted(remaining, key=lambda item: item[0].get("mapPosition", 0))
+
+
+def batch_lines(header: str, lines: list[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Verteilt die Zeilen auf möglichst wenige Nachrichten unterhalb des Zeichenlimits."""
+    messages, current = [], header
+    for line in lines:
+        if len(current) + 1 + len(line) > limit:
+            messages.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}"
+    messages.append(current)
+    return messages
+
+
+class WarReminders(commands.Cog):
+    """Erinnert Mitglieder mit offenen Angriffen vor Kriegsende."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.timers = bot.timers
+        self.unsubscribe = None
+        self.scheduled: dict[str, set] = {}  # Clan -> Schlüssel der eingeplanten Erinnerungen
+        self.wars: dict[str, tuple] = {}  # Clan -> (Status, Vorbereitungsbeginn) der letzten Abfrage
+
+    def schedule_reminders(self, snapshot: WarSnapshot):
+        """Plant die Erinnerungen des aktuellen Krieges im gemeinsamen Timer-Wheel ein."""
+        # Ohne Daten ist der Kriegsstand unbekannt: eingeplante Erinnerungen bleiben bestehen
+        if snapshot.data is None:
+            return
+        clan_tag = snapshot.clan_tag
+        war = (snapshot.state, snapshot.data.get("preparationStartTime", ""))
+        if self.wars.get(clan_tag) != war:
+            # Erinnerungen eines beendeten oder abgelösten Krieges verwerfen
+            for key in self.scheduled.pop(clan_tag, set()):
+                self.timers.cancel(key)
+            self.wars[clan_tag] = war
+        if not snapshot.active or "endTime" not in snapshot.data:
+            return
+        war_start = war[1]
+        end_time = parse_time(snapshot.data["endTime"])
+        now = time.time()
+        keys = self.scheduled.setdefault(clan_tag, set())
+        for hours in REMINDER_HOURS:
+            key = ("war-reminder", clan_tag, war_start, hours)
+            deadline = end_time - hours * 3600
+            # Verpasste Erinnerungen (z. B. nach einem Neustart) nicht nachholen
+            if deadline <= now:
+                continue
+            keys.add(key)
+            if self.timers.deadline(key) != deadline:
+                self.timers.schedule(key, deadline, lambda hours=hours: self.remind(clan_tag, hours))
+
+    async def on_war_snapshot(self, snapshot: WarSnapshot):
+        self.schedule_reminders(snapshot)
+
+    async def get_reminder_channel(self) -> Optional[discord.abc.Messageable]:
+        channel_id = await self.bot.db.get_event_channel_id("clan-war")
+        if channel_id is None:
+            return None
+        return self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+    async def remind(self, clan_tag: str, hours: int):
+        """Erwähnt alle Mitglieder, die laut aktuellem Kriegsstand noch Angriffe offen haben."""
+        # Kurz vorher abgefragten Stand verwenden, sonst neu abrufen: wer inzwischen angegriffen hat, fällt heraus
+        snapshot = await self.bot.event_bus.get(CURRENT_WAR, clan_tag, max_age=60)
+        if snapshot.data is None or snapshot.state != "inWar":
+            return
+        remaining = members_with_attacks_left(snapshot.data)
+        if not remaining:
+            return
+        channel = await self.get_reminder_channel()
+        if channel is None:
+            logger.warning("Kein Kanal für Kriegserinnerungen festgelegt.")
+            return
+
+        try:
+            discord_ids = await self.bot.db.get_discord_ids([member["tag"] for member, _ in remaining])
+        except sqlite3.Error as e:
+            logger.warning("Verifizierte Spieler konnten nicht geladen werden: %s", e)
+            discord_ids = {}
+        lines = []
+        for member, left in remaining:
+            discord_id = discord_ids.get(member["tag"])
+            name = f"<@{discord_id}> ({member.get('name', '')})" if discord_id else f"**{member.get('name', '')}**"
+            lines.append(f"{name}: {left} {'Angriff' if left == 1 else 'Angriffe'} offen")
+        header = f"⚔️ Der Clan-Krieg endet in {hours} {'Stunde' if hours == 1 else 'Stunden'}!"
+        for content in batch_lines(header, lines):
+            await self.bot.outbound.send(channel, content=content,
+                                         allowed_mentions=discord.AllowedMentions(users=True, roles=False,
+                                                                                  everyone=False))
+        logger.info("Kriegserinnerung %sh vor Ende an %s Mitglieder gesendet.", hours, len(remaining))
+
+    async def cog_load(self):
+        if CLAN_TAG:
+            self.unsubscribe = self.bot.event_bus.subscribe(CURRENT_WAR, CLAN_TAG, self.on_war_snapshot)
+
+    async def cog_unload(self):
+        if self.unsubscribe is not None:
+            self.unsubscribe()
+        for keys in self.scheduled.values():
+            for key in keys:
+                self.timers.cancel(key)
+        self.scheduled.clear()
+        self.wars.clear()
+
+
+async def setup(bot):
+    await bot.add_cog(WarReminders(bot))
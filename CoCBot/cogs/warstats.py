@@ -0,0 +1,99 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import os
+import logging
+import time
+from CoCBot.utils.event_bus import CURRENT_WAR, WarSnapshot
+from CoCBot.utils.war_analytics import Rate, WarAnalytics
+
+logger = logging.getLogger(__name__)
+
+CLAN_TAG = os.getenv("CLAN_TAG")
+
+
+def format_rate(rate: Rate) -> str:
+    return (f"**{rate.label}**: {rate.three_star_rate:.0%} ⭐⭐⭐, Ø {rate.average_stars:.2f} Sterne, "
+            f"{rate.average_destruction:.0f} % ({rate.attacks} Angriffe)")
+
+
+class WarStats(commands.Cog):
+    """Speichert die Angriffe aus Clan-Kriegen und wertet sie aus."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.analytics = WarAnalytics(bot.db)
+        self.unsubscribe = None
+
+    async def record_attacks(self, snapshot: WarSnapshot):
+        """Übernimmt neue Angriffe aus jeder Kriegsabfrage des Event-Busses."""
+        if snapshot.data is None or snapshot.state not in ("inWar", "warEnded"):
+            return
+        try:
+            await self.analytics.record(snapshot.clan_tag, snapshot.data)
+        except Exception as e:
+            logger.error("Fehler beim Speichern der Kriegsangriffe: %s", e)
+
+    @app_commands.command(name="war_stats", description="Wertet die Angriffe der Clan-Kriege aus.")
+    @app_commands.describe(tage="Zeitraum in Tagen")
+    async def war_stats(self, interaction: discord.Interaction, tage: app_commands.Range[int, 1, 3650] = 365):
+        started = time.perf_counter()
+        try:
+            report = await self.analytics.war_report(CLAN_TAG, tage)
+        except Exception as e:
+            logger.error("Fehler bei der Kriegsauswertung: %s", e)
+            await interaction.response.send_message("Fehler bei der Auswertung.", ephemeral=True)
+            return
+        logger.debug("Kriegsauswertung in %.2f ms.", (time.perf_counter() - started) * 1000)
+
+        embed = discord.Embed(title="Kriegsauswertung", description=f"Letzte {tage} Tage", color=discord.Color.red())
+        embed.add_field(name="Nach Rathaus-Differenz",
+                        value="\n".join(map(format_rate, report["th_difference"]))[:1024] or "Keine Angriffe.",
+                        inline=False)
+        embed.add_field(name="Nach Angriffsreihenfolge",
+                        value="\n".join(map(format_rate, report["order"]))[:1024] or "Keine Angriffe.",
+                        inline=False)
+        embed.add_field(name="Beste Angreifer",
+                        value="\n".join(map(format_rate, report["players"][:10]))[:1024] or "Keine Angriffe.",
+                        inline=False)
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="player_stats", description="Zeigt die Kriegsbilanz eines Spielers.")
+    @app_commands.describe(spieler_tag="Spieler-Tag, z. B. #ABC123", tage="Zeitraum in Tagen")
+    async def player_stats(self, interaction: discord.Interaction, spieler_tag: str,
+                           tage: app_commands.Range[int, 1, 3650] = 365):
+        player_tag = spieler_tag.strip().upper()
+        if not player_tag.startswith("#"):
+            player_tag = f"#{player_tag}"
+        try:
+            report = await self.analytics.player_report(CLAN_TAG, player_tag, tage)
+        except Exception as e:
+            logger.error("Fehler bei der Spielerauswertung von %s: %s", player_tag, e)
+            await interaction.response.send_message("Fehler bei der Auswertung.", ephemeral=True)
+            return
+        if report is None:
+            await interaction.response.send_message(f"Keine Kriegsangriffe von {player_tag} gefunden.",
+                                                    ephemeral=True)
+            return
+
+        name, total, by_difference = report
+        embed = discord.Embed(title=f"Kriegsbilanz von {name}", description=f"{player_tag} · Letzte {tage} Tage",
+                              color=discord.Color.red())
+        embed.add_field(name="Gesamt", value=format_rate(total), inline=False)
+        embed.add_field(name="Nach Rathaus-Differenz", value="\n".join(map(format_rate, by_difference))[:1024],
+                        inline=False)
+        await interaction.response.send_message(embed=embed)
+
+    async def cog_load(self):
+        if CLAN_TAG:
+            self.unsubscribe = self.bot.event_bus.subscribe(CURRENT_WAR, CLAN_TAG, self.record_attacks)
+            # Spalten-Cache vorab öffnen und nachladen, damit die erste Auswertung nicht darauf wartet
+            self.bot.defer_until_ready(__name__, lambda: self.analytics.load(CLAN_TAG))
+
+    async def cog_unload(self):
+        if self.unsubscribe is not None:
+            self.unsubscribe()
+
+
+async def setup(bot):
+    await bot.add_cog(WarStats(bot))
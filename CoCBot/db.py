@@ -1,4 +1,11 @@
+import logging
 import sqlite3
+import time
+from typing import Optional
+
+from common.db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
 
 
 def initialize_database():
@@ -113,5 +120,331 @@ def initialize_database():
 
     connection.commit()
     connection.close()
-    print("Datenbank erfolgreich initialisiert.")
+    logger.info("Datenbank erfolgreich initialisiert.")
+
+
+
+class ClashDatabase:
+    """Asynchroner Zugriff auf die SQLite-Datenbank des Clash-Bots für die neueren Auswertungen."""
+
+    def __init__(self, sqlite_path: str = "clash_bot.db", pool_size: int = 4):
+        # Jede `:memory:`-Verbindung wäre eine eigene Datenbank
+        size = 1 if sqlite_path == ":memory:" else pool_size
+        self.pool = ConnectionPool(lambda: self._connect(sqlite_path),
+                                   lambda connection: connection.execute("SELECT 1"),
+                                   (sqlite3.Error,), size, name="clash")
+
+    @staticmethod
+    def _connect(path: str):
+        connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @staticmethod
+    def _execute(connection, query: str, params: tuple, fetch: Optional[str]):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            if fetch == "all":
+                return cursor.fetchall()
+            if fetch == "one":
+                return cursor.fetchone()
+            connection.commit()
+            return cursor.rowcount
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _execute_script(connection, statements: list[str]):
+        cursor = connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            connection.commit()
+        finally:
+            cursor.close()
+
+    async def fetchall(self, query: str, params: tuple = ()) -> list:
+        return list(await self.pool.run(self._execute, query, params, "all"))
+
+    async def close(self):
+        await self.pool.close()
+
+    async def initialize(self):
+        """Legt fehlende Tabellen und Indizes an."""
+        await self.pool.run(self._execute_script, [
+            # Ein Raid-Wochenende der Clanstadt; `start_time` ist das Format der API und sortiert chronologisch
+            """
+            CREATE TABLE IF NOT EXISTS capital_raid_seasons (
+                clan_tag TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL,
+                state TEXT NOT NULL,
+                capital_total_loot INTEGER NOT NULL DEFAULT 0,
+                raids_completed INTEGER NOT NULL DEFAULT 0,
+                total_attacks INTEGER NOT NULL DEFAULT 0,
+                enemy_districts_destroyed INTEGER NOT NULL DEFAULT 0,
+                offensive_reward INTEGER NOT NULL DEFAULT 0,
+                defensive_reward INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (clan_tag, start_time)
+            )
+            """,
+            # Beitrag eines Mitglieds zu einem Raid-Wochenende
+            """
+            CREATE TABLE IF NOT EXISTS capital_raid_members (
+                clan_tag TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                player_tag TEXT NOT NULL,
+                name TEXT NOT NULL,
+                attacks INTEGER NOT NULL DEFAULT 0,
+                attack_limit INTEGER NOT NULL DEFAULT 0,
+                bonus_attack_limit INTEGER NOT NULL DEFAULT 0,
+                capital_resources_looted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (clan_tag, start_time, player_tag)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_capital_members_player ON capital_raid_members (player_tag)",
+            # Clans, deren Raid-Historie einmal vollständig bis zum ältesten Wochenende gespeichert wurde
+            """
+            CREATE TABLE IF NOT EXISTS capital_backfill (
+                clan_tag TEXT PRIMARY KEY,
+                completed_at INTEGER NOT NULL
+            )
+            """,
+            # Summen über alle Wochenenden pro Spieler; wird beim Speichern eines Wochenendes mitgeführt
+            """
+            CREATE TABLE IF NOT EXISTS capital_player_totals (
+                clan_tag TEXT NOT NULL,
+                player_tag TEXT NOT NULL,
+                name TEXT NOT NULL,
+                last_season TEXT NOT NULL,
+                seasons INTEGER NOT NULL DEFAULT 0,
+                attacks INTEGER NOT NULL DEFAULT 0,
+                capital_resources_looted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (clan_tag, player_tag)
+            )
+            """,
+            # Summen für Wochenenden nachtragen, die vor Einführung der Tabelle gespeichert wurden
+            """
+            INSERT INTO capital_player_totals (clan_tag, player_tag, name, last_season, seasons, attacks,
+                capital_resources_looted)
+            SELECT clan_tag, player_tag, MAX(name), MAX(start_time), COUNT(*), SUM(attacks),
+                SUM(capital_resources_looted)
+            FROM capital_raid_members
+            WHERE NOT EXISTS (SELECT 1 FROM capital_player_totals)
+            GROUP BY clan_tag, player_tag
+            """,
+            # Angriffe des eigenen Clans in Clan-Kriegen; `id` wächst, damit Auswertungen nur Neues nachladen
+            """
+            CREATE TABLE IF NOT EXISTS war_attacks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                clan_tag TEXT NOT NULL,
+                war_start TEXT NOT NULL,
+                war_end INTEGER NOT NULL,
+                attack_order INTEGER NOT NULL,
+                attacker_tag TEXT NOT NULL,
+                attacker_name TEXT NOT NULL,
+                attacker_th INTEGER NOT NULL,
+                attacker_position INTEGER NOT NULL,
+                defender_tag TEXT NOT NULL,
+                defender_th INTEGER NOT NULL,
+                defender_position INTEGER NOT NULL,
+                stars INTEGER NOT NULL,
+                destruction REAL NOT NULL,
+                UNIQUE (clan_tag, war_start, attack_order)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_war_attacks_clan ON war_attacks (clan_tag, id)",
+            # Angegriffene Distrikte und einzelne Angriffe aus dem Angriffslog
+            """
+            CREATE TABLE IF NOT EXISTS capital_raid_districts (
+                clan_tag TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                defender_tag TEXT NOT NULL,
+                defender_name TEXT NOT NULL,
+                district_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                district_hall_level INTEGER NOT NULL DEFAULT 0,
+                destruction_percent INTEGER NOT NULL DEFAULT 0,
+                attack_count INTEGER NOT NULL DEFAULT 0,
+                total_looted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (clan_tag, start_time, defender_tag, district_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS capital_raid_attacks (
+                clan_tag TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                defender_tag TEXT NOT NULL,
+                district_id INTEGER NOT NULL,
+                attack_number INTEGER NOT NULL,
+                attacker_tag TEXT NOT NULL,
+                attacker_name TEXT NOT NULL,
+                destruction_percent INTEGER NOT NULL DEFAULT 0,
+                stars INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (clan_tag, start_time, defender_tag, district_id, attack_number)
+            )
+            """,
+        ])
+
+    # Clanstadt
+
+    async def get_capital_season_states(self, clan_tag: str) -> dict[str, str]:
+        """Gespeicherte Raid-Wochenenden eines Clans als `start_time -> state`."""
+        rows = await self.fetchall("SELECT start_time, state FROM capital_raid_seasons WHERE clan_tag = ?",
+                                   (clan_tag,))
+        return dict(rows)
+
+    async def is_capital_backfill_complete(self, clan_tag: str) -> bool:
+        row = await self.pool.run(self._execute, "SELECT 1 FROM capital_backfill WHERE clan_tag = ?",
+                                  (clan_tag,), "one")
+        return row is not None
+
+    async def set_capital_backfill_complete(self, clan_tag: str):
+        await self.pool.run(self._execute, "INSERT OR REPLACE INTO capital_backfill (clan_tag, completed_at) "
+                                           "VALUES (?, ?)", (clan_tag, int(time.time())), None)
+
+    @staticmethod
+    def _upsert_capital_seasons(connection, seasons: list):
+        cursor = connection.cursor()
+        try:
+            for season in seasons:
+                key = (season.clan_tag, season.start_time)
+                cursor.execute("""
+                    INSERT INTO capital_raid_seasons (clan_tag, start_time, end_time, state, capital_total_loot,
+                        raids_completed, total_attacks, enemy_districts_destroyed, offensive_reward, defensive_reward)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (clan_tag, start_time) DO UPDATE SET
+                        end_time = excluded.end_time, state = excluded.state,
+                        capital_total_loot = excluded.capital_total_loot, raids_completed = excluded.raids_completed,
+                        total_attacks = excluded.total_attacks,
+                        enemy_districts_destroyed = excluded.enemy_districts_destroyed,
+                        offensive_reward = excluded.offensive_reward, defensive_reward = excluded.defensive_reward
+                """, season.row)
+                # Bisherigen Stand dieses Wochenendes aus den Summen herausrechnen
+                cursor.execute("SELECT attacks, capital_resources_looted, clan_tag, player_tag "
+                               "FROM capital_raid_members WHERE clan_tag = ? AND start_time = ?", key)
+                cursor.executemany("""
+                    UPDATE capital_player_totals SET seasons = seasons - 1, attacks = attacks - ?,
+                        capital_resources_looted = capital_resources_looted - ?
+                    WHERE clan_tag = ? AND player_tag = ?
+                """, cursor.fetchall())
+                # Ein laufendes Wochenende wächst noch: Detailzeilen komplett ersetzen statt einzeln abgleichen
+                for table in ("capital_raid_members", "capital_raid_districts", "capital_raid_attacks"):
+                    cursor.execute(f"DELETE FROM {table} WHERE clan_tag = ? AND start_time = ?", key)
+                cursor.executemany("INSERT INTO capital_raid_members VALUES (?, ?, ?, ?, ?, ?, ?, ?)", season.members)
+                cursor.executemany("""
+                    INSERT INTO capital_player_totals (clan_tag, player_tag, name, last_season, seasons, attacks,
+                        capital_resources_looted)
+                    VALUES (?, ?, ?, ?, 1, ?, ?)
+                    ON CONFLICT (clan_tag, player_tag) DO UPDATE SET
+                        seasons = seasons + 1, attacks = attacks + excluded.attacks,
+                        capital_resources_looted = capital_resources_looted + excluded.capital_resources_looted,
+                        name = CASE WHEN excluded.last_season >= last_season THEN excluded.name ELSE name END,
+                        last_season = MAX(last_season, excluded.last_season)
+                """, [(clan_tag, player_tag, name, start_time, attacks, looted)
+                      for clan_tag, start_time, player_tag, name, attacks, _, _, looted in season.members])
+                cursor.executemany("INSERT INTO capital_raid_districts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   season.districts)
+                cursor.executemany("INSERT INTO capital_raid_attacks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   season.attacks)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    async def upsert_capital_seasons(self, seasons: list):
+        """Speichert mehrere Raid-Wochenenden (`CapitalSeason`) samt Details in einer Transaktion."""
+        await self.pool.run(self._upsert_capital_seasons, seasons)
+
+    async def get_capital_totals(self, clan_tag: str, column: str) -> list[tuple]:
+        """Summen aller Wochenenden pro Spieler als (player_tag, name, Wert), absteigend nach `column`."""
+        return await self.fetchall(f"SELECT player_tag, name, {column} FROM capital_player_totals "
+                                   f"WHERE clan_tag = ? AND seasons > 0 ORDER BY {column} DESC, name", (clan_tag,))
+
+    async def get_capital_season_members(self, clan_tag: str, start_time: str, column: str) -> list[tuple]:
+        """Mitglieder eines Wochenendes als (player_tag, name, Wert), absteigend nach `column`."""
+        return await self.fetchall(f"SELECT player_tag, name, {column} FROM capital_raid_members "
+                                   f"WHERE clan_tag = ? AND start_time = ? ORDER BY {column} DESC, name",
+                                   (clan_tag, start_time))
+
+    @staticmethod
+    def _fetch_many(connection, queries: list[tuple[str, tuple]]) -> list[list]:
+        cursor = connection.cursor()
+        try:
+            results = []
+            for query, params in queries:
+                cursor.execute(query, params)
+                results.append(cursor.fetchall())
+            return results
+        finally:
+            cursor.close()
+
+    async def get_capital_season_details(self, clan_tag: str, start_time: str) -> tuple[list, list, list]:
+        """
+        Mitglieder, Distrikte und Angriffe eines Wochenendes mit einer Verbindung.
+
+        Die Angriffe sind nach Distrikt und Zerstörung sortiert, also innerhalb eines Distrikts chronologisch.
+        """
+        key = (clan_tag, start_time)
+        members, districts, attacks = await self.pool.run(self._fetch_many, [
+            ("SELECT player_tag, name, attacks, capital_resources_looted FROM capital_raid_members "
+             "WHERE clan_tag = ? AND start_time = ?", key),
+            ("SELECT name, district_hall_level, destruction_percent, attack_count, total_looted "
+             "FROM capital_raid_districts WHERE clan_tag = ? AND start_time = ?", key),
+            ("SELECT defender_tag || '/' || district_id, attacker_tag, destruction_percent FROM capital_raid_attacks "
+             "WHERE clan_tag = ? AND start_time = ? ORDER BY defender_tag, district_id, destruction_percent", key),
+        ])
+        return members, districts, attacks
+
+    # Clan-Kriege
+
+    @staticmethod
+    def _executemany(connection, query: str, rows: list) -> int:
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(query, rows)
+            connection.commit()
+            return cursor.rowcount
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    async def insert_war_attacks(self, rows: list[tuple]) -> int:
+        """Speichert neue Angriffe; bereits bekannte werden übersprungen. Gibt die Zahl neuer Angriffe zurück."""
+        return await self.pool.run(self._executemany, """
+            INSERT OR IGNORE INTO war_attacks (clan_tag, war_start, war_end, attack_order, attacker_tag,
+                attacker_name, attacker_th, attacker_position, defender_tag, defender_th, defender_position,
+                stars, destruction)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    async def get_war_attacks_after(self, clan_tag: str, after_id: int) -> list[tuple]:
+        """Angriffe eines Clans mit `id > after_id`, aufsteigend nach `id`."""
+        return await self.fetchall("""
+            SELECT id, war_end, attack_order, attacker_tag, attacker_name, attacker_th, defender_th, stars,
+                destruction
+            FROM war_attacks WHERE clan_tag = ? AND id > ? ORDER BY id
+        """, (clan_tag, after_id))
+
+    async def get_event_channel_id(self, event_type: str) -> Optional[int]:
+        row = await self.pool.run(self._execute, "SELECT channel_id FROM event_channels WHERE event_type = ?",
+                                  (event_type,), "one")
+        return int(row[0]) if row else None
 
+    async def get_discord_ids(self, player_tags: list[str]) -> dict[str, int]:
+        """Discord-IDs der verifizierten Spieler unter `player_tags` als `player_tag -> discord_id`."""
+        if not player_tags:
+            return {}
+        placeholders = ", ".join("?" * len(player_tags))
+        rows = await self.fetchall(f"SELECT player_tag, discord_id FROM verified_players "
+                                   f"WHERE player_tag IN ({placeholders})", tuple(player_tags))
+        return dict(rows)
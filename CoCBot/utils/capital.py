@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Raid-Wochenenden pro API-Seite und damit pro Transaktion
+CAPITAL_PAGE_SIZE = 10
+
+# Wertungen der Bestenliste: Schlüssel -> (Spalte, Bezeichnung)
+LEADERBOARD_METRICS = {
+    "loot": ("capital_resources_looted", "Raid-Beute"),
+    "attacks": ("attacks", "Angriffe"),
+}
+LEADERBOARD_PAGE_SIZE = 10
+# Zwischengespeicherte Ranglisten (Clan, Wochenende, Wertung)
+LEADERBOARD_CACHE_SIZE = 64
+
+
+@dataclass
+class CapitalSeason:
+    """Ein Raid-Wochenende als Datenbankzeilen (siehe `ClashDatabase.upsert_capital_seasons`)."""
+    clan_tag: str
+    start_time: str
+    state: str
+    row: tuple
+    members: list[tuple] = field(default_factory=list)
+    districts: list[tuple] = field(default_factory=list)
+    attacks: list[tuple] = field(default_factory=list)
+
+    @property
+    def ended(self) -> bool:
+        return self.state == "ended"
+
+    @classmethod
+    def from_api(cls, clan_tag: str, data: dict) -> "CapitalSeason":
+        start_time = data["startTime"]
+        key = (clan_tag, start_time)
+        season = cls(clan_tag, start_time, data.get("state", ""), key + (
+            data.get("endTime", ""), data.get("state", ""), data.get("capitalTotalLoot", 0),
+            data.get("raidsCompleted", 0), data.get("totalAttacks", 0), data.get("enemyDistrictsDestroyed", 0),
+            data.get("offensiveReward", 0), data.get("defensiveReward", 0)))
+        for member in data.get("members", []):
+            season.members.append(key + (
+                member["tag"], member.get("name", ""), member.get("attacks", 0), member.get("attackLimit", 0),
+                member.get("bonusAttackLimit", 0), member.get("capitalResourcesLooted", 0)))
+        for raid in data.get("attackLog", []):
+            defender = raid.get("defender", {})
+            defender_tag = defender.get("tag", "")
+            for district in raid.get("districts", []):
+                season.districts.append(key + (
+                    defender_tag, defender.get("name", ""), district["id"], district.get("name", ""),
+                    district.get("districtHallLevel", 0), district.get("destructionPercent", 0),
+                    district.get("attackCount", 0), district.get("totalLooted", 0)))
+                for number, attack in enumerate(district.get("attacks", [])):
+                    attacker = attack.get("attacker", {})
+                    season.attacks.append(key + (
+                        defender_tag, district["id"], number, attacker.get("tag", ""), attacker.get("name", ""),
+                        attack.get("destructionPercent", 0), attack.get("stars", 0)))
+        return season
+
+
+class CapitalLeaderboard:
+    """
+    Ranglisten aus den vorab summierten Tabellen, zwischengespeichert bis zum nächsten Speichern.
+
+    Die Summen über alle Wochenenden führt die Datenbank beim Speichern mit (`capital_player_totals`), ein
+    einzelnes Wochenende ist ohnehin nur eine Zeile pro Mitglied. Jede Rangliste wird einmal sortiert geladen;
+    alle Seiten und wiederholten Aufrufe schneiden danach nur noch aus der Liste im Speicher.
+    """
+
+    def __init__(self, db, cache_size: int = LEADERBOARD_CACHE_SIZE):
+        self.db = db
+        self.cache_size = cache_size
+        self.rankings: OrderedDict[tuple, list[tuple]] = OrderedDict()
+
+    async def ranking(self, clan_tag: str, season: Optional[str], metric: str) -> list[tuple]:
+        """Alle Spieler als (player_tag, name, Wert), bester zuerst; `season=None` steht für alle Wochenenden."""
+        key = (clan_tag, season, metric)
+        ranking = self.rankings.get(key)
+        if ranking is not None:
+            self.rankings.move_to_end(key)
+            return ranking
+        column = LEADERBOARD_METRICS[metric][0]
+        if season is None:
+            ranking = await self.db.get_capital_totals(clan_tag, column)
+        else:
+            ranking = await self.db.get_capital_season_members(clan_tag, season, column)
+        self.rankings[key] = ranking
+        if len(self.rankings) > self.cache_size:
+            self.rankings.popitem(last=False)
+        return ranking
+
+    async def page(self, clan_tag: str, season: Optional[str], metric: str, page: int,
+                   page_size: int = LEADERBOARD_PAGE_SIZE) -> tuple[list[tuple], int]:
+        """Einträge einer Seite (ab 1) als (Rang, player_tag, name, Wert) und die Anzahl der Seiten."""
+        ranking = await self.ranking(clan_tag, season, metric)
+        pages = max(1, math.ceil(len(ranking) / page_size))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * page_size
+        return [(start + offset + 1, *row) for offset, row in enumerate(ranking[start:start + page_size])], pages
+
+    def invalidate(self, clan_tag: str, seasons: list[str]):
+        """Verwirft die Ranglisten aller Wochenenden und die betroffener Einzelwochenenden."""
+        affected = {None, *seasons}
+        for key in [key for key in self.rankings if key[0] == clan_tag and key[1] in affected]:
+            del self.rankings[key]
+
+
+class CapitalStore:
+    """
+    Speichert die Raid-Wochenenden der Clanstadt.
+
+    `ingest` läuft die paginierte Raid-Historie von neu nach alt ab und schreibt jede Seite in einer Transaktion.
+    Bis die Historie einmal vollständig bis zum Ende durchlaufen wurde, werden bereits gespeicherte Wochenenden
+    übersprungen und die Paginierung fortgesetzt; ein abgebrochener erster Lauf wird so beim nächsten Mal
+    nachgeholt. Danach endet jeder Durchlauf beim ersten abgeschlossenen Wochenende und kostet in der Regel
+    einen einzigen Abruf.
+    """
+
+    def __init__(self, coc_api, db):
+        self.coc_api = coc_api
+        self.db = db
+        self.states: dict[str, dict[str, str]] = {}  # Clan -> start_time -> state der gespeicherten Wochenenden
+        self.backfilled: dict[str, bool] = {}  # Clan -> Historie vollständig gespeichert
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.leaderboard = CapitalLeaderboard(db)
+
+    async def known_states(self, clan_tag: str) -> dict[str, str]:
+        if clan_tag not in self.states:
+            self.states[clan_tag] = await self.db.get_capital_season_states(clan_tag)
+        return self.states[clan_tag]
+
+    async def latest_season(self, clan_tag: str) -> Optional[str]:
+        known = await self.known_states(clan_tag)
+        return max(known) if known else None
+
+    async def ingest(self, clan_tag: str) -> list[CapitalSeason]:
+        """Holt neue und laufende Raid-Wochenenden und gibt die gespeicherten zurück."""
+        lock = self._locks.setdefault(clan_tag, asyncio.Lock())
+        async with lock:
+            known = await self.known_states(clan_tag)
+            if clan_tag not in self.backfilled:
+                self.backfilled[clan_tag] = await self.db.is_capital_backfill_complete(clan_tag)
+            backfilled = self.backfilled[clan_tag]
+            stored = []
+            reached_known = False
+            # Fehler beim Abruf brechen den Durchlauf ab, statt wie das Ende der Historie auszusehen
+            async for page in self.coc_api.iter_capital_raid_seasons(clan_tag, CAPITAL_PAGE_SIZE, raise_errors=True):
+                batch = []
+                for data in page:
+                    if known.get(data.get("startTime")) == "ended":
+                        if backfilled:
+                            reached_known = True
+                            break
+                        continue
+                    batch.append(CapitalSeason.from_api(clan_tag, data))
+                if batch:
+                    await self.db.upsert_capital_seasons(batch)
+                    for season in batch:
+                        known[season.start_time] = season.state
+                    self.leaderboard.invalidate(clan_tag, [season.start_time for season in batch])
+                    stored.extend(batch)
+                if reached_known:
+                    break
+            if not backfilled:
+                await self.db.set_capital_backfill_complete(clan_tag)
+                self.backfilled[clan_tag] = True
+                logger.info("Raid-Historie von %s vollständig gespeichert.", clan_tag)
+            if stored:
+                logger.info("%s Raid-Wochenenden von %s gespeichert.", len(stored), clan_tag)
+            return stored
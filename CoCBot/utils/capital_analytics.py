@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Spieler mit weniger Angriffen verzerren die Effizienz und werden im Bericht ausgelassen
+MIN_ATTACKS_FOR_EFFICIENCY = 5
+
+
+@dataclass
+class SeasonColumns:
+    """Ein Raid-Wochenende spaltenweise als NumPy-Arrays."""
+    member_tags: np.ndarray
+    member_names: np.ndarray
+    member_attacks: np.ndarray
+    member_loot: np.ndarray
+    district_names: np.ndarray
+    district_destruction: np.ndarray
+    district_attacks: np.ndarray
+    attack_tags: np.ndarray
+    attack_gain: np.ndarray  # Zerstörung, die der einzelne Angriff zum Distrikt beigetragen hat
+
+    @classmethod
+    def from_rows(cls, members: list, districts: list, attacks: list) -> "SeasonColumns":
+        member_tags, member_names, member_attacks, member_loot = _columns(members, 4)
+        district_names, _, district_destruction, district_attacks, _ = _columns(districts, 5)
+        attack_keys, attack_tags, destruction = _columns(attacks, 3)
+        destruction = destruction.astype(np.int32)
+        # Die API liefert pro Angriff die Zerstörung des Distrikts danach; der Beitrag ist die Differenz
+        # zum vorherigen Angriff auf denselben Distrikt (die Zeilen sind danach sortiert)
+        gain = np.diff(destruction, prepend=0)
+        if len(attack_keys):
+            first = np.r_[True, attack_keys[1:] != attack_keys[:-1]]
+            gain[first] = destruction[first]
+        return cls(member_tags.astype(str), member_names.astype(str), member_attacks.astype(np.int32),
+                   member_loot.astype(np.int64), district_names.astype(str), district_destruction.astype(np.int32),
+                   district_attacks.astype(np.int32), attack_tags.astype(str), gain)
+
+
+def _columns(rows: list, width: int) -> list[np.ndarray]:
+    """Zeilen einer Abfrage in eine Spalte pro Feld umwandeln."""
+    if not rows:
+        return [np.empty(0, dtype=object) for _ in range(width)]
+    return list(np.array(rows, dtype=object).T)
+
+
+@dataclass
+class DistrictStats:
+    name: str
+    cleared: int
+    attacks_to_clear: float
+
+
+@dataclass
+class PlayerStats:
+    tag: str
+    name: str
+    attacks: int
+    loot: int
+    loot_per_attack: float
+    destruction_per_attack: float
+
+
+class CapitalAnalytics:
+    """
+    Auswertungen über gespeicherte Raid-Wochenenden.
+
+    Jedes Wochenende wird einmal spaltenweise geladen; abgeschlossene Wochenenden ändern sich nicht mehr und
+    bleiben im Speicher. Berichte über mehrere Wochenenden hängen die Spalten aneinander und gruppieren mit
+    `np.unique`/`np.bincount`, sodass die Kosten nicht mit Python-Schleifen pro Angriff wachsen.
+    """
+
+    def __init__(self, db, store):
+        self.db = db
+        self.store = store  # `CapitalStore` für den Stand der Wochenenden
+        self.seasons: dict[tuple[str, str], SeasonColumns] = {}
+        self._load_lock = asyncio.Lock()
+
+    async def season(self, clan_tag: str, start_time: str) -> SeasonColumns:
+        key = (clan_tag, start_time)
+        columns = self.seasons.get(key)
+        if columns is not None:
+            return columns
+        async with self._load_lock:
+            columns = self.seasons.get(key)
+            if columns is None:
+                columns = SeasonColumns.from_rows(*await self.db.get_capital_season_details(clan_tag, start_time))
+                # Ein laufendes Wochenende ändert sich mit jedem Abruf und wird deshalb nicht behalten
+                if (await self.store.known_states(clan_tag)).get(start_time) == "ended":
+                    self.seasons[key] = columns
+        return columns
+
+    async def recent_seasons(self, clan_tag: str, count: int) -> list[SeasonColumns]:
+        """Die letzten `count` Wochenenden, neuestes zuerst."""
+        start_times = sorted(await self.store.known_states(clan_tag), reverse=True)[:count]
+        return [await self.season(clan_tag, start_time) for start_time in start_times]
+
+    @staticmethod
+    def district_report(seasons: list[SeasonColumns]) -> list[DistrictStats]:
+        """Durchschnittliche Angriffe bis zur vollständigen Zerstörung pro Distrikt, schwierigster zuerst."""
+        if not seasons:
+            return []
+        names = np.concatenate([season.district_names for season in seasons])
+        destruction = np.concatenate([season.district_destruction for season in seasons])
+        attacks = np.concatenate([season.district_attacks for season in seasons])
+        cleared = destruction >= 100
+        if not cleared.any():
+            return []
+        unique, inverse = np.unique(names[cleared], return_inverse=True)
+        counts = np.bincount(inverse)
+        mean_attacks = np.bincount(inverse, weights=attacks[cleared]) / counts
+        order = np.argsort(-mean_attacks)
+        return [DistrictStats(str(unique[i]), int(counts[i]), float(mean_attacks[i])) for i in order]
+
+    @staticmethod
+    def player_report(seasons: list[SeasonColumns],
+                      min_attacks: int = MIN_ATTACKS_FOR_EFFICIENCY) -> list[PlayerStats]:
+        """Beute und Zerstörung pro Angriff je Spieler, effizientester zuerst."""
+        if not seasons:
+            return []
+        member_tags = np.concatenate([season.member_tags for season in seasons])
+        member_names = np.concatenate([season.member_names for season in seasons])
+        attack_tags = np.concatenate([season.attack_tags for season in seasons])
+        gains = np.concatenate([season.attack_gain for season in seasons])
+        if not len(member_tags):
+            return []
+        # Gemeinsame Indizes für Mitglieds- und Angriffszeilen
+        unique, inverse = np.unique(np.concatenate([member_tags, attack_tags]), return_inverse=True)
+        member_index, attack_index = inverse[:len(member_tags)], inverse[len(member_tags):]
+        size = len(unique)
+        attacks = np.bincount(member_index, weights=np.concatenate([s.member_attacks for s in seasons]),
+                              minlength=size)
+        loot = np.bincount(member_index, weights=np.concatenate([s.member_loot for s in seasons]), minlength=size)
+        destruction = np.bincount(attack_index, weights=gains, minlength=size)
+        logged_attacks = np.bincount(attack_index, minlength=size)
+        # Neueste Wochenenden stehen vorne: das erste Vorkommen liefert den aktuellen Namen
+        names = np.empty(size, dtype=object)
+        first_seen = np.unique(member_index, return_index=True)[1]
+        names[member_index[first_seen]] = member_names[first_seen]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loot_per_attack = np.where(attacks > 0, loot / attacks, 0.0)
+            destruction_per_attack = np.where(logged_attacks > 0, destruction / logged_attacks, 0.0)
+        eligible = np.flatnonzero(attacks >= min_attacks)
+        order = eligible[np.argsort(-loot_per_attack[eligible])]
+        return [PlayerStats(str(unique[i]), str(names[i] or unique[i]), int(attacks[i]), int(loot[i]),
+                            float(loot_per_attack[i]), float(destruction_per_attack[i])) for i in order]
+
+    async def report(self, clan_tag: str, count: int) -> tuple[list[DistrictStats], list[PlayerStats]]:
+        seasons = await self.recent_seasons(clan_tag, count)
+        return self.district_report(seasons), self.player_report(seasons)
+
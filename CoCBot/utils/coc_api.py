@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import aiohttp
+
+from common.http import HttpClient
+
+logger = logging.getLogger(__name__)
+
+API_BASE_URL = os.getenv("COC_API_BASE_URL", "https://api.clashofclans.com/v1")
+
+
+def parse_time(value: str) -> float:
+    """Zeitangabe der API (`20240105T070000.000Z`) als Unix-Zeitstempel."""
+    return datetime.strptime(value, "%Y%m%dT%H%M%S.%fZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def encode_tag(tag: str) -> str:
+    """Kodiert ein Clan- oder Spieler-Tag für die URL (`#` -> `%23`)."""
+    return quote(tag, safe="")
+
+
+class CocApiError(Exception):
+    """Die API war nicht erreichbar oder hat mit einem Fehler (außer 404) geantwortet."""
+
+
+class CocApi:
+    """Asynchroner Zugriff auf die Clash of Clans API über den gemeinsamen HTTP-Client."""
+
+    def __init__(self, http_client: HttpClient, token: Optional[str] = None):
+        self.http = http_client
+        self.token = token or os.getenv("COC_API_TOKEN")
+
+    def get_headers(self) -> dict:
+        """Headers für die Clash of Clans API."""
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def fetch(self, path: str, params: Optional[dict] = None, label: str = "API",
+                    raise_errors: bool = False) -> Optional[dict]:
+        """
+        Holt einen Endpunkt der Clash of Clans API.
+
+        :param path: Pfad relativ zur API, z. B. `/clans/%23ABC/currentwar`.
+        :param params: Optionale Query-Parameter.
+        :param label: Bezeichnung für Log-Meldungen, z. B. "Clan-Krieg".
+        :param raise_errors: Fehler als `CocApiError` melden statt None zurückzugeben; 404 bleibt None.
+        :return: Die JSON-Antwort oder None bei einem Fehler bzw. 404.
+        """
+        try:
+            async with self.http.get(f"{API_BASE_URL}{path}", headers=self.get_headers(), params=params) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status == 404:
+                    logger.info("Keine gültigen %s-Daten gefunden (404).", label)
+                    return None
+                text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if raise_errors:
+                raise CocApiError(f"Fehler bei der Verbindung zur API: {e}") from e
+            logger.error("Fehler bei der Verbindung zur API: %s", e)
+            return None
+        if raise_errors:
+            raise CocApiError(f"Fehler beim Abrufen der {label}-Daten: {response.status} - {text}")
+        logger.error("Fehler beim Abrufen der %s-Daten: %s - %s", label, response.status, text)
+        return None
+
+    async def get_player(self, player_tag: str) -> Optional[dict]:
+        return await self.fetch(f"/players/{encode_tag(player_tag)}", label="Spieler")
+
+    async def get_clan(self, clan_tag: str, raise_errors: bool = False) -> Optional[dict]:
+        return await self.fetch(f"/clans/{encode_tag(clan_tag)}", label="Clan", raise_errors=raise_errors)
+
+    async def get_current_war(self, clan_tag: str, raise_errors: bool = False) -> Optional[dict]:
+        return await self.fetch(f"/clans/{encode_tag(clan_tag)}/currentwar", label="Clan-Krieg",
+                                raise_errors=raise_errors)
+
+    async def get_league_group(self, clan_tag: str, raise_errors: bool = False) -> Optional[dict]:
+        return await self.fetch(f"/clans/{encode_tag(clan_tag)}/currentwarleaguegroup", label="CWL",
+                                raise_errors=raise_errors)
+
+    async def iter_pages(self, path: str, limit: int = 10, label: str = "API",
+                         raise_errors: bool = False) -> AsyncIterator[list[dict]]:
+        """
+        Liefert die Einträge eines paginierten Endpunkts seitenweise als Stream.
+
+        Die nächste Seite wird erst angefragt, wenn der Aufrufer die vorherige verarbeitet hat; bricht er ab,
+        entfallen alle weiteren Abrufe. Mit `raise_errors` endet der Stream nur am Ende der Daten, ein Fehler
+        mittendrin wird als `CocApiError` gemeldet.
+        """
+        params = {"limit": limit}
+        while True:
+            data = await self.fetch(path, params, label, raise_errors)
+            if not data:
+                return
+            items = data.get("items", [])
+            if items:
+                yield items
+            after = data.get("paging", {}).get("cursors", {}).get("after")
+            if not after or len(items) < limit:
+                return
+            params = {"limit": limit, "after": after}
+
+    def iter_capital_raid_seasons(self, clan_tag: str, limit: int = 10,
+                                  raise_errors: bool = False) -> AsyncIterator[list[dict]]:
+        """Raid-Wochenenden der Clanstadt, neueste zuerst."""
+        return self.iter_pages(f"/clans/{encode_tag(clan_tag)}/capitalraidseasons", limit, "Clanstadt-Raid",
+                               raise_errors)
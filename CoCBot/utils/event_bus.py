@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from CoCBot.utils.coc_api import CocApi, CocApiError
+
+logger = logging.getLogger(__name__)
+
+# Endpunkte, die über den Bus verteilt werden
+CLAN = "clan"
+CURRENT_WAR = "currentwar"
+LEAGUE_GROUP = "leaguegroup"
+
+# Abfrageintervall pro Endpunkt in Sekunden; gilt zugleich als maximales Alter für `EventBus.get`
+POLL_INTERVALS = {
+    CLAN: 600,
+    CURRENT_WAR: 300,
+    LEAGUE_GROUP: 900,
+}
+# Nach einem fehlgeschlagenen Abruf so früh erneut versuchen, höchstens aber im regulären Intervall
+ERROR_RETRY_SECONDS = 60
+
+PLAYER_CACHE_SECONDS = 120  # Spielerdaten so lange wiederverwenden
+PLAYER_CACHE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Antwort eines Endpunkts zu einem Zeitpunkt. `data` ist None, wenn die API nichts geliefert hat."""
+    clan_tag: str
+    fetched_at: float
+    data: Optional[dict]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+@dataclass(frozen=True)
+class ClanSnapshot(Snapshot):
+    member_tags: frozenset = field(default_factory=frozenset)
+
+    @classmethod
+    def parse(cls, clan_tag: str, data: Optional[dict]) -> "ClanSnapshot":
+        members = frozenset(member["tag"] for member in (data or {}).get("memberList", []))
+        return cls(clan_tag, time.time(), data, members)
+
+
+@dataclass(frozen=True)
+class WarSnapshot(Snapshot):
+    state: str = "notInWar"
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("inWar", "preparation")
+
+    @classmethod
+    def parse(cls, clan_tag: str, data: Optional[dict]) -> "WarSnapshot":
+        return cls(clan_tag, time.time(), data, (data or {}).get("state", "notInWar"))
+
+
+@dataclass(frozen=True)
+class LeagueGroupSnapshot(Snapshot):
+    rounds: tuple = ()
+
+    @classmethod
+    def parse(cls, clan_tag: str, data: Optional[dict]) -> "LeagueGroupSnapshot":
+        return cls(clan_tag, time.time(), data, tuple((data or {}).get("rounds", [])))
+
+
+SNAPSHOT_TYPES = {
+    CLAN: ClanSnapshot,
+    CURRENT_WAR: WarSnapshot,
+    LEAGUE_GROUP: LeagueGroupSnapshot,
+}
+
+Subscriber = Callable[[Snapshot], Awaitable[None]]
+
+
+class EventBus:
+    """
+    Verteilt Daten der Clash of Clans API an alle Cogs.
+
+    Pro (Endpunkt, Clan) gibt es höchstens einen Poller, solange es Abonnenten gibt; die letzte Antwort bleibt
+    gespeichert und wird neuen Abonnenten sofort zugestellt. `get` liefert sie ohne eigenen Poller, solange
+    sie frisch genug ist, und bündelt gleichzeitige Abrufe zu einer Anfrage. So skaliert die Zahl der
+    API-Aufrufe mit den Endpunkten, nicht mit der Zahl der Features.
+    """
+
+    def __init__(self, coc_api: CocApi, wait_ready: Optional[Callable[[], Awaitable]] = None):
+        self.coc_api = coc_api
+        self.wait_ready = wait_ready  # Poller starten erst, wenn der Bot bereit ist
+        self.snapshots: dict[tuple[str, str], Snapshot] = {}
+        self.subscribers: dict[tuple[str, str], list[Subscriber]] = {}
+        self.pollers: dict[tuple[str, str], asyncio.Task] = {}
+        self.in_flight: dict[tuple, asyncio.Task] = {}
+        self.players: OrderedDict[str, tuple[float, Optional[dict]]] = OrderedDict()
+
+    def latest(self, endpoint: str, clan_tag: str) -> Optional[Snapshot]:
+        return self.snapshots.get((endpoint, clan_tag))
+
+    def subscribe(self, endpoint: str, clan_tag: str, callback: Subscriber) -> Callable[[], None]:
+        """
+        Abonniert einen Endpunkt. Eine bereits vorhandene Antwort wird sofort zugestellt.
+
+        :return: Funktion zum Abbestellen.
+        """
+        key = (endpoint, clan_tag)
+        self.subscribers.setdefault(key, []).append(callback)
+        retained = self.snapshots.get(key)
+        if retained is not None:
+            asyncio.create_task(self._deliver(callback, retained))
+        if key not in self.pollers:
+            self.pollers[key] = asyncio.create_task(self._poll(key), name=f"poll-{endpoint}-{clan_tag}")
+
+        def unsubscribe():
+            callbacks = self.subscribers.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.subscribers.pop(key, None)
+                poller = self.pollers.pop(key, None)
+                if poller is not None:
+                    poller.cancel()
+
+        return unsubscribe
+
+    async def get(self, endpoint: str, clan_tag: str, max_age: Optional[float] = None) -> Snapshot:
+        """Letzte Antwort, falls jünger als `max_age` (Standard: Abfrageintervall), sonst ein neuer Abruf."""
+        max_age = POLL_INTERVALS[endpoint] if max_age is None else max_age
+        retained = self.snapshots.get((endpoint, clan_tag))
+        if retained is not None and retained.age <= max_age:
+            return retained
+        return await self.refresh(endpoint, clan_tag)
+
+    async def refresh(self, endpoint: str, clan_tag: str) -> Snapshot:
+        """
+        Ruft den Endpunkt sofort ab und verteilt das Ergebnis an alle Abonnenten.
+
+        Schlägt der Abruf fehl, wird nichts verteilt und die letzte Antwort bleibt erhalten; zurückgegeben wird
+        dann diese bzw. ohne vorherige Antwort eine leere, die weder gespeichert noch verteilt wird.
+        """
+        # Gleichzeitige Aufrufer teilen sich Abruf und Verteilung: Abonnenten erhalten jede Antwort nur einmal
+        return await self._coalesce((endpoint, clan_tag), lambda: self._fetch_and_publish(endpoint, clan_tag))
+
+    async def _fetch_and_publish(self, endpoint: str, clan_tag: str) -> Snapshot:
+        key = (endpoint, clan_tag)
+        try:
+            snapshot = await self._fetch(endpoint, clan_tag)
+        except CocApiError as e:
+            logger.error("Fehler beim Abrufen von %s für %s: %s", endpoint, clan_tag, e)
+            retained = self.snapshots.get(key)
+            return retained if retained is not None else SNAPSHOT_TYPES[endpoint].parse(clan_tag, None)
+        await self._publish(key, snapshot)
+        return snapshot
+
+    async def get_player(self, player_tag: str, max_age: float = PLAYER_CACHE_SECONDS) -> Optional[dict]:
+        """Spielerdaten; gleichzeitige und kurz aufeinanderfolgende Abrufe eines Spielers teilen sich eine Anfrage."""
+        cached = self.players.get(player_tag)
+        if cached is not None and time.time() - cached[0] <= max_age:
+            self.players.move_to_end(player_tag)
+            return cached[1]
+        data = await self._coalesce(("player", player_tag), lambda: self.coc_api.get_player(player_tag))
+        self.players[player_tag] = (time.time(), data)
+        self.players.move_to_end(player_tag)
+        while len(self.players) > PLAYER_CACHE_SIZE:
+            self.players.popitem(last=False)
+        return data
+
+    async def _coalesce(self, key: tuple, factory: Callable[[], Awaitable]):
+        task = self.in_flight.get(key)
+        if task is None:
+            task = self.in_flight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # shield: bricht ein Aufrufer ab, läuft die Anfrage für die anderen weiter
+        return await asyncio.shield(task)
+
+    async def _fetch(self, endpoint: str, clan_tag: str) -> Snapshot:
+        """Neue Antwort des Endpunkts; Fehler der API werden als `CocApiError` gemeldet statt als leere Antwort."""
+        if endpoint == CLAN:
+            data = await self.coc_api.get_clan(clan_tag, raise_errors=True)
+        elif endpoint == CURRENT_WAR:
+            data = await self.coc_api.get_current_war(clan_tag, raise_errors=True)
+        elif endpoint == LEAGUE_GROUP:
+            data = await self.coc_api.get_league_group(clan_tag, raise_errors=True)
+        else:
+            raise ValueError(f"Unbekannter Endpunkt: {endpoint}")
+        return SNAPSHOT_TYPES[endpoint].parse(clan_tag, data)
+
+    async def _publish(self, key: tuple, snapshot: Snapshot):
+        self.snapshots[key] = snapshot
+        callbacks = list(self.subscribers.get(key, []))
+        if callbacks:
+            await asyncio.gather(*(self._deliver(callback, snapshot) for callback in callbacks))
+
+    @staticmethod
+    async def _deliver(callback: Subscriber, snapshot: Snapshot):
+        try:
+            await callback(snapshot)
+        except Exception as e:
+            logger.error("Fehler in Abonnent %s: %s", getattr(callback, "__qualname__", callback), e)
+
+    async def _poll(self, key: tuple):
+        endpoint, clan_tag = key
+        if self.wait_ready is not None:
+            await self.wait_ready()
+        interval = POLL_INTERVALS[endpoint]
+        while True:
+            retained = self.snapshots.get(key)
+            # Nach einem Neustart des Pollers oder einem manuellen refresh nicht sofort erneut abfragen
+            if retained is None or retained.age >= interval:
+                try:
+                    await self.refresh(endpoint, clan_tag)
+                except Exception as e:
+                    logger.error("Fehler beim Abrufen von %s für %s: %s", endpoint, clan_tag, e)
+                if self.snapshots.get(key) is retained:
+                    # Abruf fehlgeschlagen: letzte Antwort behalten und früher erneut versuchen
+                    await asyncio.sleep(min(ERROR_RETRY_SECONDS, interval))
+                    continue
+                retained = self.snapshots.get(key)
+            await asyncio.sleep(max(1.0, interval - retained.age))
+
+    async def close(self):
+        for poller in self.pollers.values():
+            poller.cancel()
+        await asyncio.gather(*self.pollers.values(), return_exceptions=True)
+        self.pollers.clear()
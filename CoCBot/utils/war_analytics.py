@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from CoCBot.utils.coc_api import encode_tag, parse_time
+
+logger = logging.getLogger(__name__)
+
+# Spaltenweiser Cache der Angriffe als .npy-Dateien, die per Memory-Mapping geladen werden
+WAR_STATS_DIR = os.getenv("CLASH_WAR_STATS_DIR", "war_stats")
+# Ab so vielen Abschnitten werden sie beim nächsten Öffnen des Caches zu einem zusammengeführt
+MAX_CHUNKS = 32
+
+# Spalten in der Reihenfolge von `ClashDatabase.get_war_attacks_after`
+COLUMNS = {
+    "id": np.int64,
+    "war_end": np.int64,
+    "attack_order": np.int16,
+    "attacker_tag": "U16",
+    "attacker_name": "U32",
+    "attacker_th": np.int8,
+    "defender_th": np.int8,
+    "stars": np.int8,
+    "destruction": np.float32,
+}
+# Die Angriffe eines Krieges werden nach ihrer Reihenfolge in so viele gleich große Abschnitte geteilt
+ORDER_BUCKETS = 5
+MIN_ATTACKS_PER_PLAYER = 3
+
+
+def war_attack_rows(clan_tag: str, data: dict) -> list[tuple]:
+    """Angriffe des eigenen Clans aus einer `currentwar`-Antwort als Zeilen für `war_attacks`."""
+    opponents = {member["tag"]: member for member in data.get("opponent", {}).get("members", [])}
+    war_start, war_end = data["preparationStartTime"], int(parse_time(data["endTime"]))
+    rows = []
+    for member in data.get("clan", {}).get("members", []):
+        for attack in member.get("attacks", []):
+            defender = opponents.get(attack["defenderTag"], {})
+            rows.append((clan_tag, war_start, war_end, attack["order"], member["tag"], member.get("name", ""),
+                         member.get("townhallLevel", 0), member.get("mapPosition", 0), attack["defenderTag"],
+                         defender.get("townhallLevel", 0), defender.get("mapPosition", 0), attack.get("stars", 0),
+                         attack.get("destructionPercentage", 0)))
+    return rows
+
+
+@dataclass
+class Rate:
+    """Anzahl der Angriffe, Anteil mit drei Sternen, durchschnittliche Sterne und Zerstörung einer Gruppe."""
+    label: str
+    attacks: int
+    three_star_rate: float
+    average_stars: float
+    average_destruction: float
+
+
+def grouped_rates(keys: np.ndarray, stars: np.ndarray, destruction: np.ndarray) -> tuple[np.ndarray, list[tuple]]:
+    """Kennzahlen pro Gruppe, vollständig über `np.unique`/`np.bincount`."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    three_stars = np.bincount(inverse, weights=stars == 3)
+    star_sum = np.bincount(inverse, weights=stars)
+    destruction_sum = np.bincount(inverse, weights=destruction)
+    return unique, list(zip(counts.tolist(), (three_stars / counts).tolist(), (star_sum / counts).tolist(),
+                            (destruction_sum / counts).tolist()))
+
+
+class ChunkedColumns(Mapping):
+    """
+    Spalten über mehrere Abschnitte des Caches. Jede Spalte wird erst beim ersten Zugriff zusammengefügt;
+    besteht der Cache aus nur einem Abschnitt, bleibt sie ohne Kopie gemappt.
+    """
+
+    def __init__(self, chunks: list[dict[str, np.ndarray]]):
+        self.chunks = chunks
+        self._joined: dict[str, np.ndarray] = {}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        values = self._joined.get(column)
+        if values is None:
+            if len(self.chunks) == 1:
+                values = self.chunks[0][column]
+            else:
+                values = np.concatenate([chunk[column] for chunk in self.chunks]) if self.chunks \
+                    else np.empty(0, dtype=COLUMNS[column])
+            self._joined[column] = values
+        return values
+
+    def __iter__(self):
+        return iter(COLUMNS)
+
+    def __len__(self) -> int:
+        return len(COLUMNS)
+
+
+class WarAnalytics:
+    """
+    Auswertungen über die gespeicherten Kriegsangriffe.
+
+    Die Angriffe eines Clans liegen spaltenweise als .npy-Dateien auf der Platte und werden per Memory-Mapping
+    geöffnet, sodass auch eine lange Historie nicht vollständig eingelesen werden muss. Neue Angriffe werden
+    anhand der fortlaufenden `id` nachgeladen und als eigener Abschnitt gespeichert, ohne die vorhandenen
+    Dateien neu zu schreiben; alle Berichte filtern und gruppieren die Spalten vektorisiert, ohne
+    Python-Schleife pro Angriff.
+    """
+
+    def __init__(self, db, directory: str = WAR_STATS_DIR):
+        self.db = db
+        self.directory = directory
+        self.columns: dict[str, ChunkedColumns] = {}
+        self.stale: set[str] = set()  # Clans mit neuen Angriffen seit dem letzten Laden
+        self._load_lock = asyncio.Lock()
+
+    async def record(self, clan_tag: str, data: dict) -> int:
+        """Speichert die Angriffe eines laufenden oder beendeten Krieges; gibt die Zahl neuer Angriffe zurück."""
+        rows = war_attack_rows(clan_tag, data)
+        if not rows:
+            return 0
+        inserted = await self.db.insert_war_attacks(rows)
+        if inserted > 0:
+            self.stale.add(clan_tag)
+        return inserted
+
+    def _clan_directory(self, clan_tag: str) -> str:
+        return os.path.join(self.directory, encode_tag(clan_tag))
+
+    def _chunk_names(self, clan_tag: str) -> list[tuple[int, int, str]]:
+        """
+        Abschnitte `<erste id>-<letzte id>` in aufsteigender Reihenfolge.
+
+        Ein Abschnitt, dessen Bereich schon ein vorheriger abdeckt, ist ein Überrest einer unterbrochenen
+        Zusammenführung und wird übergangen; halb geschriebene Abschnitte (`.`-Verzeichnisse) werden entfernt.
+        """
+        try:
+            entries = os.listdir(self._clan_directory(clan_tag))
+        except FileNotFoundError:
+            return []
+        chunks = []
+        for entry in entries:
+            if entry.startswith("."):
+                shutil.rmtree(os.path.join(self._clan_directory(clan_tag), entry), ignore_errors=True)
+                continue
+            first, _, last = entry.partition("-")
+            if first.isdigit() and last.isdigit():
+                chunks.append((int(first), int(last), entry))
+        chunks.sort(key=lambda chunk: (chunk[0], -chunk[1]))
+        selected, covered = [], 0
+        for chunk in chunks:
+            if chunk[0] > covered:
+                selected.append(chunk)
+                covered = chunk[1]
+        return selected
+
+    def _read_chunk(self, clan_tag: str, name: str, first: int, last: int,
+                    mmap_mode: Optional[str] = "r") -> Optional[dict[str, np.ndarray]]:
+        path = os.path.join(self._clan_directory(clan_tag), name)
+        try:
+            columns = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode)
+                       for column in COLUMNS}
+        except (OSError, ValueError):
+            return None
+        ids = columns["id"]
+        if len({len(values) for values in columns.values()}) != 1 or not len(ids) \
+                or int(ids[0]) != first or int(ids[-1]) != last:
+            return None
+        return columns
+
+    def _read(self, clan_tag: str) -> list[dict[str, np.ndarray]]:
+        """Öffnet alle gültigen Abschnitte eines Clans; ab dem ersten beschädigten wird neu geladen."""
+        names = self._chunk_names(clan_tag)
+        if len(names) > MAX_CHUNKS:
+            # Noch ist nichts gemappt: viele kleine Abschnitte zu einem zusammenführen
+            names = self._compact(clan_tag, names)
+        chunks = []
+        for index, (first, last, name) in enumerate(names):
+            columns = self._read_chunk(clan_tag, name, first, last)
+            if columns is None:
+                logger.warning("Kriegsstatistik-Cache von %s ist ab Abschnitt %s unvollständig und wird neu "
+                               "aufgebaut.", clan_tag, name)
+                for _, _, broken in names[index:]:
+                    shutil.rmtree(os.path.join(self._clan_directory(clan_tag), broken), ignore_errors=True)
+                break
+            chunks.append(columns)
+        return chunks
+
+    def _compact(self, clan_tag: str, names: list[tuple[int, int, str]]) -> list[tuple[int, int, str]]:
+        parts = []
+        for first, last, name in names:
+            columns = self._read_chunk(clan_tag, name, first, last, mmap_mode=None)
+            if columns is None:
+                break
+            parts.append(columns)
+        if len(parts) < 2:
+            return names
+        merged = {column: np.concatenate([part[column] for part in parts]) for column in COLUMNS}
+        written = self._write(clan_tag, merged)
+        for _, _, name in names[:len(parts)]:
+            shutil.rmtree(os.path.join(self._clan_directory(clan_tag), name), ignore_errors=True)
+        return [written, *names[len(parts):]]
+
+    def _write(self, clan_tag: str, columns: dict[str, np.ndarray]) -> tuple[int, int, str]:
+        """
+        Schreibt Angriffe als neuen Abschnitt. Er entsteht in einem temporären Verzeichnis und wird erst
+        vollständig umbenannt, bestehende (womöglich gemappte) Dateien werden nie überschrieben.
+        """
+        first, last = int(columns["id"][0]), int(columns["id"][-1])
+        name = f"{first}-{last}"
+        target = os.path.join(self._clan_directory(clan_tag), name)
+        os.makedirs(self._clan_directory(clan_tag), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{name}.", dir=self._clan_directory(clan_tag))
+        try:
+            for column, values in columns.items():
+                np.save(os.path.join(staging, f"{column}.npy"), values)
+            os.rename(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return first, last, name
+
+    async def load(self, clan_tag: str) -> "ChunkedColumns":
+        """Spalten aller Angriffe eines Clans; lädt nur Angriffe nach, die seit dem letzten Aufruf dazukamen."""
+        columns = self.columns.get(clan_tag)
+        if columns is not None and clan_tag not in self.stale:
+            return columns
+        async with self._load_lock:
+            columns = self.columns.get(clan_tag)
+            if columns is not None and clan_tag not in self.stale:
+                return columns
+            self.stale.discard(clan_tag)
+            # Nach einem Neustart den Cache von der Platte öffnen und nur Neues aus der Datenbank holen
+            chunks = list(columns.chunks) if columns is not None else await asyncio.to_thread(self._read, clan_tag)
+            last_id = int(chunks[-1]["id"][-1]) if chunks else 0
+            rows = await self.db.get_war_attacks_after(clan_tag, last_id)
+            if rows:
+                fields = np.array(rows, dtype=object).reshape(len(rows), len(COLUMNS)).T
+                new = {column: fields[index].astype(dtype) for index, (column, dtype) in enumerate(COLUMNS.items())}
+                first, last, name = await asyncio.to_thread(self._write, clan_tag, new)
+                chunks.append(await asyncio.to_thread(self._read_chunk, clan_tag, name, first, last) or new)
+                logger.info("%s neue Kriegsangriffe von %s übernommen.", len(rows), clan_tag)
+            columns = self.columns[clan_tag] = ChunkedColumns(chunks)
+            return columns
+
+    @staticmethod
+    def _since(columns: dict[str, np.ndarray], days: int) -> np.ndarray:
+        return np.asarray(columns["war_end"]) >= time.time() - days * 86400
+
+    async def war_report(self, clan_tag: str, days: int = 365) -> dict[str, list[Rate]]:
+        """Drei-Sterne-Quote nach Rathaus-Differenz, nach Angriffsreihenfolge und pro Spieler."""
+        columns = await self.load(clan_tag)
+        mask = self._since(columns, days)
+        stars = np.asarray(columns["stars"])[mask]
+        destruction = np.asarray(columns["destruction"])[mask]
+        if not len(stars):
+            return {"th_difference": [], "order": [], "players": []}
+
+        difference = (np.asarray(columns["attacker_th"])[mask].astype(np.int16)
+                      - np.asarray(columns["defender_th"])[mask])
+        unique, rates = grouped_rates(difference, stars, destruction)
+        by_difference = [Rate(f"{value:+d}", *rate) for value, rate in zip(unique.tolist(), rates)]
+
+        # Reihenfolge relativ zur Zahl der Angriffe im jeweiligen Krieg
+        wars, war_index = np.unique(np.asarray(columns["war_end"])[mask], return_inverse=True)
+        order = np.asarray(columns["attack_order"])[mask]
+        last = np.zeros(len(wars), dtype=np.int32)
+        np.maximum.at(last, war_index, order)
+        buckets = np.minimum((order - 1) * ORDER_BUCKETS // np.maximum(last[war_index], 1), ORDER_BUCKETS - 1)
+        unique, rates = grouped_rates(buckets, stars, destruction)
+        by_order = [Rate(f"{bucket * 100 // ORDER_BUCKETS}–{(bucket + 1) * 100 // ORDER_BUCKETS} %", *rate)
+                    for bucket, rate in zip(unique.tolist(), rates)]
+
+        tags = np.asarray(columns["attacker_tag"])[mask]
+        names = np.asarray(columns["attacker_name"])[mask]
+        unique, rates = grouped_rates(tags, stars, destruction)
+        # Letzter bekannter Name: Index des letzten Vorkommens jedes Tags
+        last_seen = len(tags) - 1 - np.unique(tags[::-1], return_index=True)[1]
+        players = [Rate(str(name), *rate) for name, rate in zip(names[last_seen].tolist(), rates)
+                   if rate[0] >= MIN_ATTACKS_PER_PLAYER]
+        players.sort(key=lambda rate: (rate.three_star_rate, rate.average_stars), reverse=True)
+        return {"th_difference": by_difference, "order": by_order, "players": players}
+
+    async def player_report(self, clan_tag: str, player_tag: str,
+                            days: int = 365) -> Optional[tuple[str, Rate, list[Rate]]]:
+        """Gesamtwerte eines Spielers und seine Drei-Sterne-Quote nach Rathaus-Differenz."""
+        columns = await self.load(clan_tag)
+        mask = self._since(columns, days) & (np.asarray(columns["attacker_tag"]) == player_tag)
+        if not mask.any():
+            return None
+        stars = np.asarray(columns["stars"])[mask]
+        destruction = np.asarray(columns["destruction"])[mask]
+        name = str(np.asarray(columns["attacker_name"])[mask][-1])
+        total = Rate("Gesamt", int(len(stars)), float(np.mean(stars == 3)), float(stars.mean()),
+                     float(destruction.mean()))
+        difference = (np.asarray(columns["attacker_th"])[mask].astype(np.int16)
+                      - np.asarray(columns["defender_th"])[mask])
+        unique, rates = grouped_rates(difference, stars, destruction)
+        return name, total, [Rate(f"{value:+d}", *rate) for value, rate in zip(unique.tolist(), rates)]
@@ -0,0 +1,149 @@
+import logging
+import os
+import time
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from SupportBot.utils.faq_index import FaqEntry
+from SupportBot.utils.staff import is_staff
+from SupportBot.utils.tickets import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Kanäle, in denen Fragen automatisch mit passenden FAQ-Einträgen beantwortet werden
+FAQ_CHANNEL_IDS = {int(channel_id) for channel_id in os.getenv("SUPPORT_FAQ_CHANNEL_IDS", "").split(",")
+                   if channel_id.strip()}
+# Mindest-Score (BM25), ab dem ein Eintrag vorgeschlagen wird
+FAQ_MIN_SCORE = float(os.getenv("SUPPORT_FAQ_MIN_SCORE", "2.0"))
+FAQ_SUGGESTIONS = 3
+# Fragen kürzer als das werden nicht beantwortet ("danke", "ok", ...)
+FAQ_MIN_QUESTION_LENGTH = 15
+
+
+class Faq(commands.Cog):
+    """Wissensdatenbank mit automatischen Antwortvorschlägen."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = bot.faq
+
+    async def cog_load(self):
+        # Indizes aller Guilds nach dem Login aufbauen, nicht erst bei der ersten Frage
+        self.bot.defer_until_ready("faq", self.warm_up)
+
+    async def warm_up(self):
+        entries = await self.store.warm_up([guild.id for guild in self.bot.guilds])
+        logger.info("%s FAQ-Einträge aus %s Guilds indiziert.", entries, len(self.bot.guilds))
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        await self.store.warm_up([guild.id])
+
+    @staticmethod
+    def build_suggestion_embed(results: list[tuple[float, FaqEntry]]) -> discord.Embed:
+        embed = discord.Embed(
+            title="Vielleicht hilft dir das weiter",
+            color=discord.Color.gold()
+        )
+        for _, entry in results:
+            embed.add_field(name=f"{entry.question} (FAQ #{entry.id})"[:256], value=entry.answer[:1024], inline=False)
+        embed.set_footer(text="Automatischer Vorschlag aus der FAQ")
+        return embed
+
+    async def suggest(self, guild_id: int, text: str) -> list[tuple[float, FaqEntry]]:
+        started = time.perf_counter()
+        results = await self.store.search(guild_id, text, FAQ_SUGGESTIONS, FAQ_MIN_SCORE)
+        logger.debug("FAQ-Suche in %.2f ms: %s Treffer.", (time.perf_counter() - started) * 1000, len(results))
+        return results
+
+    @commands.Cog.listener()
+    async def on_ticket_opened(self, ticket: Ticket, thread: discord.Thread):
+        """Schlägt zum Betreff eines neuen Tickets passende Einträge vor."""
+        results = await self.suggest(ticket.guild_id, ticket.subject)
+        if results:
+            await self.bot.outbound.send(thread, embed=self.build_suggestion_embed(results))
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Beantwortet Fragen in den FAQ-Kanälen mit passenden Einträgen."""
+        if message.author.bot or message.guild is None or message.channel.id not in FAQ_CHANNEL_IDS:
+            return
+        if len(message.content) < FAQ_MIN_QUESTION_LENGTH:
+            return
+        results = await self.suggest(message.guild.id, message.content)
+        if results:
+            await self.bot.outbound.send(message.channel, embed=self.build_suggestion_embed(results),
+                                         reference=message, mention_author=False)
+
+    @app_commands.command(name="faq", description="Durchsucht die FAQ.")
+    @app_commands.describe(frage="Deine Frage oder Stichworte")
+    @app_commands.guild_only()
+    async def faq(self, interaction: discord.Interaction, frage: str):
+        """Zeigt die passendsten FAQ-Einträge an."""
+        results = await self.store.search(interaction.guild.id, frage, FAQ_SUGGESTIONS)
+        if not results:
+            await interaction.response.send_message("Dazu wurde kein FAQ-Eintrag gefunden.", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=self.build_suggestion_embed(results), ephemeral=True)
+
+    @app_commands.command(name="faq_add", description="Fügt einen FAQ-Eintrag hinzu.")
+    @app_commands.describe(frage="Die Frage", antwort="Die Antwort")
+    @app_commands.guild_only()
+    async def faq_add(self, interaction: discord.Interaction, frage: str, antwort: str):
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können die FAQ bearbeiten.", ephemeral=True)
+            return
+        try:
+            entry = await self.store.add(interaction.guild.id, frage, antwort, interaction.user.id)
+        except Exception as e:
+            logger.error("Fehler beim Speichern des FAQ-Eintrags: %s", e)
+            await interaction.response.send_message("Fehler beim Speichern des Eintrags.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"FAQ-Eintrag #{entry.id} wurde hinzugefügt.", ephemeral=True)
+
+    async def find_entry(self, interaction: discord.Interaction, entry_id: int) -> Optional[FaqEntry]:
+        index = await self.store.index(interaction.guild.id)
+        entry = index.entries.get(entry_id)
+        if entry is None:
+            await interaction.response.send_message(f"FAQ-Eintrag #{entry_id} existiert nicht.", ephemeral=True)
+        return entry
+
+    @app_commands.command(name="faq_edit", description="Ändert einen FAQ-Eintrag.")
+    @app_commands.describe(eintrag="Nummer des Eintrags", frage="Neue Frage", antwort="Neue Antwort")
+    @app_commands.guild_only()
+    async def faq_edit(self, interaction: discord.Interaction, eintrag: int, frage: Optional[str] = None,
+                       antwort: Optional[str] = None):
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können die FAQ bearbeiten.", ephemeral=True)
+            return
+        entry = await self.find_entry(interaction, eintrag)
+        if entry is None:
+            return
+        try:
+            await self.store.update(entry, frage, antwort)
+        except Exception as e:
+            logger.error("Fehler beim Ändern von FAQ-Eintrag #%s: %s", eintrag, e)
+            await interaction.response.send_message("Fehler beim Ändern des Eintrags.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"FAQ-Eintrag #{eintrag} wurde geändert.", ephemeral=True)
+
+    @app_commands.command(name="faq_remove", description="Entfernt einen FAQ-Eintrag.")
+    @app_commands.describe(eintrag="Nummer des Eintrags")
+    @app_commands.guild_only()
+    async def faq_remove(self, interaction: discord.Interaction, eintrag: int):
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können die FAQ bearbeiten.", ephemeral=True)
+            return
+        entry = await self.find_entry(interaction, eintrag)
+        if entry is None:
+            return
+        try:
+            await self.store.remove(entry)
+        except Exception as e:
+            logger.error("Fehler beim Entfernen von FAQ-Eintrag #%s: %s", eintrag, e)
+            await interaction.response.send_message("Fehler beim Entfernen des Eintrags.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"FAQ-Eintrag #{eintrag} wurde entfernt.", ephemeral=True)
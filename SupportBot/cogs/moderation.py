@@ -0,0 +1,89 @@
+import logging
+import time
+from datetime import timedelta
+
+import discord
+from discord.ext import commands
+
+from SupportBot.utils.spam_guard import CHANNEL_FLOOD, DUPLICATE, FLOOD
+from SupportBot.utils.staff import is_staff
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    FLOOD: "Zu viele Nachrichten in kurzer Zeit",
+    DUPLICATE: "Wiederholte identische Nachrichten",
+    CHANNEL_FLOOD: "Nachrichtenflut im Kanal",
+}
+
+
+class Moderation(commands.Cog):
+    """Erkennt Spam und Floods in den Support-Kanälen und reagiert mit den konfigurierten Aktionen."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.guard = bot.spam_guard
+        # Kanäle mit aktivem Slowmode -> vorheriger Slowmode, der nach Ablauf wiederhergestellt wird
+        self.slowmode_restore: dict[int, int] = {}
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or message.guild is None or not isinstance(message.author, discord.Member):
+            return
+        if is_staff(message.author):
+            return
+        violations = self.guard.check_message(message.guild.id, message.channel.id, message.author.id,
+                                              message.content)
+        for kind in violations:
+            action = self.guard.config.actions.get(kind)
+            try:
+                await self.apply(action, kind, message)
+            except discord.HTTPException as e:
+                logger.warning("Aktion %s für %s in Kanal %s fehlgeschlagen: %s",
+                               action, kind, message.channel.id, e)
+
+    async def apply(self, action: str, kind: str, message: discord.Message):
+        reason = REASONS.get(kind, kind)
+        if action == "delete":
+            await self.bot.outbound.delete(message)
+        elif action == "warn":
+            await self.bot.outbound.send(message.channel, content=f"{message.author.mention} Bitte kein Spam "
+                                                                  f"({reason}).", delete_after=30)
+        elif action == "timeout":
+            member = message.author
+            await self.bot.outbound.submit(
+                lambda: member.timeout(timedelta(seconds=self.guard.config.timeout_seconds), reason=reason),
+                route=f"guild:{member.guild.id}:members", kind="timeout")
+            # Verlauf verwerfen, damit die gepufferten Nachrichten nicht gleich den nächsten Timeout auslösen
+            self.guard.reset_user(member.guild.id, member.id)
+            logger.info("%s wurde für %s Sekunden stummgeschaltet: %s", member, self.guard.config.timeout_seconds,
+                        reason)
+        elif action == "slowmode":
+            await self.enable_slowmode(message.channel, reason)
+        elif action:
+            logger.warning("Unbekannte Spam-Aktion %s für %s.", action, kind)
+
+    async def enable_slowmode(self, channel: discord.abc.GuildChannel, reason: str):
+        """Aktiviert den Slowmode für eine begrenzte Zeit; ein laufender Slowmode wird nicht verlängert."""
+        if channel.id in self.slowmode_restore or not isinstance(channel, (discord.TextChannel, discord.Thread)):
+            return
+        config = self.guard.config
+        self.slowmode_restore[channel.id] = channel.slowmode_delay
+        try:
+            await self.bot.outbound.submit(lambda: channel.edit(slowmode_delay=config.slowmode_seconds, reason=reason),
+                                           route=f"channel:{channel.id}", kind="slowmode")
+        except discord.HTTPException:
+            del self.slowmode_restore[channel.id]
+            raise
+        logger.info("Slowmode in Kanal %s für %s Sekunden aktiviert: %s", channel.id, config.slowmode_duration,
+                    reason)
+        self.bot.timers.schedule(("slowmode", channel.id), time.time() + config.slowmode_duration,
+                                 lambda: self.disable_slowmode(channel))
+
+    async def disable_slowmode(self, channel: discord.abc.GuildChannel):
+        previous = self.slowmode_restore.pop(channel.id, 0)
+        self.guard.reset_channel(channel.id)
+        await self.bot.outbound.submit(lambda: channel.edit(slowmode_delay=previous),
+                                       route=f"channel:{channel.id}", kind="slowmode")
+        logger.info("Slowmode in Kanal %s wieder aufgehoben.", channel.id)
+
@@ -0,0 +1,364 @@
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from common.outbound import INTERACTION, USER_VISIBLE
+from SupportBot.utils.staff import STAFF_ROLE_ID, is_staff
+from SupportBot.utils.tickets import PRIORITY_NAMES, Ticket
+from SupportBot.utils.transcripts import export_transcript
+
+logger = logging.getLogger(__name__)
+
+# Kanal, unter dem die privaten Ticket-Threads angelegt werden; ohne Angabe der Kanal des Befehls
+TICKET_CHANNEL_ID = os.getenv("SUPPORT_TICKET_CHANNEL_ID")
+MAX_OPEN_TICKETS_PER_USER = int(os.getenv("SUPPORT_MAX_OPEN_TICKETS", "1"))
+
+
+class Tickets(commands.Cog):
+    """Support-Tickets als private Threads."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = bot.tickets
+        self.store.on_sla_breach = self.on_sla_breach
+
+    def ticket_parent(self, interaction: discord.Interaction) -> Optional[discord.TextChannel]:
+        channel = interaction.guild.get_channel(int(TICKET_CHANNEL_ID)) if TICKET_CHANNEL_ID else interaction.channel
+        return channel if isinstance(channel, discord.TextChannel) else None
+
+    @staticmethod
+    def build_ticket_embed(ticket: Ticket, user: discord.abc.User) -> discord.Embed:
+        embed = discord.Embed(
+            title=f"Ticket #{ticket.id}",
+            description=ticket.subject or "Kein Betreff",
+            color=discord.Color.green(),
+            timestamp=datetime.fromtimestamp(ticket.created_at, timezone.utc)
+        )
+        embed.add_field(name="Erstellt von", value=user.mention, inline=True)
+        embed.add_field(name="Status", value="Offen", inline=True)
+        embed.set_footer(text="Ein Moderator kümmert sich bald darum. Mit /close wird das Ticket geschlossen.")
+        return embed
+
+    @staticmethod
+    def describe(ticket: Ticket) -> str:
+        assignee = f"<@{ticket.assignee_id}>" if ticket.assignee_id else "niemand"
+        channel = f"<#{ticket.channel_id}>" if ticket.channel_id else "–"
+        return (f"**#{ticket.id}** {channel} von <@{ticket.user_id}> – {ticket.subject or 'Kein Betreff'} "
+                f"(Priorität {PRIORITY_NAMES[ticket.priority]}, zugewiesen: {assignee})")
+
+    async def announce_assignments(self, tickets: list[Ticket]):
+        """Holt automatisch zugewiesene Moderatoren in die Ticket-Threads."""
+        for ticket in tickets:
+            thread = self.bot.get_channel(ticket.channel_id) if ticket.channel_id else None
+            if not isinstance(thread, discord.Thread):
+                continue
+            moderator = discord.Object(id=ticket.assignee_id)
+            try:
+                await self.bot.outbound.submit(lambda: thread.add_user(moderator), USER_VISIBLE,
+                                               f"channel:{thread.id}:members", "add_thread_member")
+                await self.bot.outbound.send(thread, content=f"<@{ticket.assignee_id}> wurde dieses Ticket "
+                                                             f"automatisch zugewiesen.")
+            except discord.HTTPException as e:
+                logger.warning("Zuweisung von Ticket #%s konnte nicht angekündigt werden: %s", ticket.id, e)
+
+    async def on_sla_breach(self, ticket: Ticket):
+        """Meldet ein Ticket, das innerhalb der SLA-Frist von niemandem übernommen wurde."""
+        thread = self.bot.get_channel(ticket.channel_id) if ticket.channel_id else None
+        if thread is None:
+            return
+        staff = f"<@&{STAFF_ROLE_ID}> " if STAFF_ROLE_ID else ""
+        await self.bot.outbound.send(
+            thread, content=f"{staff}Ticket #{ticket.id} (Priorität {PRIORITY_NAMES[ticket.priority]}) wartet "
+                            f"seit <t:{ticket.created_at}:R> auf einen Moderator.")
+
+    @app_commands.command(name="ticket", description="Erstellt ein neues Support-Ticket.")
+    @app_commands.describe(betreff="Worum geht es?")
+    @app_commands.guild_only()
+    async def ticket(self, interaction: discord.Interaction, betreff: str):
+        """Erstellt ein Ticket samt privatem Thread."""
+        guild, user = interaction.guild, interaction.user
+        await self.store.ensure_guild(guild.id)
+        open_tickets = self.store.cache.for_user(guild.id, user.id)
+        if len(open_tickets) >= MAX_OPEN_TICKETS_PER_USER:
+            await interaction.response.send_message(
+                f"Du hast bereits ein offenes Ticket: <#{open_tickets[0].channel_id}>", ephemeral=True)
+            return
+        cooldown = self.bot.spam_guard.check_ticket(guild.id, user.id)
+        if cooldown:
+            await interaction.response.send_message(
+                f"Du hast zu viele Tickets erstellt. Versuche es in {int(cooldown // 60) + 1} Minuten erneut.",
+                ephemeral=True)
+            return
+
+        parent = self.ticket_parent(interaction)
+        if parent is None:
+            await interaction.response.send_message("In diesem Kanal können keine Tickets erstellt werden.",
+                                                    ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            ticket = await self.store.open(guild.id, user.id, betreff[:200])
+        except Exception as e:
+            logger.error("Fehler beim Speichern des Tickets: %s", e)
+            await self.bot.outbound.followup(interaction, content="Fehler beim Erstellen des Tickets.", ephemeral=True)
+            return
+
+        try:
+            thread = await self.bot.outbound.submit(
+                lambda: parent.create_thread(name=f"ticket-{ticket.id}", type=discord.ChannelType.private_thread,
+                                             invitable=False),
+                INTERACTION, f"channel:{parent.id}:threads", "create_thread")
+            await self.bot.outbound.submit(lambda: thread.add_user(user), INTERACTION,
+                                           f"channel:{thread.id}:members", "add_thread_member")
+            await self.store.attach_channel(ticket, thread.id)
+        except Exception as e:
+            logger.error("Fehler beim Anlegen des Threads für Ticket #%s: %s", ticket.id, e)
+            await self.store.discard(ticket)
+            await self.bot.outbound.followup(interaction, content="Fehler beim Erstellen des Tickets.", ephemeral=True)
+            return
+
+        self.bot.spam_guard.record_ticket(guild.id, user.id)
+        logger.info("Ticket #%s von %s erstellt.", ticket.id, user)
+        await self.bot.outbound.followup(interaction, content=f"Dein Ticket wurde erstellt: {thread.mention}",
+                                         ephemeral=True)
+        await self.bot.outbound.send(thread, content=f"<@&{STAFF_ROLE_ID}>" if STAFF_ROLE_ID else None,
+                                     embed=self.build_ticket_embed(ticket, user))
+        self.bot.dispatch("ticket_opened", ticket, thread)
+        await self.announce_assignments(await self.store.auto_assign(guild.id))
+
+    @app_commands.command(name="close", description="Schließt das Ticket dieses Threads.")
+    @app_commands.describe(grund="Optionaler Grund für das Schließen")
+    @app_commands.guild_only()
+    async def close(self, interaction: discord.Interaction, grund: Optional[str] = None):
+        """Schließt und archiviert das Ticket des aktuellen Threads."""
+        await self.store.ensure_guild(interaction.guild.id)
+        ticket = self.store.cache.for_channel(interaction.channel_id)
+        if ticket is None:
+            await interaction.response.send_message("Dieser Kanal ist kein offenes Ticket.", ephemeral=True)
+            return
+        if interaction.user.id != ticket.user_id and not is_staff(interaction.user):
+            await interaction.response.send_message("Du darfst dieses Ticket nicht schließen.", ephemeral=True)
+            return
+
+        try:
+            await self.store.close(ticket, interaction.user.id)
+        except Exception as e:
+            logger.error("Fehler beim Schließen von Ticket #%s: %s", ticket.id, e)
+            await interaction.response.send_message("Fehler beim Schließen des Tickets.", ephemeral=True)
+            return
+
+        reason = f"\nGrund: {grund}" if grund else ""
+        await interaction.response.send_message(
+            f"Ticket #{ticket.id} wurde von {interaction.user.mention} geschlossen.{reason}")
+        logger.info("Ticket #%s von %s geschlossen.", ticket.id, interaction.user)
+
+        if isinstance(interaction.channel, discord.Thread):
+            await self.archive_ticket(ticket, interaction.channel)
+        # Der Moderator hat wieder Kapazität frei
+        await self.announce_assignments(await self.store.auto_assign(interaction.guild.id))
+
+    async def archive_ticket(self, ticket: Ticket, thread: discord.Thread):
+        """Exportiert das Transkript eines geschlossenen Tickets und archiviert danach den Thread."""
+        try:
+            path, count, size = await export_transcript(thread, ticket)
+            await self.bot.db.save_transcript(ticket.id, path, count, size, int(time.time()))
+            logger.info("Transkript von Ticket #%s gespeichert (%s Nachrichten, %s Bytes).", ticket.id, count, size)
+        except Exception as e:
+            logger.error("Fehler beim Exportieren des Transkripts von Ticket #%s: %s", ticket.id, e)
+
+        try:
+            await self.bot.outbound.submit(lambda: thread.edit(archived=True, locked=True), USER_VISIBLE,
+                                           f"channel:{thread.id}", "edit_thread")
+        except discord.HTTPException as e:
+            logger.warning("Thread von Ticket #%s konnte nicht archiviert werden: %s", ticket.id, e)
+
+    @app_commands.command(name="claim", description="Übernimmt das Ticket dieses Threads.")
+    @app_commands.guild_only()
+    async def claim(self, interaction: discord.Interaction):
+        """Weist das Ticket des aktuellen Threads dem ausführenden Moderator zu."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können Tickets übernehmen.", ephemeral=True)
+            return
+        await self.store.ensure_guild(interaction.guild.id)
+        ticket = self.store.cache.for_channel(interaction.channel_id)
+        if ticket is None:
+            await interaction.response.send_message("Dieser Kanal ist kein offenes Ticket.", ephemeral=True)
+            return
+        if ticket.assignee_id == interaction.user.id:
+            await interaction.response.send_message("Du bearbeitest dieses Ticket bereits.", ephemeral=True)
+            return
+
+        previous = ticket.assignee_id
+        try:
+            await self.store.claim(ticket, interaction.user.id)
+        except Exception as e:
+            logger.error("Fehler beim Übernehmen von Ticket #%s: %s", ticket.id, e)
+            await interaction.response.send_message("Fehler beim Übernehmen des Tickets.", ephemeral=True)
+            return
+
+        note = f" (vorher <@{previous}>)" if previous else ""
+        await interaction.response.send_message(
+            f"{interaction.user.mention} kümmert sich um dieses Ticket{note}.",
+            allowed_mentions=discord.AllowedMentions.none())
+
+    @app_commands.command(name="next_ticket", description="Übernimmt das dringendste wartende Ticket.")
+    @app_commands.guild_only()
+    async def next_ticket(self, interaction: discord.Interaction):
+        """Entnimmt das Ticket mit höchster Priorität (bei Gleichstand das älteste) aus der Warteschlange."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können Tickets übernehmen.", ephemeral=True)
+            return
+        try:
+            ticket = await self.store.next_ticket(interaction.guild.id, interaction.user.id)
+        except Exception as e:
+            logger.error("Fehler beim Zuweisen des nächsten Tickets: %s", e)
+            await interaction.response.send_message("Fehler beim Zuweisen des Tickets.", ephemeral=True)
+            return
+        if ticket is None:
+            await interaction.response.send_message("Es warten keine Tickets.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(f"Dir wurde zugewiesen: {self.describe(ticket)}", ephemeral=True)
+        thread = self.bot.get_channel(ticket.channel_id) if ticket.channel_id else None
+        if isinstance(thread, discord.Thread):
+            await self.bot.outbound.submit(lambda: thread.add_user(interaction.user), USER_VISIBLE,
+                                           f"channel:{thread.id}:members", "add_thread_member")
+            await self.bot.outbound.send(thread, content=f"{interaction.user.mention} kümmert sich um dieses Ticket.",
+                                         allowed_mentions=discord.AllowedMentions.none())
+
+    @app_commands.command(name="duty", description="Meldet dich für die automatische Ticket-Zuweisung an oder ab.")
+    @app_commands.describe(aktiv="An- oder abmelden")
+    @app_commands.guild_only()
+    async def duty(self, interaction: discord.Interaction, aktiv: bool):
+        """Nimmt den Moderator in die automatische Zuweisung auf bzw. entfernt ihn."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können sich anmelden.", ephemeral=True)
+            return
+        try:
+            await self.store.set_on_duty(interaction.guild.id, interaction.user.id, aktiv)
+        except Exception as e:
+            logger.error("Fehler beim Speichern des Dienststatus: %s", e)
+            await interaction.response.send_message("Fehler beim Speichern.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            "Du bekommst jetzt automatisch Tickets zugewiesen." if aktiv
+            else "Du bekommst keine Tickets mehr automatisch zugewiesen.", ephemeral=True)
+        if aktiv:
+            await self.announce_assignments(await self.store.auto_assign(interaction.guild.id))
+
+    @app_commands.command(name="priority", description="Ändert die Priorität des Tickets dieses Threads.")
+    @app_commands.describe(stufe="Neue Priorität")
+    @app_commands.choices(stufe=[app_commands.Choice(name=name, value=value) for value, name in PRIORITY_NAMES.items()])
+    @app_commands.guild_only()
+    async def priority(self, interaction: discord.Interaction, stufe: app_commands.Choice[int]):
+        """Setzt die Priorität; wartende Tickets rücken in der Warteschlange entsprechend vor."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können die Priorität ändern.", ephemeral=True)
+            return
+        await self.store.ensure_guild(interaction.guild.id)
+        ticket = self.store.cache.for_channel(interaction.channel_id)
+        if ticket is None:
+            await interaction.response.send_message("Dieser Kanal ist kein offenes Ticket.", ephemeral=True)
+            return
+        try:
+            await self.store.set_priority(ticket, stufe.value)
+        except Exception as e:
+            logger.error("Fehler beim Ändern der Priorität von Ticket #%s: %s", ticket.id, e)
+            await interaction.response.send_message("Fehler beim Ändern der Priorität.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"Priorität von Ticket #{ticket.id} ist jetzt **{stufe.name}**.")
+
+    @app_commands.command(name="tickets", description="Listet die offenen Tickets auf.")
+    @app_commands.describe(moderator="Nur Tickets dieses Moderators anzeigen")
+    @app_commands.guild_only()
+    async def tickets(self, interaction: discord.Interaction, moderator: Optional[discord.Member] = None):
+        """Zeigt die offenen Tickets der Guild aus dem Speicher an."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können alle Tickets sehen.", ephemeral=True)
+            return
+        await self.store.ensure_guild(interaction.guild.id)
+        if moderator is not None:
+            open_tickets = self.store.cache.for_assignee(interaction.guild.id, moderator.id)
+        else:
+            open_tickets = self.store.cache.for_guild(interaction.guild.id)
+        if not open_tickets:
+            await interaction.response.send_message("Keine offenen Tickets.", ephemeral=True)
+            return
+
+        lines = [self.describe(ticket) for ticket in open_tickets[:25]]
+        if len(open_tickets) > 25:
+            lines.append(f"… und {len(open_tickets) - 25} weitere")
+        embed = discord.Embed(title=f"Offene Tickets ({len(open_tickets)})", description="\n".join(lines),
+                              color=discord.Color.blue())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="ticket_history", description="Zeigt die letzten Tickets eines Nutzers an.")
+    @app_commands.describe(nutzer="Nutzer, dessen Tickets angezeigt werden")
+    @app_commands.guild_only()
+    async def ticket_history(self, interaction: discord.Interaction, nutzer: discord.Member):
+        """Verlauf eines Nutzers inklusive geschlossener Tickets."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können den Verlauf sehen.", ephemeral=True)
+            return
+        try:
+            history = await self.store.history(interaction.guild.id, nutzer.id)
+        except Exception as e:
+            logger.error("Fehler beim Abrufen des Ticket-Verlaufs: %s", e)
+            await interaction.response.send_message("Fehler beim Abrufen des Verlaufs.", ephemeral=True)
+            return
+        if not history:
+            await interaction.response.send_message(f"{nutzer.mention} hatte noch keine Tickets.", ephemeral=True)
+            return
+
+        lines = [
+            f"**#{ticket.id}** <t:{ticket.created_at}:d> {ticket.status} – {ticket.subject or 'Kein Betreff'}"
+            for ticket in history
+        ]
+        embed = discord.Embed(title=f"Tickets von {nutzer.display_name}", description="\n".join(lines),
+                              color=discord.Color.blue())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="transcript", description="Sendet das Transkript eines geschlossenen Tickets.")
+    @app_commands.describe(ticket_id="Nummer des Tickets")
+    @app_commands.guild_only()
+    async def transcript(self, interaction: discord.Interaction, ticket_id: int):
+        """Sucht das Transkript über die Ticket-ID und hängt es an."""
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("Nur Moderatoren können Transkripte abrufen.", ephemeral=True)
+            return
+        try:
+            ticket = await self.bot.db.get_ticket(ticket_id)
+            record = await self.bot.db.get_transcript(ticket_id) if ticket else None
+        except Exception as e:
+            logger.error("Fehler beim Abrufen des Transkripts von Ticket #%s: %s", ticket_id, e)
+            await interaction.response.send_message("Fehler beim Abrufen des Transkripts.", ephemeral=True)
+            return
+        if ticket is None or ticket.guild_id != interaction.guild.id or record is None:
+            await interaction.response.send_message(f"Kein Transkript für Ticket #{ticket_id} gefunden.",
+                                                    ephemeral=True)
+            return
+
+        path, count, size, _ = record
+        summary = f"Ticket #{ticket_id} – {ticket.subject or 'Kein Betreff'} ({count} Nachrichten)"
+        if size > interaction.guild.filesize_limit or not os.path.exists(path):
+            await interaction.response.send_message(f"{summary}\nDatei: `{path}`", ephemeral=True)
+            return
+        await interaction.response.send_message(summary, file=discord.File(path), ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        """Ein gelöschter Ticket-Thread schließt das Ticket."""
+        ticket = self.store.cache.for_channel(payload.thread_id)
+        if ticket is not None:
+            try:
+                await self.store.close(ticket, None)
+                logger.info("Ticket #%s geschlossen, weil sein Thread gelöscht wurde.", ticket.id)
+            except Exception as e:
+                logger.error("Fehler beim Schließen von Ticket #%s: %s", ticket.id, e)
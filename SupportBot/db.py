@@ -0,0 +1,242 @@
+import logging
+import os
+import sqlite3
+from typing import Optional
+
+from common.db_pool import ConnectionPool
+from SupportBot.utils.faq_index import FaqEntry
+from SupportBot.utils.tickets import OPEN_STATUSES, Ticket
+
+logger = logging.getLogger(__name__)
+
+TICKET_COLUMNS = ", ".join(Ticket.COLUMNS)
+FAQ_COLUMNS = ", ".join(FaqEntry.COLUMNS)
+
+
+class SupportDatabase:
+    """Asynchroner Zugriff auf die SQLite-Datenbank des Support-Bots."""
+
+    def __init__(self, sqlite_path: str = "support_bot.db", pool_size: int = 4):
+        # Jede `:memory:`-Verbindung wäre eine eigene Datenbank
+        size = 1 if sqlite_path == ":memory:" else pool_size
+        self.pool = ConnectionPool(lambda: self._connect(sqlite_path),
+                                   lambda connection: connection.execute("SELECT 1"),
+                                   (sqlite3.Error,), size, name="support")
+
+    @classmethod
+    def from_env(cls) -> "SupportDatabase":
+        """Erstellt die Datenbank anhand der Umgebungsvariablen."""
+        return cls(os.getenv("SUPPORT_SQLITE_PATH", "support_bot.db"), int(os.getenv("SUPPORT_DB_POOL_SIZE", "4")))
+
+    @staticmethod
+    def _connect(path: str):
+        connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @staticmethod
+    def _execute(connection, query: str, params: tuple, fetch: Optional[str]):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            if fetch == "all":
+                return cursor.fetchall()
+            if fetch == "one":
+                return cursor.fetchone()
+            connection.commit()
+            return cursor.lastrowid if fetch == "lastrowid" else cursor.rowcount
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _execute_script(connection, statements: list):
+        cursor = connection.cursor()
+        try:
+            for statement, tolerate in statements:
+                try:
+                    cursor.execute(statement)
+                except sqlite3.OperationalError:
+                    if not tolerate:
+                        raise
+            connection.commit()
+        finally:
+            cursor.close()
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        return await self.pool.run(self._execute, query, params, None)
+
+    async def fetchall(self, query: str, params: tuple = ()) -> list:
+        return list(await self.pool.run(self._execute, query, params, "all"))
+
+    async def fetchone(self, query: str, params: tuple = ()) -> Optional[tuple]:
+        return await self.pool.run(self._execute, query, params, "one")
+
+    async def close(self):
+        await self.pool.close()
+
+    async def initialize(self):
+        """Legt fehlende Tabellen und Indizes an."""
+        statements = [
+            ("""
+            CREATE TABLE IF NOT EXISTS tickets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                subject TEXT NOT NULL DEFAULT '',
+                channel_id INTEGER NULL,
+                assignee_id INTEGER NULL,
+                status TEXT NOT NULL DEFAULT 'open',
+                created_at INTEGER NOT NULL,
+                closed_at INTEGER NULL,
+                closed_by INTEGER NULL,
+                priority INTEGER NOT NULL DEFAULT 1,
+                sla_deadline INTEGER NULL
+            )
+            """, False),
+            # Ältere Tabellen kennen noch keine Priorität und SLA-Frist
+            ("ALTER TABLE tickets ADD COLUMN priority INTEGER NOT NULL DEFAULT 1", True),
+            ("ALTER TABLE tickets ADD COLUMN sla_deadline INTEGER NULL", True),
+            # Offene Tickets einer Guild beim Start, Verlauf eines Nutzers, Tickets eines Moderators
+            ("CREATE INDEX IF NOT EXISTS idx_tickets_guild_status ON tickets (guild_id, status)", False),
+            ("CREATE INDEX IF NOT EXISTS idx_tickets_user ON tickets (user_id, created_at)", False),
+            ("CREATE INDEX IF NOT EXISTS idx_tickets_assignee ON tickets (assignee_id, status)", False),
+            ("""
+            CREATE TABLE IF NOT EXISTS ticket_transcripts (
+                ticket_id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+            """, False),
+            # Moderatoren, die Tickets automatisch zugewiesen bekommen
+            ("""
+            CREATE TABLE IF NOT EXISTS support_moderators (
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, user_id)
+            )
+            """, False),
+            ("""
+            CREATE TABLE IF NOT EXISTS faq_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_by INTEGER NULL,
+                updated_at INTEGER NOT NULL
+            )
+            """, False),
+            ("CREATE INDEX IF NOT EXISTS idx_faq_guild ON faq_entries (guild_id)", False),
+        ]
+        await self.pool.run(self._execute_script, statements)
+
+    # Tickets
+
+    async def create_ticket(self, ticket: Ticket) -> int:
+        """Speichert ein neues Ticket und gibt dessen ID zurück."""
+        return await self.pool.run(
+            self._execute,
+            "INSERT INTO tickets (guild_id, user_id, subject, channel_id, status, created_at, priority, sla_deadline) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ticket.guild_id, ticket.user_id, ticket.subject, ticket.channel_id, ticket.status, ticket.created_at,
+             ticket.priority, ticket.sla_deadline),
+            "lastrowid"
+        )
+
+    async def set_ticket_channel(self, ticket_id: int, channel_id: int):
+        await self.execute("UPDATE tickets SET channel_id = ? WHERE id = ?", (channel_id, ticket_id))
+
+    async def assign_ticket(self, ticket_id: int, assignee_id: Optional[int], status: str):
+        await self.execute("UPDATE tickets SET assignee_id = ?, status = ? WHERE id = ?",
+                           (assignee_id, status, ticket_id))
+
+    async def close_ticket(self, ticket_id: int, closed_by: Optional[int], closed_at: int):
+        await self.execute("UPDATE tickets SET status = 'closed', closed_by = ?, closed_at = ? WHERE id = ?",
+                           (closed_by, closed_at, ticket_id))
+
+    async def set_ticket_sla(self, ticket_id: int, priority: int, sla_deadline: Optional[int]):
+        await self.execute("UPDATE tickets SET priority = ?, sla_deadline = ? WHERE id = ?",
+                           (priority, sla_deadline, ticket_id))
+
+    async def delete_ticket(self, ticket_id: int):
+        await self.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
+
+    async def get_ticket(self, ticket_id: int) -> Optional[Ticket]:
+        row = await self.fetchone(f"SELECT {TICKET_COLUMNS} FROM tickets WHERE id = ?", (ticket_id,))
+        return Ticket.from_row(row) if row else None
+
+    async def get_open_tickets(self, guild_id: int) -> list[Ticket]:
+        placeholders = ", ".join("?" * len(OPEN_STATUSES))
+        rows = await self.fetchall(
+            f"SELECT {TICKET_COLUMNS} FROM tickets WHERE guild_id = ? AND status IN ({placeholders})",
+            (guild_id, *OPEN_STATUSES)
+        )
+        return [Ticket.from_row(row) for row in rows]
+
+    async def get_user_tickets(self, guild_id: int, user_id: int, limit: int = 10) -> list[Ticket]:
+        """Letzte Tickets eines Nutzers, neuestes zuerst."""
+        rows = await self.fetchall(
+            f"SELECT {TICKET_COLUMNS} FROM tickets WHERE user_id = ? AND guild_id = ? "
+            f"ORDER BY created_at DESC LIMIT ?",
+            (user_id, guild_id, limit)
+        )
+        return [Ticket.from_row(row) for row in rows]
+
+    # Moderatoren
+
+    async def get_moderators_on_duty(self, guild_id: int) -> list[int]:
+        rows = await self.fetchall("SELECT user_id FROM support_moderators WHERE guild_id = ?", (guild_id,))
+        return [row[0] for row in rows]
+
+    async def set_moderator_on_duty(self, guild_id: int, user_id: int, on_duty: bool):
+        if on_duty:
+            await self.execute("INSERT OR IGNORE INTO support_moderators (guild_id, user_id) VALUES (?, ?)",
+                               (guild_id, user_id))
+        else:
+            await self.execute("DELETE FROM support_moderators WHERE guild_id = ? AND user_id = ?",
+                               (guild_id, user_id))
+
+    # Transkripte
+
+    async def save_transcript(self, ticket_id: int, path: str, message_count: int, size_bytes: int,
+                              created_at: int):
+        await self.execute(
+            "INSERT INTO ticket_transcripts (ticket_id, path, message_count, size_bytes, created_at) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(ticket_id) DO UPDATE SET path = excluded.path, "
+            "message_count = excluded.message_count, size_bytes = excluded.size_bytes, "
+            "created_at = excluded.created_at",
+            (ticket_id, path, message_count, size_bytes, created_at)
+        )
+
+    async def get_transcript(self, ticket_id: int) -> Optional[tuple]:
+        """(Pfad, Anzahl Nachrichten, Größe, Zeitpunkt) des Transkripts eines Tickets."""
+        return await self.fetchone(
+            "SELECT path, message_count, size_bytes, created_at FROM ticket_transcripts WHERE ticket_id = ?",
+            (ticket_id,)
+        )
+
+    # FAQ
+
+    async def get_faq_entries(self, guild_id: int) -> list[FaqEntry]:
+        rows = await self.fetchall(f"SELECT {FAQ_COLUMNS} FROM faq_entries WHERE guild_id = ?", (guild_id,))
+        return [FaqEntry.from_row(row) for row in rows]
+
+    async def create_faq_entry(self, entry: FaqEntry) -> int:
+        return await self.pool.run(
+            self._execute,
+            "INSERT INTO faq_entries (guild_id, question, answer, created_by, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (entry.guild_id, entry.question, entry.answer, entry.created_by, entry.updated_at),
+            "lastrowid"
+        )
+
+    async def update_faq_entry(self, entry: FaqEntry):
+        await self.execute("UPDATE faq_entries SET question = ?, answer = ?, updated_at = ? WHERE id = ?",
+                           (entry.question, entry.answer, entry.updated_at, entry.id))
+
+    async def delete_faq_entry(self, entry_id: int):
+        await self.execute("DELETE FROM faq_entries WHERE id = ?", (entry_id,))
@@ -3,6 +3,24 @@ from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 import os
+import asyncio
+import logging
+import time
+from common.command_sync import sync_command_tree
+from common.logging_setup import setup_logging
+from common.http import acquire_http_client, release_http_client
+from common.metrics import instrument_bot
+from common.outbound import OutboundScheduler
+from common.timer_wheel import TimerWheel
+from SupportBot.cogs.faq import Faq
+from SupportBot.cogs.moderation import Moderation
+from SupportBot.cogs.tickets import Tickets
+from SupportBot.db import SupportDatabase
+from SupportBot.utils.faq_index import FaqStore
+from SupportBot.utils.spam_guard import SpamGuard
+from SupportBot.utils.tickets import TicketStore
+
+logger = logging.getLogger(__name__)
 
 # Umgebungsvariablen laden
 load_dotenv()
@@ -12,26 +30,77 @@ class SupportBot(commands.Bot):
         intents = discord.Intents.default()
         intents.guilds = True
         intents.guild_messages = True
-        intents.message_content = True  # Für Slash-Commands erforderlich
+        intents.message_content = True  # Für FAQ-Vorschläge und Spam-Erkennung
         intents.members = True  # Für Moderation und Benutzer-Management
 
         super().__init__(command_prefix="/", intents=intents)
         self.token = token
+        self.http_client = acquire_http_client()  # Gemeinsamer HTTP-Connector des Prozesses
+        instrument_bot(self, "support")
+        self.outbound = OutboundScheduler("support")  # Priorisierte Discord-REST-Aufrufe der Cogs
+        self.db = SupportDatabase.from_env()
+        self.timers = TimerWheel(name="support")  # SLA-Fristen aller Tickets und befristete Slowmodes
+        self.tickets = TicketStore(self.db, self.timers)  # Offene Tickets im Speicher, Verlauf in der Datenbank
+        self.faq = FaqStore(self.db)  # Invertierter Index der FAQ pro Guild
+        self.spam_guard = SpamGuard()  # Gleitende Fenster für Spam-, Flood- und Ticket-Limits
+        self.warmup_tasks = set()
 
     async def setup_hook(self):
         """Setup für den Bot."""
-        print("Support Bot wird initialisiert...")
+        logger.info("Support Bot wird initialisiert...")
+
+        # Fehlende Tabellen anlegen
+        await self.db.initialize()
 
-        # Beispiel: Einen Cog hinzufügen
+        # Cogs hinzufügen
         await self.add_cog(GeneralSupportCommands(self))
+        await self.add_cog(Tickets(self))
+        await self.add_cog(Faq(self))
+        await self.add_cog(Moderation(self))
+
+        # Slash-Commands synchronisieren (nur bei Änderungen)
+        try:
+            await sync_command_tree(self, "support")
+        except Exception as e:
+            logger.error("Fehler beim Synchronisieren der Slash-Commands: %s", e)
+
+    def defer_until_ready(self, cog: str, coroutine_function):
+        """Führt Aufwärmarbeit eines Cogs (z. B. Indizes aufbauen) im Hintergrund aus, sobald der Bot bereit ist."""
+        async def runner():
+            await self.wait_until_ready()
+            started = time.perf_counter()
+            try:
+                await coroutine_function()
+                logger.info("%s in %.0f ms aufgewärmt.", cog, (time.perf_counter() - started) * 1000)
+            except Exception as e:
+                logger.error("Fehler beim Aufwärmen von %s: %s", cog, e)
+            finally:
+                self.warmup_tasks.discard(task)
+
+        task = asyncio.create_task(runner(), name=f"warmup-{cog}")
+        self.warmup_tasks.add(task)
+        return task
 
     async def on_ready(self):
         """Event: Bot ist bereit."""
-        print(f"{self.user} ist bereit und eingeloggt!")
+        logger.info("%s ist bereit und eingeloggt!", self.user)
+        # Offene Tickets aller Guilds vorab laden, damit die Commands nur noch den Speicher lesen
+        await asyncio.gather(*(self.tickets.ensure_guild(guild.id) for guild in self.guilds))
+        logger.info("%s offene Tickets geladen.", len(self.tickets.cache))
+
+    async def close(self):
+        """Bricht laufende Aufwärmarbeit ab, beendet den Bot und gibt HTTP-Client und Datenbankverbindungen frei."""
+        for task in self.warmup_tasks:
+            task.cancel()
+        await self.timers.close()
+        await self.outbound.close()
+        await super().close()
+        await self.db.close()
+        await release_http_client()
 
     def start_bot(self):
-        """Bot starten."""
-        self.run(self.token)
+        """Bot starten. Das Logging richtet `setup_logging` ein, nicht discord.py."""
+        self.run(self.token, log_handler=None)
 
 class GeneralSupportCommands(commands.Cog):
     """Allgemeine Commands für den Support Bot."""
@@ -39,25 +108,15 @@ class GeneralSupportCommands(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="ping", description="Prüft, ob der Bot online ist.")
-    async def ping(self, ctx):
+    async def ping(self, interaction: discord.Interaction):
         """Ein einfacher Ping-Befehl."""
-        await ctx.respond("Pong! Der Support Bot ist online.")
-
-    @app_commands.command(name="ticket", description="Erstellt ein neues Support-Ticket.")
-    async def ticket(self, ctx):
-        """Erstellt ein neues Support-Ticket."""
-        # Placeholder für zukünftige Ticket-Logik
-        embed = discord.Embed(
-            title="Support-Ticket erstellt",
-            description="Dein Support-Ticket wurde erstellt und ein Moderator wird sich bald darum kümmern.",
-            color=discord.Color.green()
-        )
-        await ctx.respond(embed=embed)
+        await interaction.response.send_message("Pong! Der Support Bot ist online.", ephemeral=True)
 
 # Falls diese Datei direkt ausgeführt wird
 if __name__ == "__main__":
     token = os.getenv("DISCORD_TOKEN_SUPPORT")
     if not token:
         raise ValueError("Kein Token für den Support Bot gefunden!")
+    setup_logging("support_bot")
     bot = SupportBot(token)
     bot.start_bot()
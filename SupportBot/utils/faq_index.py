@@ -0,0 +1,173 @@
+import asyncio
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+# BM25-Parameter: Sättigung der Termhäufigkeit und Normierung auf die Dokumentlänge
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Die Frage beschreibt einen Eintrag besser als die Antwort und zählt deshalb mehrfach
+QUESTION_WEIGHT = 2
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("""
+    der die das den dem des ein eine einen einem einer eines und oder aber wie was wer wo wann warum wieso
+    ich du er sie es wir ihr mein meine meinen dein deine sein mich dich mir dir uns euch
+    ist sind war bin bist kann können muss mit von zu im in an auf für bei aus nach um am vom zum zur
+    nicht kein keine auch noch schon
+    hat habe hast haben wird werden wurde ja nein so da dann wenn ob dass man mal bitte hallo hi
+    the a an and or is are was be to of in on for with how what why can i you it do does my not
+""".split())
+# Einfache Endungen, damit z. B. "Tickets"/"Ticket" oder "Rollen"/"Rolle" zusammenfallen
+SUFFIXES = ("ern", "en", "er", "es", "e", "n", "s")
+
+
+def stem(token: str) -> str:
+    for suffix in SUFFIXES:
+        if len(token) - len(suffix) >= 4 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.casefold())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+@dataclass
+class FaqEntry:
+    """Ein Eintrag der Wissensdatenbank."""
+    id: int
+    guild_id: int
+    question: str
+    answer: str
+    created_by: Optional[int] = None
+    updated_at: int = field(default_factory=lambda: int(time.time()))
+
+    COLUMNS = ("id", "guild_id", "question", "answer", "created_by", "updated_at")
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "FaqEntry":
+        return cls(*row)
+
+    def terms(self) -> Counter:
+        return Counter(tokenize(self.question) * QUESTION_WEIGHT + tokenize(self.answer))
+
+
+class FaqIndex:
+    """
+    Invertierter Index über die FAQ-Einträge einer Guild mit BM25-Bewertung.
+
+    Pro Term wird die Liste der Einträge samt Termhäufigkeit gehalten. Eine Suche berührt nur die Einträge,
+    die mindestens einen Term der Anfrage enthalten; Hinzufügen, Ändern und Löschen aktualisieren nur die
+    Postings des betroffenen Eintrags.
+    """
+
+    def __init__(self):
+        self.entries: dict[int, FaqEntry] = {}
+        self.postings: dict[str, dict[int, int]] = {}
+        self.lengths: dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: FaqEntry):
+        """Fügt einen Eintrag hinzu oder ersetzt ihn."""
+        self.remove(entry.id)
+        terms = entry.terms()
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[entry.id] = frequency
+        length = sum(terms.values())
+        self.entries[entry.id] = entry
+        self.lengths[entry.id] = length
+        self.total_length += length
+
+    def remove(self, entry_id: int) -> Optional[FaqEntry]:
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        for term in entry.terms():
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(entry_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(entry_id)
+        return entry
+
+    def search(self, query: str, limit: int = 3, min_score: float = 0.0) -> list[tuple[float, FaqEntry]]:
+        """Beste Einträge zur Anfrage als Liste (Score, Eintrag), bester zuerst."""
+        if not self.entries:
+            return []
+        count = len(self.entries)
+        average_length = self.total_length / count or 1
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for entry_id, frequency in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[entry_id] / average_length)
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self.entries[entry_id]) for entry_id, score in best if score >= min_score]
+
+
+class FaqStore:
+    """
+    FAQ-Einträge in Datenbank und Speicher; pro Guild ein Index, der nach dem Start per `warm_up` vorab und
+    für unbekannte Guilds beim ersten Zugriff geladen wird.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.indexes: dict[int, FaqIndex] = {}
+        self._load_lock = asyncio.Lock()
+
+    async def index(self, guild_id: int) -> FaqIndex:
+        if guild_id not in self.indexes:
+            async with self._load_lock:
+                if guild_id not in self.indexes:
+                    index = FaqIndex()
+                    for entry in await self.db.get_faq_entries(guild_id):
+                        index.add(entry)
+                    self.indexes[guild_id] = index
+        return self.indexes[guild_id]
+
+    async def warm_up(self, guild_ids: list[int]) -> int:
+        """Baut die Indizes der Guilds auf, die noch keinen haben; gibt die Zahl geladener Einträge zurück."""
+        loaded = 0
+        for guild_id in guild_ids:
+            if guild_id not in self.indexes:
+                loaded += len(await self.index(guild_id))
+        return loaded
+
+    async def add(self, guild_id: int, question: str, answer: str, created_by: Optional[int]) -> FaqEntry:
+        index = await self.index(guild_id)
+        entry = FaqEntry(id=0, guild_id=guild_id, question=question, answer=answer, created_by=created_by)
+        entry.id = await self.db.create_faq_entry(entry)
+        index.add(entry)
+        return entry
+
+    async def update(self, entry: FaqEntry, question: Optional[str] = None,
+                     answer: Optional[str] = None) -> FaqEntry:
+        index = await self.index(entry.guild_id)
+        updated = FaqEntry(entry.id, entry.guild_id, question or entry.question, answer or entry.answer,
+                           entry.created_by)
+        await self.db.update_faq_entry(updated)
+        index.add(updated)
+        return updated
+
+    async def remove(self, entry: FaqEntry):
+        index = await self.index(entry.guild_id)
+        await self.db.delete_faq_entry(entry.id)
+        index.remove(entry.id)
+
+    async def search(self, guild_id: int, query: str, limit: int = 3,
+                     min_score: float = 0.0) -> list[tuple[float, FaqEntry]]:
+        return (await self.index(guild_id)).search(query, limit, min_score)
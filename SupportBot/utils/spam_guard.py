@@ -0,0 +1,224 @@
+import os
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from common.metrics import REGISTRY
+
+# Verstöße
+FLOOD = "flood"  # Ein Nutzer schreibt zu viele Nachrichten
+DUPLICATE = "duplicate"  # Ein Nutzer wiederholt dieselbe Nachricht
+CHANNEL_FLOOD = "channel_flood"  # Ein Kanal bekommt insgesamt zu viele Nachrichten (Raid)
+TICKET_ABUSE = "ticket"  # Ein Nutzer eröffnet zu viele Tickets
+
+SPAM_VIOLATIONS = REGISTRY.counter("support_spam_violations_total", "Erkannte Spam-Verstöße", ("kind",))
+
+
+def _env_window(name: str, default: str) -> tuple[int, float]:
+    """`"5/5"` -> höchstens 5 Ereignisse in 5 Sekunden."""
+    count, _, seconds = os.getenv(name, default).partition("/")
+    return int(count), float(seconds)
+
+
+def parse_actions(spec: str) -> dict[str, str]:
+    """Wandelt `"flood=timeout,duplicate=delete"` in ein Dictionary um."""
+    actions = {}
+    for item in spec.split(","):
+        kind, _, action = item.partition("=")
+        if kind.strip() and action.strip():
+            actions[kind.strip()] = action.strip().lower()
+    return actions
+
+
+@dataclass
+class SpamConfig:
+    """
+    Schwellwerte als (Anzahl, Sekunden): erlaubt sind höchstens `Anzahl` Ereignisse innerhalb von `Sekunden`,
+    erst das nächste ist ein Verstoß. Dazu die Aktion pro Verstoß (delete, warn, timeout, slowmode, cooldown).
+    """
+    user_flood: tuple[int, float] = (5, 5.0)
+    duplicates: tuple[int, float] = (3, 30.0)
+    channel_flood: tuple[int, float] = (20, 10.0)
+    tickets: tuple[int, float] = (3, 3600.0)
+    actions: dict = field(default_factory=lambda: {FLOOD: "timeout", DUPLICATE: "delete",
+                                                   CHANNEL_FLOOD: "slowmode", TICKET_ABUSE: "cooldown"})
+    timeout_seconds: int = 300
+    slowmode_seconds: int = 10
+    slowmode_duration: int = 300  # So lange bleibt der Slowmode aktiv
+    ticket_cooldown: int = 3600
+    max_tracked_users: int = 10000
+    max_tracked_channels: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "SpamConfig":
+        config = cls(
+            user_flood=_env_window("SUPPORT_SPAM_FLOOD", "5/5"),
+            duplicates=_env_window("SUPPORT_SPAM_DUPLICATES", "3/30"),
+            channel_flood=_env_window("SUPPORT_SPAM_CHANNEL_FLOOD", "20/10"),
+            tickets=_env_window("SUPPORT_SPAM_TICKETS", "3/3600"),
+            timeout_seconds=int(os.getenv("SUPPORT_SPAM_TIMEOUT_SECONDS", "300")),
+            slowmode_seconds=int(os.getenv("SUPPORT_SPAM_SLOWMODE_SECONDS", "10")),
+            slowmode_duration=int(os.getenv("SUPPORT_SPAM_SLOWMODE_DURATION", "300")),
+            ticket_cooldown=int(os.getenv("SUPPORT_SPAM_TICKET_COOLDOWN", "3600")),
+            max_tracked_users=int(os.getenv("SUPPORT_SPAM_TRACKED_USERS", "10000")),
+        )
+        config.actions.update(parse_actions(os.getenv("SUPPORT_SPAM_ACTIONS", "")))
+        return config
+
+
+class RingBuffer:
+    """Feste Anzahl der letzten Einträge; Anhängen überschreibt den ältesten in O(1)."""
+    __slots__ = ("items", "start", "size")
+
+    def __init__(self, capacity: int):
+        self.items: list = [None] * max(1, capacity)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        capacity = len(self.items)
+        for offset in range(self.size):
+            yield self.items[(self.start + offset) % capacity]
+
+    @property
+    def full(self) -> bool:
+        return self.size == len(self.items)
+
+    def append(self, item):
+        capacity = len(self.items)
+        if self.size < capacity:
+            self.items[(self.start + self.size) % capacity] = item
+            self.size += 1
+        else:
+            self.items[self.start] = item
+            self.start = (self.start + 1) % capacity
+
+    def oldest(self):
+        return self.items[self.start] if self.size else None
+
+    def clear(self):
+        self.start = self.size = 0
+
+
+def within(ring: RingBuffer, now: float, window: float) -> bool:
+    """True, wenn der Puffer voll ist und sein ältester Eintrag höchstens `window` Sekunden zurückliegt."""
+    return ring.full and now - ring.oldest() <= window
+
+
+def exceeds(ring: RingBuffer, now: float, window: float) -> bool:
+    """Hängt `now` an; True, wenn damit `Kapazität` Ereignisse innerhalb von `window` Sekunden liegen."""
+    ring.append(now)
+    return within(ring, now, window)
+
+
+class UserState:
+    __slots__ = ("messages", "recent", "tickets", "ticket_cooldown_until")
+
+    def __init__(self, config: SpamConfig):
+        # Ein Platz mehr als erlaubt: der Puffer ist erst mit dem ersten zu viel erfassten Ereignis voll
+        self.messages = RingBuffer(config.user_flood[0] + 1)
+        self.recent = RingBuffer(config.duplicates[0] + 1)  # (Zeitpunkt, Prüfsumme des Inhalts)
+        # Nur erstellte Tickets; geprüft wird vor dem nächsten, daher genau so viele Plätze wie erlaubt
+        self.tickets = RingBuffer(config.tickets[0])
+        self.ticket_cooldown_until = 0.0
+
+
+class SpamGuard:
+    """
+    Gleitende Fenster pro Nutzer und Kanal zur Erkennung von Floods, Wiederholungen und Ticket-Missbrauch.
+
+    Jedes Fenster ist ein Ringpuffer mit einem Platz mehr, als der Schwellwert erlaubt: liegt der älteste
+    Eintrag eines vollen Puffers noch im Fenster, ist der Schwellwert überschritten. Jede Nachricht kostet damit
+    O(1). Die Zahl der verfolgten Nutzer und Kanäle ist per LRU begrenzt, sodass auch ein Raid mit vielen
+    neuen Accounts den Speicher nicht wachsen lässt.
+    """
+
+    def __init__(self, config: Optional[SpamConfig] = None):
+        self.config = config or SpamConfig.from_env()
+        self.users: OrderedDict[tuple[int, int], UserState] = OrderedDict()
+        self.channels: OrderedDict[int, RingBuffer] = OrderedDict()
+
+    def _user(self, guild_id: int, user_id: int) -> UserState:
+        key = (guild_id, user_id)
+        state = self.users.get(key)
+        if state is None:
+            state = self.users[key] = UserState(self.config)
+            if len(self.users) > self.config.max_tracked_users:
+                self.users.popitem(last=False)
+        else:
+            self.users.move_to_end(key)
+        return state
+
+    def _channel(self, channel_id: int) -> RingBuffer:
+        ring = self.channels.get(channel_id)
+        if ring is None:
+            ring = self.channels[channel_id] = RingBuffer(self.config.channel_flood[0] + 1)
+            if len(self.channels) > self.config.max_tracked_channels:
+                self.channels.popitem(last=False)
+        else:
+            self.channels.move_to_end(channel_id)
+        return ring
+
+    def check_message(self, guild_id: int, channel_id: int, user_id: int, content: str,
+                      now: Optional[float] = None) -> list[str]:
+        """Erfasst eine Nachricht und gibt die dadurch ausgelösten Verstöße zurück."""
+        now = time.monotonic() if now is None else now
+        state = self._user(guild_id, user_id)
+        violations = []
+
+        if exceeds(state.messages, now, self.config.user_flood[1]):
+            violations.append(FLOOD)
+
+        if content:
+            digest = zlib.crc32(" ".join(content.casefold().split()).encode("utf-8"))
+            state.recent.append((now, digest))
+            if state.recent.full and all(seen == digest and now - at <= self.config.duplicates[1]
+                                         for at, seen in state.recent):
+                violations.append(DUPLICATE)
+
+        if exceeds(self._channel(channel_id), now, self.config.channel_flood[1]):
+            violations.append(CHANNEL_FLOOD)
+
+        for kind in violations:
+            SPAM_VIOLATIONS.inc(kind=kind)
+        return violations
+
+    def check_ticket(self, guild_id: int, user_id: int, now: Optional[float] = None) -> float:
+        """
+        Prüft vor einer Ticket-Eröffnung, ob der Nutzer noch ein Ticket erstellen darf. Erfasst wird das Ticket
+        erst mit `record_ticket`, sobald es tatsächlich angelegt ist.
+
+        :return: 0, wenn das Ticket erlaubt ist, sonst die verbleibende Sperrzeit in Sekunden.
+        """
+        now = time.monotonic() if now is None else now
+        state = self._user(guild_id, user_id)
+        if state.ticket_cooldown_until > now:
+            return state.ticket_cooldown_until - now
+        if within(state.tickets, now, self.config.tickets[1]):
+            SPAM_VIOLATIONS.inc(kind=TICKET_ABUSE)
+            if self.config.actions.get(TICKET_ABUSE) == "cooldown":
+                state.ticket_cooldown_until = now + self.config.ticket_cooldown
+                state.tickets.clear()
+                return self.config.ticket_cooldown
+        return 0.0
+
+    def record_ticket(self, guild_id: int, user_id: int, now: Optional[float] = None):
+        """Erfasst ein erfolgreich erstelltes Ticket für das Fenster von `check_ticket`."""
+        self._user(guild_id, user_id).tickets.append(time.monotonic() if now is None else now)
+
+    def reset_user(self, guild_id: int, user_id: int):
+        """Vergisst den Verlauf eines Nutzers, z. B. nach einem Timeout, damit nicht erneut bestraft wird."""
+        state = self.users.get((guild_id, user_id))
+        if state is not None:
+            state.messages.clear()
+            state.recent.clear()
+
+    def reset_channel(self, channel_id: int):
+        ring = self.channels.get(channel_id)
+        if ring is not None:
+            ring.clear()
@@ -0,0 +1,12 @@
+import os
+
+import discord
+
+# Rolle der Moderatoren; ohne Angabe gilt die Berechtigung "Threads verwalten"
+STAFF_ROLE_ID = os.getenv("SUPPORT_STAFF_ROLE_ID")
+
+
+def is_staff(member: discord.Member) -> bool:
+    if STAFF_ROLE_ID:
+        return any(role.id == int(STAFF_ROLE_ID) for role in member.roles)
+    return member.guild_permissions.manage_threads
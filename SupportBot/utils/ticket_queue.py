@@ -0,0 +1,95 @@
+import heapq
+import itertools
+import math
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from SupportBot.utils.tickets import Ticket, TicketCache
+
+
+class TicketQueue:
+    """
+    Warteschlange der noch nicht zugewiesenen Tickets einer Guild als Heap nach (Priorität, Alter, SLA-Frist).
+
+    Einträge werden nicht gelöscht, sondern beim Entnehmen verworfen, wenn das Ticket inzwischen zugewiesen,
+    geschlossen oder umpriorisiert wurde. Einfügen und Entnehmen sind damit O(log n).
+    """
+
+    def __init__(self):
+        self._heap: list[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, ticket: "Ticket"):
+        sla = ticket.sla_deadline if ticket.sla_deadline is not None else math.inf
+        heapq.heappush(self._heap, (ticket.priority, ticket.created_at, sla, ticket.id))
+
+    @staticmethod
+    def _is_current(entry: tuple, cache: "TicketCache") -> bool:
+        ticket = cache.get(entry[3])
+        return ticket is not None and ticket.assignee_id is None and ticket.priority == entry[0]
+
+    def peek(self, cache: "TicketCache") -> Optional["Ticket"]:
+        while self._heap and not self._is_current(self._heap[0], cache):
+            heapq.heappop(self._heap)
+        return cache.get(self._heap[0][3]) if self._heap else None
+
+    def pop(self, cache: "TicketCache") -> Optional["Ticket"]:
+        ticket = self.peek(cache)
+        if ticket is not None:
+            heapq.heappop(self._heap)
+        return ticket
+
+
+class ModeratorPool:
+    """
+    Last der Moderatoren einer Guild (Anzahl übernommener offener Tickets) als Min-Heap.
+
+    Jede Laständerung legt einen neuen Eintrag an; veraltete Einträge werden beim Entnehmen übersprungen und
+    der Heap gelegentlich neu aufgebaut. Die Auswahl des am wenigsten ausgelasteten Moderators ist O(log n).
+    """
+
+    def __init__(self, max_load: int):
+        self.max_load = max_load
+        self.load: dict[int, int] = {}
+        self.on_duty: set[int] = set()
+        self._heap: list[tuple[int, int, int]] = []
+        self._order = itertools.count()  # Bei gleicher Last kommt zuerst, wer am längsten nichts bekommen hat
+
+    def __len__(self) -> int:
+        return len(self.on_duty)
+
+    def _push(self, moderator_id: int):
+        if moderator_id in self.on_duty:
+            heapq.heappush(self._heap, (self.load.get(moderator_id, 0), next(self._order), moderator_id))
+            if len(self._heap) > 4 * len(self.on_duty) + 16:
+                self._rebuild()
+
+    def _rebuild(self):
+        latest: dict[int, int] = {}
+        for _, order, moderator_id in self._heap:
+            latest[moderator_id] = max(order, latest.get(moderator_id, order))
+        self._heap = [(self.load.get(moderator_id, 0), order, moderator_id)
+                      for moderator_id, order in latest.items() if moderator_id in self.on_duty]
+        heapq.heapify(self._heap)
+
+    def set_on_duty(self, moderator_id: int, on_duty: bool):
+        if on_duty:
+            self.on_duty.add(moderator_id)
+            self._push(moderator_id)
+        else:
+            self.on_duty.discard(moderator_id)
+
+    def adjust(self, moderator_id: int, delta: int):
+        self.load[moderator_id] = max(0, self.load.get(moderator_id, 0) + delta)
+        self._push(moderator_id)
+
+    def peek(self) -> Optional[int]:
+        """Moderator im Dienst mit der geringsten Last unterhalb von `max_load`, sonst None."""
+        while self._heap:
+            load, _, moderator_id = self._heap[0]
+            if moderator_id in self.on_duty and self.load.get(moderator_id, 0) == load:
+                return moderator_id if load < self.max_load else None
+            heapq.heappop(self._heap)
+        return None
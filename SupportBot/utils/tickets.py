@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from common.timer_wheel import TimerWheel
+from SupportBot.utils.ticket_queue import ModeratorPool, TicketQueue
+
+logger = logging.getLogger(__name__)
+
+# Status, in denen ein Ticket im Speicher gehalten wird
+OPEN_STATUSES = ("open", "claimed")
+
+# Prioritäten: kleinere Zahl wird zuerst bearbeitet
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "hoch", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "niedrig"}
+
+# Frist bis zur Übernahme durch einen Moderator in Minuten, je Priorität (hoch, normal, niedrig)
+SLA_MINUTES = [int(value) for value in os.getenv("SUPPORT_SLA_MINUTES", "30,120,480").split(",")]
+# Höchstzahl offener Tickets, die einem Moderator automatisch zugewiesen werden
+MAX_TICKETS_PER_MODERATOR = int(os.getenv("SUPPORT_MAX_TICKETS_PER_MODERATOR", "5"))
+
+
+def sla_deadline(created_at: int, priority: int) -> int:
+    return created_at + SLA_MINUTES[priority] * 60
+
+
+@dataclass
+class Ticket:
+    """Ein Support-Ticket samt zugehörigem Thread."""
+    id: int
+    guild_id: int
+    user_id: int
+    subject: str = ""
+    channel_id: Optional[int] = None
+    assignee_id: Optional[int] = None
+    status: str = "open"
+    created_at: int = field(default_factory=lambda: int(time.time()))
+    closed_at: Optional[int] = None
+    closed_by: Optional[int] = None
+    priority: int = PRIORITY_NORMAL
+    sla_deadline: Optional[int] = None  # None, sobald übernommen oder die Frist bereits gemeldet wurde
+
+    COLUMNS = ("id", "guild_id", "user_id", "subject", "channel_id", "assignee_id", "status", "created_at",
+               "closed_at", "closed_by", "priority", "sla_deadline")
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Ticket":
+        return cls(*row)
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in OPEN_STATUSES
+
+
+@dataclass
+class TicketCache:
+    """
+    In-Memory-Index der offenen Tickets.
+
+    Alle Zugriffe aus den Commands (Ticket eines Threads, offene Tickets eines Nutzers oder Moderators)
+    sind Dictionary-Lookups; die Datenbank wird dafür nicht abgefragt.
+    """
+    by_id: dict = field(default_factory=dict)
+    by_channel: dict = field(default_factory=dict)
+    by_guild: dict = field(default_factory=dict)
+    by_user: dict = field(default_factory=dict)
+    by_assignee: dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, ticket_id: int) -> Optional[Ticket]:
+        return self.by_id.get(ticket_id)
+
+    def for_channel(self, channel_id: int) -> Optional[Ticket]:
+        ticket_id = self.by_channel.get(channel_id)
+        return self.by_id.get(ticket_id) if ticket_id is not None else None
+
+    def _sorted(self, ids) -> list[Ticket]:
+        return sorted((self.by_id[ticket_id] for ticket_id in ids), key=lambda ticket: ticket.id)
+
+    def for_guild(self, guild_id: int) -> list[Ticket]:
+        return self._sorted(self.by_guild.get(guild_id, ()))
+
+    def for_user(self, guild_id: int, user_id: int) -> list[Ticket]:
+        return self._sorted(self.by_user.get((guild_id, user_id), ()))
+
+    def for_assignee(self, guild_id: int, assignee_id: int) -> list[Ticket]:
+        return self._sorted(self.by_assignee.get((guild_id, assignee_id), ()))
+
+    def add(self, ticket: Ticket):
+        self.remove(ticket.id)
+        self.by_id[ticket.id] = ticket
+        if ticket.channel_id is not None:
+            self.by_channel[ticket.channel_id] = ticket.id
+        self.by_guild.setdefault(ticket.guild_id, set()).add(ticket.id)
+        self.by_user.setdefault((ticket.guild_id, ticket.user_id), set()).add(ticket.id)
+        if ticket.assignee_id is not None:
+            self.by_assignee.setdefault((ticket.guild_id, ticket.assignee_id), set()).add(ticket.id)
+
+    def remove(self, ticket_id: int) -> Optional[Ticket]:
+        ticket = self.by_id.pop(ticket_id, None)
+        if ticket is None:
+            return None
+        if ticket.channel_id is not None:
+            self.by_channel.pop(ticket.channel_id, None)
+        _discard(self.by_guild, ticket.guild_id, ticket.id)
+        _discard(self.by_user, (ticket.guild_id, ticket.user_id), ticket.id)
+        if ticket.assignee_id is not None:
+            _discard(self.by_assignee, (ticket.guild_id, ticket.assignee_id), ticket.id)
+        return ticket
+
+
+def _discard(index: dict, key, ticket_id: int):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(ticket_id)
+        if not ids:
+            del index[key]
+
+
+class TicketStore:
+    """
+    Tickets in Datenbank und Speicher.
+
+    Änderungen werden zuerst in die Datenbank geschrieben und erst danach im Cache übernommen. Die offenen
+    Tickets einer Guild werden beim ersten Zugriff einmalig über den Index (guild_id, status) geladen; daraus
+    werden Warteschlange, Moderatorenlast und SLA-Timer wieder aufgebaut.
+    """
+
+    def __init__(self, db, timers: Optional[TimerWheel] = None):
+        self.db = db
+        self.cache = TicketCache()
+        self.queues: dict[int, TicketQueue] = {}
+        self.moderators: dict[int, ModeratorPool] = {}
+        self.timers = timers if timers is not None else TimerWheel(name="sla")
+        # Wird mit dem Ticket aufgerufen, dessen SLA-Frist ohne Übernahme abgelaufen ist
+        self.on_sla_breach: Optional[Callable[[Ticket], Awaitable[None]]] = None
+        self.loaded_guilds: set[int] = set()
+        self._load_lock = asyncio.Lock()
+
+    def queue(self, guild_id: int) -> TicketQueue:
+        if guild_id not in self.queues:
+            self.queues[guild_id] = TicketQueue()
+        return self.queues[guild_id]
+
+    def moderator_pool(self, guild_id: int) -> ModeratorPool:
+        if guild_id not in self.moderators:
+            self.moderators[guild_id] = ModeratorPool(MAX_TICKETS_PER_MODERATOR)
+        return self.moderators[guild_id]
+
+    async def ensure_guild(self, guild_id: int):
+        if guild_id in self.loaded_guilds:
+            return
+        async with self._load_lock:
+            if guild_id in self.loaded_guilds:
+                return
+            pool = self.moderator_pool(guild_id)
+            for moderator_id in await self.db.get_moderators_on_duty(guild_id):
+                pool.set_on_duty(moderator_id, True)
+            for ticket in await self.db.get_open_tickets(guild_id):
+                self.cache.add(ticket)
+                if ticket.assignee_id is None:
+                    self.queue(guild_id).push(ticket)
+                    self._schedule_sla(ticket)
+                else:
+                    pool.adjust(ticket.assignee_id, 1)
+            self.loaded_guilds.add(guild_id)
+
+    def _schedule_sla(self, ticket: Ticket):
+        if ticket.sla_deadline is not None:
+            self.timers.schedule(("sla", ticket.id), ticket.sla_deadline, lambda: self._sla_expired(ticket.id))
+
+    async def _sla_expired(self, ticket_id: int):
+        ticket = self.cache.get(ticket_id)
+        if ticket is None or ticket.assignee_id is not None:
+            return
+        # Frist nur einmal melden, auch über Neustarts hinweg
+        await self.db.set_ticket_sla(ticket.id, ticket.priority, None)
+        ticket.sla_deadline = None
+        logger.warning("SLA von Ticket #%s überschritten.", ticket.id)
+        if self.on_sla_breach is not None:
+            await self.on_sla_breach(ticket)
+
+    async def open(self, guild_id: int, user_id: int, subject: str, priority: int = PRIORITY_NORMAL) -> Ticket:
+        """Legt ein Ticket ohne Thread an; den Thread ergänzt `attach_channel`."""
+        await self.ensure_guild(guild_id)
+        ticket = Ticket(id=0, guild_id=guild_id, user_id=user_id, subject=subject, priority=priority)
+        ticket.sla_deadline = sla_deadline(ticket.created_at, priority)
+        ticket.id = await self.db.create_ticket(ticket)
+        self.cache.add(ticket)
+        self.queue(guild_id).push(ticket)
+        self._schedule_sla(ticket)
+        return ticket
+
+    async def attach_channel(self, ticket: Ticket, channel_id: int):
+        await self.db.set_ticket_channel(ticket.id, channel_id)
+        ticket.channel_id = channel_id
+        self.cache.add(ticket)
+
+    async def claim(self, ticket: Ticket, assignee_id: int):
+        await self.db.assign_ticket(ticket.id, assignee_id, "claimed")
+        pool = self.moderator_pool(ticket.guild_id)
+        if ticket.assignee_id is not None:
+            pool.adjust(ticket.assignee_id, -1)
+        pool.adjust(assignee_id, 1)
+        self.cache.remove(ticket.id)
+        ticket.assignee_id, ticket.status = assignee_id, "claimed"
+        self.cache.add(ticket)
+        self.timers.cancel(("sla", ticket.id))
+
+    async def set_priority(self, ticket: Ticket, priority: int):
+        """Ändert die Priorität; die SLA-Frist wird neu berechnet, sofern sie noch läuft."""
+        deadline = sla_deadline(ticket.created_at, priority) if ticket.sla_deadline is not None else None
+        await self.db.set_ticket_sla(ticket.id, priority, deadline)
+        ticket.priority, ticket.sla_deadline = priority, deadline
+        if ticket.assignee_id is None:
+            self.queue(ticket.guild_id).push(ticket)
+            self._schedule_sla(ticket)
+
+    async def close(self, ticket: Ticket, closed_by: Optional[int]):
+        closed_at = int(time.time())
+        await self.db.close_ticket(ticket.id, closed_by, closed_at)
+        if ticket.assignee_id is not None:
+            self.moderator_pool(ticket.guild_id).adjust(ticket.assignee_id, -1)
+        self.cache.remove(ticket.id)
+        self.timers.cancel(("sla", ticket.id))
+        ticket.status, ticket.closed_at, ticket.closed_by = "closed", closed_at, closed_by
+
+    async def discard(self, ticket: Ticket):
+        """Entfernt ein Ticket, dessen Thread nicht angelegt werden konnte."""
+        await self.db.delete_ticket(ticket.id)
+        self.cache.remove(ticket.id)
+        self.timers.cancel(("sla", ticket.id))
+
+    async def history(self, guild_id: int, user_id: int, limit: int = 10) -> list[Ticket]:
+        """Letzte Tickets eines Nutzers inklusive geschlossener (Index (user_id, created_at))."""
+        return await self.db.get_user_tickets(guild_id, user_id, limit)
+
+    # Warteschlange
+
+    async def next_ticket(self, guild_id: int, moderator_id: int) -> Optional[Ticket]:
+        """Weist das dringendste wartende Ticket dem Moderator zu."""
+        await self.ensure_guild(guild_id)
+        queue = self.queue(guild_id)
+        ticket = queue.pop(self.cache)
+        if ticket is not None:
+            await self._claim_queued(queue, ticket, moderator_id)
+        return ticket
+
+    async def auto_assign(self, guild_id: int) -> list[Ticket]:
+        """Verteilt wartende Tickets an die am wenigsten ausgelasteten Moderatoren im Dienst."""
+        await self.ensure_guild(guild_id)
+        queue, pool = self.queue(guild_id), self.moderator_pool(guild_id)
+        assigned = []
+        while True:
+            moderator_id = pool.peek()
+            if moderator_id is None:
+                break
+            ticket = queue.pop(self.cache)
+            if ticket is None:
+                break
+            await self._claim_queued(queue, ticket, moderator_id)
+            assigned.append(ticket)
+        return assigned
+
+    async def _claim_queued(self, queue: TicketQueue, ticket: Ticket, moderator_id: int):
+        """Weist ein aus der Warteschlange genommenes Ticket zu; scheitert das, kommt es wieder hinein."""
+        # Erst nach dem Entnehmen zuweisen, damit kein gleichzeitiger Aufruf dasselbe Ticket erhält
+        try:
+            await self.claim(ticket, moderator_id)
+        except Exception:
+            queue.push(ticket)
+            raise
+
+    async def set_on_duty(self, guild_id: int, moderator_id: int, on_duty: bool):
+        await self.ensure_guild(guild_id)
+        await self.db.set_moderator_on_duty(guild_id, moderator_id, on_duty)
+        self.moderator_pool(guild_id).set_on_duty(moderator_id, on_duty)
+
@@ -0,0 +1,78 @@
+import asyncio
+import gzip
+import json
+import os
+from dataclasses import asdict
+from typing import Optional
+
+import discord
+
+from SupportBot.utils.tickets import Ticket
+
+TRANSCRIPT_DIR = os.getenv("SUPPORT_TRANSCRIPT_DIR", "transcripts")
+# So viele Nachrichten werden gesammelt und gemeinsam komprimiert geschrieben (eine History-Seite von Discord)
+TRANSCRIPT_BATCH_SIZE = 100
+
+
+def transcript_path(ticket_id: int) -> str:
+    """Fester Ablageort eines Transkripts; max. 1000 Dateien pro Verzeichnis."""
+    return os.path.join(TRANSCRIPT_DIR, f"{ticket_id // 1000:04d}", f"ticket-{ticket_id}.jsonl.gz")
+
+
+def serialize_message(message: discord.Message) -> dict:
+    """Eine Nachricht als JSON-Objekt. Anhänge werden nur verlinkt, nicht heruntergeladen."""
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "bot": message.author.bot,
+        "created_at": message.created_at.isoformat(),
+        "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+        "content": message.content,
+        "attachments": [
+            {"filename": attachment.filename, "url": attachment.url, "size": attachment.size,
+             "content_type": attachment.content_type}
+            for attachment in message.attachments
+        ],
+        "embeds": [embed.to_dict() for embed in message.embeds],
+        "reference": message.reference.message_id if message.reference else None,
+    }
+
+
+def _open(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return gzip.open(path, "wt", encoding="utf-8")
+
+
+async def export_transcript(channel: discord.abc.Messageable, ticket: Ticket,
+                            path: Optional[str] = None) -> tuple[str, int, int]:
+    """
+    Schreibt den Verlauf eines Tickets als JSONL.gz (erste Zeile: Ticket, danach eine Nachricht pro Zeile).
+
+    Die History wird seitenweise gestreamt und blockweise in einem Worker-Thread komprimiert geschrieben,
+    sodass der Speicherbedarf unabhängig von der Länge des Tickets ist. Die Datei erscheint erst nach
+    vollständigem Export (atomares Umbenennen).
+
+    :return: (Pfad, Anzahl Nachrichten, Dateigröße in Bytes)
+    """
+    path = path or transcript_path(ticket.id)
+    temp_path = path + ".tmp"
+    file = await asyncio.to_thread(_open, temp_path)
+    count = 0
+    try:
+        batch = [json.dumps({"ticket": asdict(ticket)}, ensure_ascii=False) + "\n"]
+        async for message in channel.history(limit=None, oldest_first=True):
+            batch.append(json.dumps(serialize_message(message), ensure_ascii=False) + "\n")
+            count += 1
+            if len(batch) >= TRANSCRIPT_BATCH_SIZE:
+                await asyncio.to_thread(file.writelines, batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(file.writelines, batch)
+    except BaseException:
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(os.remove, temp_path)
+        raise
+    await asyncio.to_thread(file.close)
+    await asyncio.to_thread(os.replace, temp_path, path)
+    return path, count, os.path.getsize(path)
@@ -2,68 +2,81 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import os
-import aiohttp
-import pymysql
 from dotenv import load_dotenv
 import logging
+import time
+from typing import Optional
+from common.metrics import record_cache
+from TwitchNotifier.utils.registry import StreamerEntry
 
-# Logging konfigurieren
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Umgebungsvariablen laden
 load_dotenv()
 
+# Überschreibbar, z. B. für die Benchmarks mit lokalem Twitch-Ersatz (siehe benchmarks/)
+HELIX_BASE_URL = os.getenv("TWITCH_HELIX_BASE_URL", "https://api.twitch.tv/helix")
+TWITCH_TOKEN_URL = os.getenv("TWITCH_TOKEN_URL", "https://id.twitch.tv/oauth2/token")
+HELIX_BATCH_SIZE = 100  # Maximale Anzahl an Logins pro Helix-Anfrage
+
+def format_duration(seconds: int) -> str:
+    """Formatiert eine Dauer als `1h 05m`."""
+    hours, minutes = divmod(max(0, int(seconds)) // 60, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
+
+
+SPARK_LEVELS = "▁▂▃▄▅▆▇█"
+RECENT_SAMPLES = 30  # So viele Rohwerte zeigt `/stream_stats` für einen laufenden Stream
+
+
+def sparkline(values: list[int]) -> str:
+    """Stellt Zuschauerzahlen als Zeichenkette aus Blockelementen dar, skaliert auf Minimum und Maximum."""
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(SPARK_LEVELS[(value - low) * (len(SPARK_LEVELS) - 1) // span] for value in values)
+
+
 class TwitchCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.session = aiohttp.ClientSession()
-
-        try:
-            self.db_connection = pymysql.connect(
-                host=os.getenv("DB_HOST"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                database=os.getenv("TWITCH_DB_NAME")
-            )
-        except pymysql.MySQLError as e:
-            logger.error(f"Fehler bei der Verbindung zur Datenbank: {e}")
-            self.db_connection = None
+        self.http = bot.http_client  # Gemeinsamer HTTP-Client des Prozesses (siehe common/http.py)
+        self.db = bot.db  # Gepoolte, nicht blockierende Datenbank (siehe TwitchNotifier/db.py)
 
         self.twitch_client_id = os.getenv("TWITCH_CLIENT_ID")
         self.twitch_client_secret = os.getenv("TWITCH_CLIENT_SECRET")
         self.twitch_token = None  # Speichert gesendete Nachrichten für jeden Streamer
+        self.user_cache = {}  # Helix-Profildaten pro Loginname
 
-    async def cog_unload(self):
-        if self.session:
-            await self.session.close()
-        if self.db_connection:
-            self.db_connection.close()
-
-    def get_all_streamers(self):
-        """Liest alle Streamer aus der Datenbank."""
+    async def get_all_streamers(self) -> list:
+        """Liest alle Streamer samt Metadaten aus der Datenbank."""
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute("SELECT twitch_username FROM streamers")
-            return [row[0] for row in cursor.fetchall()]
+            return await self.db.get_all_streamers()
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Streamer: {e}")
+            logger.error("Fehler beim Abrufen der Streamer: %s", e)
             return []
-        finally:
-            cursor.close()
+
+    async def add_streamer_to_db(self, entry: StreamerEntry):
+        """Speichert einen Streamer in der Datenbank."""
+        await self.db.add_streamer(entry)
+
+    async def remove_streamer_from_db(self, streamer_name: str):
+        """Entfernt einen Streamer aus der Datenbank."""
+        await self.db.remove_streamer(streamer_name)
 
     async def get_twitch_token(self) -> str:
         """Holt ein Zugriffstoken von der Twitch API."""
         if self.twitch_token:
             return self.twitch_token
 
-        url = "https://id.twitch.tv/oauth2/token"
+        url = TWITCH_TOKEN_URL
         payload = {
             "client_id": self.twitch_client_id,
             "client_secret": self.twitch_client_secret,
             "grant_type": "client_credentials"
         }
-        async with self.session.post(url, data=payload) as response:
+        async with self.http.post(url, data=payload) as response:
             response_data = await response.json()
             if "access_token" not in response_data:
                 logger.error("Fehler beim Abrufen des Twitch-Tokens: %s", response_data)
@@ -71,130 +84,147 @@ class TwitchCommands(commands.Cog):
             self.twitch_token = response_data["access_token"]
             return self.twitch_token
 
-    async def is_streamer_live(self, streamer_name: str) -> bool:
-        """Überprüft, ob ein Streamer live ist."""
-        token = await self.get_twitch_token()
-        url = f"https://api.twitch.tv/helix/streams?user_login={streamer_name}"
-        headers = {
+    def get_helix_headers(self, token: str) -> dict:
+        """Header für die Twitch Helix API."""
+        return {
             "Client-ID": self.twitch_client_id,
             "Authorization": f"Bearer {token}"
         }
-        async with self.session.get(url, headers=headers) as response:
+
+    async def get_live_streams(self, streamer_names: list) -> Optional[dict]:
+        """
+        Fragt bis zu 100 Streamer mit einer einzigen Helix-Anfrage ab.
+
+        :param streamer_names: Twitch-Loginnamen der Streamer.
+        :return: Dictionary Loginname (klein) -> Stream-Daten der Live-Streamer oder None bei einem API-Fehler.
+        """
+        token = await self.get_twitch_token()
+        params = [("user_login", name) for name in streamer_names[:HELIX_BATCH_SIZE]]
+        params.append(("first", str(HELIX_BATCH_SIZE)))
+        async with self.http.get(f"{HELIX_BASE_URL}/streams", headers=self.get_helix_headers(token),
+                                    params=params) as response:
             if response.status != 200:
-                logger.error(f"Fehler beim Überprüfen von {streamer_name}: {await response.text()}")
-                return False
+                logger.error("Fehler beim Abrufen der Stream-Daten: %s", await response.text())
+                return None
             data = await response.json()
-            return len(data.get("data", [])) > 0
+        return {stream["user_login"].lower(): stream for stream in data.get("data", [])}
+
+    def needs_user_lookup(self, streamer_names: list) -> bool:
+        """Ob `get_user_infos` für diese Streamer eine Helix-Anfrage stellt."""
+        return any(name.lower() not in self.user_cache for name in streamer_names)
+
+    async def get_user_infos(self, streamer_names: list) -> dict:
+        """Holt Profildaten der Streamer. Diese ändern sich selten und werden daher zwischengespeichert."""
+        missing = [name for name in streamer_names if name.lower() not in self.user_cache]
+        record_cache("twitch_users", True, len(streamer_names) - len(missing))
+        record_cache("twitch_users", False, len(missing))
+        if missing:
+            token = await self.get_twitch_token()
+            params = [("login", name) for name in missing[:HELIX_BATCH_SIZE]]
+            async with self.http.get(f"{HELIX_BASE_URL}/users", headers=self.get_helix_headers(token),
+                                        params=params) as response:
+                if response.status != 200:
+                    logger.error("Fehler beim Abrufen der User-Daten: %s", await response.text())
+                else:
+                    user_data = await response.json()
+                    for user in user_data.get("data", []):
+                        self.user_cache[user["login"].lower()] = user
+        return {name.lower(): self.user_cache[name.lower()]
+                for name in streamer_names if name.lower() in self.user_cache}
+
+    @staticmethod
+    def build_stream_info(streamer_name: str, stream: dict, user: dict) -> dict:
+        """Baut die Stream-Informationen für Embed und View aus Helix-Stream- und User-Daten."""
+        thumbnail = stream["thumbnail_url"].replace("{width}", "320").replace("{height}", "180")
+        return {
+            "title": stream["title"],
+            "channel_name": user["display_name"],
+            "channel_icon": user["profile_image_url"],
+            "game": stream["game_name"],
+            "viewer_count": stream["viewer_count"],
+            "thumbnail": thumbnail,
+            "channel_url": f"https://www.twitch.tv/{streamer_name}"
+        }
+
+    async def streamer_exists(self, streamer_name: str) -> bool:
+        """Prüft, ob ein Twitch-Account mit diesem Namen existiert."""
+        return bool(await self.get_user_infos([streamer_name]))
+
+    async def is_streamer_live(self, streamer_name: str) -> bool:
+        """Überprüft, ob ein Streamer live ist."""
+        live_streams = await self.get_live_streams([streamer_name])
+        return bool(live_streams) and streamer_name.lower() in live_streams
 
     async def get_stream_info(self, streamer_name: str) -> dict:
         """Holt Stream-Informationen von Twitch."""
-        token = await self.get_twitch_token()
-        url = f"https://api.twitch.tv/helix/streams?user_login={streamer_name}"
-        headers = {
-            "Client-ID": self.twitch_client_id,
-            "Authorization": f"Bearer {token}"
-        }
-        async with self.session.get(url, headers=headers) as stream_response:
-            if stream_response.status != 200:
-                logger.error(f"Fehler beim Abrufen der Stream-Daten für {streamer_name}: {await stream_response.text()}")
-                return None
-            stream_data = await stream_response.json()
-            if not stream_data.get("data"):
-                return None
+        live_streams = await self.get_live_streams([streamer_name])
+        stream = (live_streams or {}).get(streamer_name.lower())
+        if not stream:
+            return None
+
+        user = (await self.get_user_infos([streamer_name])).get(streamer_name.lower())
+        if not user:
+            logger.warning("Keine User-Daten für %s erhalten.", streamer_name)
+            return None
+        return self.build_stream_info(streamer_name, stream, user)
 
-            stream_info = stream_data["data"][0]
-            thumbnail = stream_info["thumbnail_url"].replace("{width}", "320").replace("{height}", "180")
+    async def get_notification_channel(self) -> int:
+        """Liest die alte, globale Benachrichtigungskanal-ID aus der Datenbank."""
+        return await self.db.get_notification_channel()
 
-        user_url = f"https://api.twitch.tv/helix/users?login={streamer_name}"
-        async with self.session.get(user_url, headers=headers) as user_response:
-            if user_response.status != 200:
-                logger.error(f"Fehler beim Abrufen der User-Daten für {streamer_name}: {await user_response.text()}")
-                return None
-            user_data = await user_response.json()
-            if not stream_data.get("data"):
-                logger.warning(f"Streamer {streamer_name} ist nicht live oder Twitch hat keine Daten zurückgegeben.")
-                return None
+    async def get_notification_routes(self) -> list:
+        """
+        Liest alle Benachrichtigungskanäle pro Guild (und optional pro Streamer).
 
-            user_info = user_data["data"][0]
-            return {
-                "title": stream_info["title"],
-                "channel_name": user_info["display_name"],
-                "channel_icon": user_info["profile_image_url"],
-                "game": stream_info["game_name"],
-                "viewer_count": stream_info["viewer_count"],
-                "thumbnail": thumbnail,
-                "channel_url": f"https://www.twitch.tv/{streamer_name}"
-            }
-
-    def get_notification_channel(self) -> int:
-        """Liest die Benachrichtigungskanal-ID aus der Datenbank."""
-        cursor = self.db_connection.cursor()
-        cursor.execute("SELECT channel_id FROM notification_channel LIMIT 1")
-        result = cursor.fetchone()
-        cursor.close()
-        return result[0] if result else None
-
-    def save_message_to_db(self, streamer_name: str, message: discord.Message):
+        :return: Liste von Tupeln (guild_id, streamer_name, channel_id); '' steht für alle Streamer.
+        """
+        try:
+            return await self.db.get_notification_routes()
+        except Exception as e:
+            logger.error("Fehler beim Abrufen der Benachrichtigungskanäle: %s", e)
+            return []
+
+    async def save_message_to_db(self, streamer_name: str, message: discord.Message):
         """Speichert eine Nachricht in der Datenbank."""
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute(
-                """
-                INSERT INTO sent_notifications (streamer_name, message_id, channel_id)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE message_id = VALUES(message_id), channel_id = VALUES(channel_id)
-                """,
-                (streamer_name, message.id, message.channel.id)
-            )
-            self.db_connection.commit()
-            cursor.close()
-            logger.info(f"Nachricht für {streamer_name} in der Datenbank gespeichert.")
+            await self.db.save_message(streamer_name, message.id, message.channel.id)
+            logger.info("Nachricht für %s in der Datenbank gespeichert.", streamer_name)
         except Exception as e:
-            logger.error(f"Fehler beim Speichern der Nachricht für {streamer_name}: {e}")
+            logger.error("Fehler beim Speichern der Nachricht für %s: %s", streamer_name, e)
 
-    def get_message_from_db(self, streamer_name: str):
+    async def get_message_from_db(self, streamer_name: str):
         """Lädt die Nachricht eines Streamers aus der Datenbank."""
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute(
-                "SELECT message_id, channel_id FROM sent_notifications WHERE streamer_name = %s LIMIT 1",
-                (streamer_name,)
-            )
-            result = cursor.fetchone()
-            cursor.close()
-            return result
+            return await self.db.get_message(streamer_name)
         except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Nachricht für {streamer_name}: {e}")
+            logger.error("Fehler beim Abrufen der Nachricht für %s: %s", streamer_name, e)
             return None
 
-    def remove_message_from_db(self, streamer_name: str):
+    async def remove_message_from_db(self, streamer_name: str):
         """Entfernt eine Nachricht aus der Datenbank."""
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute("DELETE FROM sent_notifications WHERE streamer_name = %s", (streamer_name,))
-            self.db_connection.commit()
-            cursor.close()
-            logger.info(f"Nachricht für {streamer_name} aus der Datenbank entfernt.")
+            await self.db.remove_message(streamer_name)
+            logger.info("Nachricht für %s aus der Datenbank entfernt.", streamer_name)
         except Exception as e:
-            logger.error(f"Fehler beim Entfernen der Nachricht für {streamer_name}: {e}")
+            logger.error("Fehler beim Entfernen der Nachricht für %s: %s", streamer_name, e)
 
     async def send_live_notification(self, streamer, stream_info):
         """Sendet oder aktualisiert eine Live-Benachrichtigung."""
-        channel_id = self.get_notification_channel()
+        channel_id = await self.get_notification_channel()
         if not channel_id:
             logger.error("Kein Benachrichtigungskanal gesetzt.")
             return
 
         channel = self.bot.get_channel(channel_id)
         if not channel:
-            logger.error(f"Kanal mit ID {channel_id} nicht gefunden.")
+            logger.error("Kanal mit ID %s nicht gefunden.", channel_id)
             return
 
         embed = self.build_embed(stream_info)
         view = self.build_view(stream_info)
 
         # Nachricht aus der Datenbank abrufen
-        message_data = self.get_message_from_db(streamer)
+        message_data = await self.get_message_from_db(streamer)
 
         if message_data:
             # Nachricht aktualisieren
@@ -204,26 +234,26 @@ class TwitchCommands(commands.Cog):
                 try:
                     message = await channel.fetch_message(message_id)
                     await message.edit(embed=embed, view=view)
-                    logger.info(f"Nachricht für {streamer} aktualisiert.")
+                    logger.debug("Nachricht für %s aktualisiert.", streamer)
                 except discord.NotFound:
                     # Nachricht wurde gelöscht, neue Nachricht senden
-                    logger.warning(f"Nachricht für {streamer} nicht gefunden. Sende eine neue Nachricht.")
+                    logger.warning("Nachricht für %s nicht gefunden. Sende eine neue Nachricht.", streamer)
                     message = await channel.send(embed=embed, view=view)
-                    self.save_message_to_db(streamer, message)
+                    await self.save_message_to_db(streamer, message)
                 except Exception as e:
-                    logger.error(f"Fehler beim Aktualisieren der Nachricht für {streamer}: {e}")
+                    logger.error("Fehler beim Aktualisieren der Nachricht für %s: %s", streamer, e)
         else:
             # Neue Nachricht senden
             try:
                 message = await channel.send(embed=embed, view=view)
-                self.save_message_to_db(streamer, message)
-                logger.info(f"Nachricht für {streamer} gesendet.")
+                await self.save_message_to_db(streamer, message)
+                logger.debug("Nachricht für %s gesendet.", streamer)
             except Exception as e:
-                logger.error(f"Fehler beim Senden der Nachricht für {streamer}: {e}")
+                logger.error("Fehler beim Senden der Nachricht für %s: %s", streamer, e)
 
     async def remove_notification(self, streamer):
         """Entfernt die Benachrichtigung für einen Streamer."""
-        message_data = self.get_message_from_db(streamer)
+        message_data = await self.get_message_from_db(streamer)
         if message_data:
             message_id, channel_id = message_data
             channel = self.bot.get_channel(channel_id)
@@ -231,14 +261,14 @@ class TwitchCommands(commands.Cog):
                 try:
                     message = await channel.fetch_message(message_id)
                     await message.delete()
-                    self.remove_message_from_db(streamer)
-                    logger.info(f"Nachricht für {streamer} entfernt.")
+                    await self.remove_message_from_db(streamer)
+                    logger.debug("Nachricht für %s entfernt.", streamer)
                 except discord.NotFound:
                     # Nachricht bereits gelöscht
-                    logger.warning(f"Nachricht für {streamer} wurde bereits gelöscht.")
-                    self.remove_message_from_db(streamer)
+                    logger.warning("Nachricht für %s wurde bereits gelöscht.", streamer)
+                    await self.remove_message_from_db(streamer)
                 except Exception as e:
-                    logger.error(f"Fehler beim Entfernen der Nachricht für {streamer}: {e}")
+                    logger.error("Fehler beim Entfernen der Nachricht für %s: %s", streamer, e)
 
     def build_embed(self, stream_info: dict) -> discord.Embed:
         """Erstellt ein Embed für den Live-Streamer."""
@@ -261,69 +291,170 @@ class TwitchCommands(commands.Cog):
         view.add_item(discord.ui.Button(label="🔗 Zum Stream", url=stream_info["channel_url"], style=discord.ButtonStyle.link))
         return view
 
-    def remove_message_from_db(self, streamer_name: str):
-        """Entfernt eine gespeicherte Nachricht aus der Datenbank."""
+    @app_commands.command(name="set_notification_channel", description="Setzt den Kanal für Twitch-Benachrichtigungen.")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def set_notification_channel_command(self, interaction: discord.Interaction, channel: discord.TextChannel,
+                                               streamer_name: Optional[str] = None):
+        """Setzt den Benachrichtigungskanal dieser Guild, optional nur für einen Streamer."""
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute("DELETE FROM sent_notifications WHERE streamer_name = %s", (streamer_name,))
-            self.db_connection.commit()
-            cursor.close()
-            logger.info(f"Nachricht für {streamer_name} aus der Datenbank entfernt.")
+            await self.db.save_notification_route(interaction.guild_id, channel.id, streamer_name)
         except Exception as e:
-            logger.error(f"Fehler beim Entfernen der Nachricht für {streamer_name}: {e}")
+            logger.error("Fehler beim Speichern des Benachrichtigungskanals: %s", e)
+            await interaction.response.send_message("Fehler beim Speichern des Kanals.", ephemeral=True)
+            return
 
-    @app_commands.command(name="set_notification_channel", description="Setzt den Kanal für Twitch-Benachrichtigungen.")
-    @app_commands.checks.has_permissions(administrator=True)
-    async def set_notification_channel_command(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        """Setzt den Benachrichtigungskanal."""
-        self.set_notification_channel(channel.id)
-        await interaction.response.send_message(f"Benachrichtigungskanal wurde auf {channel.mention} gesetzt.",
+        self.bot.notification_router.set_route(interaction.guild_id, channel.id, streamer_name)
+        target = f" für **{streamer_name}**" if streamer_name else ""
+        await interaction.response.send_message(f"Benachrichtigungskanal{target} wurde auf {channel.mention} gesetzt.",
                                                 ephemeral=True)
 
+    @app_commands.command(name="remove_notification_channel",
+                          description="Entfernt den Kanal für Twitch-Benachrichtigungen dieser Guild.")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def remove_notification_channel_command(self, interaction: discord.Interaction,
+                                                  streamer_name: Optional[str] = None):
+        """Entfernt den Benachrichtigungskanal dieser Guild bzw. die Zuordnung eines Streamers."""
+        try:
+            await self.db.delete_notification_route(interaction.guild_id, streamer_name)
+        except Exception as e:
+            logger.error("Fehler beim Entfernen des Benachrichtigungskanals: %s", e)
+            await interaction.response.send_message("Fehler beim Entfernen des Kanals.", ephemeral=True)
+            return
+
+        if self.bot.notification_router.remove_route(interaction.guild_id, streamer_name):
+            await interaction.response.send_message("Benachrichtigungskanal wurde entfernt.", ephemeral=True)
+        else:
+            await interaction.response.send_message("Es war kein Benachrichtigungskanal gesetzt.", ephemeral=True)
+
     @app_commands.command(name="add_streamer", description="Fügt einen Streamer zur Überwachung hinzu.")
     @app_commands.checks.has_permissions(administrator=True)
     async def add_streamer(self, interaction: discord.Interaction, streamer_name: str):
         """Fügt einen Streamer zur Überwachungsliste hinzu."""
+        streamer_name = streamer_name.strip().lower()
+        if streamer_name in self.bot.streamers:
+            await interaction.response.send_message(f"Streamer **{streamer_name}** wird bereits überwacht.",
+                                                    ephemeral=True)
+            return
+
         if not await self.streamer_exists(streamer_name):
             await interaction.response.send_message(f"Streamer **{streamer_name}** existiert nicht auf Twitch.",
                                                     ephemeral=True)
             return
 
+        user = self.user_cache.get(streamer_name, {})
+        entry = StreamerEntry(name=streamer_name, added_by=interaction.user.id,
+                              display_name=user.get("display_name"), twitch_id=user.get("id"))
         try:
-            self.add_streamer_to_db(streamer_name)
+            await self.bot.streamers.add(entry)
             await interaction.response.send_message(
                 f"Streamer **{streamer_name}** wurde zur Überwachungsliste hinzugefügt.", ephemeral=True)
         except ValueError as e:
             await interaction.response.send_message(str(e), ephemeral=True)
+        except Exception as e:
+            logger.error("Fehler beim Hinzufügen des Streamers %s: %s", streamer_name, e)
+            await interaction.response.send_message("Fehler beim Speichern des Streamers.", ephemeral=True)
 
     @app_commands.command(name="remove_streamer", description="Entfernt einen Streamer aus der Überwachungsliste.")
     @app_commands.checks.has_permissions(administrator=True)
     async def remove_streamer(self, interaction: discord.Interaction, streamer_name: str):
         """Entfernt einen Streamer aus der Überwachungsliste."""
-        self.remove_streamer_from_db(streamer_name)
+        streamer_name = streamer_name.strip().lower()
+        try:
+            removed = await self.bot.streamers.remove(streamer_name)
+        except Exception as e:
+            logger.error("Fehler beim Entfernen des Streamers %s: %s", streamer_name, e)
+            await interaction.response.send_message("Fehler beim Entfernen des Streamers.", ephemeral=True)
+            return
+
+        if not removed:
+            await interaction.response.send_message(f"Streamer **{streamer_name}** wird nicht überwacht.",
+                                                    ephemeral=True)
+            return
+
         await interaction.response.send_message(
             f"Streamer **{streamer_name}** wurde aus der Überwachungsliste entfernt.", ephemeral=True)
+        await self.bot.remove_notification(self, streamer_name)
 
     @app_commands.command(name="list_streamers", description="Listet alle überwachten Streamer auf.")
     async def list_streamers(self, interaction: discord.Interaction):
         """Listet alle Streamer auf, die überwacht werden."""
-        streamers = self.get_all_streamers()
+        streamers = self.bot.streamers.names()
         if not streamers:
             await interaction.response.send_message("Es werden derzeit keine Streamer überwacht.", ephemeral=True)
         else:
-            streamers_list = "\n".join(streamers)
+            streamers_list = "\n".join(
+                f"{name} 🔴" if self.bot.scheduler.is_live(name) else name for name in streamers
+            )
             await interaction.response.send_message(f"Überwachte Streamer:\n{streamers_list}", ephemeral=True)
 
+    @app_commands.command(name="stream_stats", description="Zeigt Zuschauerstatistiken der letzten Streams an.")
+    async def stream_stats(self, interaction: discord.Interaction, streamer_name: str, count: int = 3):
+        """Zeigt Spitze, Durchschnitt, Dauer und Spiele der letzten Streams eines Streamers."""
+        streamer_name = streamer_name.strip().lower()
+        count = max(1, min(count, 10))
+        try:
+            streams = await self.db.get_recent_streams(streamer_name, count)
+        except Exception as e:
+            logger.error("Fehler beim Abrufen der Streamstatistiken für %s: %s", streamer_name, e)
+            await interaction.response.send_message("Fehler beim Abrufen der Statistiken.", ephemeral=True)
+            return
+
+        # Laufenden Stream aus dem Speicher nehmen, er ist aktueller als die Datenbank
+        session = self.bot.viewer_stats.sessions.get(streamer_name)
+        if session:
+            streams = [stream for stream in streams if stream["stream_id"] != session.stream_id]
+            streams.insert(0, {
+                "stream_id": session.stream_id, "started_at": session.started_at, "ended_at": None,
+                "peak": session.peak, "average": session.average, "title": session.title,
+                "segments": [(offset, game) for offset, game, _ in session.segments],
+                "recent": session.ring.recent(RECENT_SAMPLES)
+            })
+            streams = streams[:count]
+
+        if not streams:
+            await interaction.response.send_message(f"Keine Statistiken für **{streamer_name}** vorhanden.",
+                                                    ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"Streamstatistiken: {streamer_name}", color=discord.Color.purple())
+        for stream in streams:
+            end = stream["ended_at"] or int(time.time())
+            duration = max(0, end - stream["started_at"])
+            games = " → ".join(
+                f"{game or 'Unbekannt'} ({format_duration(next_offset - offset)})"
+                for (offset, game), next_offset in zip(
+                    stream["segments"], [o for o, _ in stream["segments"][1:]] + [duration]
+                )
+            ) or "Unbekannt"
+            status = "🔴 live" if stream["ended_at"] is None else f"<t:{stream['started_at']}:d>"
+            recent = stream.get("recent")
+            trend = ""
+            if recent:
+                viewers = [value for _, value in recent]
+                trend = (f"\nVerlauf ({format_duration(recent[-1][0] - recent[0][0])}): {sparkline(viewers)} "
+                         f"{viewers[0]:,} → {viewers[-1]:,}")
+            embed.add_field(
+                name=f"{status} – {stream['title'][:200] or 'Ohne Titel'}",
+                value=(f"Spitze: **{stream['peak']:,}** · Durchschnitt: **{round(stream['average']):,}** · "
+                       f"Dauer: **{format_duration(duration)}**{trend}\nSpiele: {games}")[:1024],
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @app_commands.command(name="help", description="Zeigt eine Liste der verfügbaren Befehle und deren Beschreibungen.")
     async def help_command(self, interaction: discord.Interaction):
         """Zeigt eine Liste der verfügbaren Befehle an."""
         help_text = """
     **Verfügbare Befehle:**
 
-    /set_notification_channel [Kanal] - Setzt den Kanal für Twitch-Benachrichtigungen (nur Administratoren).
+    /set_notification_channel [Kanal] [Streamername] - Setzt den Kanal für Twitch-Benachrichtigungen dieser Guild, optional nur für einen Streamer (nur Administratoren).
+    /remove_notification_channel [Streamername] - Entfernt den Benachrichtigungskanal dieser Guild (nur Administratoren).
     /add_streamer [Streamername] - Fügt einen Streamer zur Überwachungsliste hinzu (nur Administratoren).
     /remove_streamer [Streamername] - Entfernt einen Streamer aus der Überwachungsliste (nur Administratoren).
     /list_streamers - Listet alle überwachten Streamer auf.
+    /stream_stats [Streamername] [Anzahl] - Zeigt Zuschauerstatistiken der letzten Streams an.
     /help - Zeigt diese Hilfe an.
         """
         await interaction.response.send_message(help_text, ephemeral=True)
@@ -0,0 +1,332 @@
+import logging
+import os
+import sqlite3
+from typing import Any, Optional
+
+from common.db_pool import ConnectionPool
+from TwitchNotifier.utils.registry import StreamerEntry
+
+try:
+    import pymysql
+except ImportError:  # Nur für das SQLite-Backend nicht erforderlich
+    pymysql = None
+
+logger = logging.getLogger(__name__)
+
+
+class TwitchDatabase:
+    """Asynchroner Zugriff auf die Datenbank des Twitch-Notifiers (MySQL oder SQLite)."""
+
+    def __init__(self, backend: str = "mysql", pool_size: int = 4, sqlite_path: str = "twitch_bot.db",
+                 **mysql_options):
+        self.backend = backend
+        if backend == "sqlite":
+            self.placeholder = "?"
+            # Jede `:memory:`-Verbindung wäre eine eigene Datenbank
+            size = 1 if sqlite_path == ":memory:" else pool_size
+            self.pool = ConnectionPool(lambda: self._connect_sqlite(sqlite_path),
+                                       lambda connection: connection.execute("SELECT 1"),
+                                       (sqlite3.Error,), size, name="twitch")
+        elif backend == "mysql":
+            if pymysql is None:
+                raise RuntimeError("PyMySQL ist nicht installiert.")
+            self.placeholder = "%s"
+            self.pool = ConnectionPool(lambda: pymysql.connect(**mysql_options),
+                                       lambda connection: connection.ping(reconnect=True),
+                                       (pymysql.MySQLError,), pool_size, name="twitch")
+        else:
+            raise ValueError(f"Unbekanntes Datenbank-Backend: {backend}")
+
+    @classmethod
+    def from_env(cls) -> "TwitchDatabase":
+        """Erstellt die Datenbank anhand der Umgebungsvariablen."""
+        backend = os.getenv("TWITCH_DB_BACKEND", "mysql").lower()
+        pool_size = int(os.getenv("TWITCH_DB_POOL_SIZE", "4"))
+        if backend == "sqlite":
+            return cls("sqlite", pool_size, sqlite_path=os.getenv("TWITCH_SQLITE_PATH", "twitch_bot.db"))
+        return cls(
+            "mysql", pool_size,
+            host=os.getenv("DB_HOST"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            database=os.getenv("TWITCH_DB_NAME"),
+            connect_timeout=10
+        )
+
+    @staticmethod
+    def _connect_sqlite(path: str):
+        connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _sql(self, query: str) -> str:
+        return query if self.placeholder == "%s" else query.replace("%s", "?")
+
+    def _upsert(self, table: str, columns: tuple, keys: tuple) -> str:
+        """Erzeugt ein INSERT, das bestehende Zeilen (gleicher Schlüssel) aktualisiert."""
+        placeholders = ", ".join(["%s"] * len(columns))
+        updates = [column for column in columns if column not in keys]
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        if self.backend == "sqlite":
+            assignments = ", ".join(f"{column} = excluded.{column}" for column in updates)
+            return self._sql(f"{query} ON CONFLICT({', '.join(keys)}) DO UPDATE SET {assignments}")
+        assignments = ", ".join(f"{column} = VALUES({column})" for column in updates)
+        return f"{query} ON DUPLICATE KEY UPDATE {assignments}"
+
+    @staticmethod
+    def _execute(connection, query: str, params: tuple, fetch: Optional[str]):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            if fetch == "all":
+                result = cursor.fetchall()
+            elif fetch == "one":
+                result = cursor.fetchone()
+            else:
+                result = cursor.rowcount
+            # Auch nach Lesezugriffen: beendet die Transaktion, sonst sähe eine Verbindung aus dem Pool unter
+            # REPEATABLE READ dauerhaft den Stand ihrer ersten Abfrage
+            connection.commit()
+            return result
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _execute_script(connection, statements: list, tolerated: tuple):
+        cursor = connection.cursor()
+        try:
+            for statement, tolerate in statements:
+                try:
+                    cursor.execute(statement)
+                except tolerated:
+                    if not tolerate:
+                        raise
+            connection.commit()
+        finally:
+            cursor.close()
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        return await self.pool.run(self._execute, self._sql(query), params, None)
+
+    async def fetchall(self, query: str, params: tuple = ()) -> list:
+        return list(await self.pool.run(self._execute, self._sql(query), params, "all"))
+
+    async def fetchone(self, query: str, params: tuple = ()) -> Optional[tuple]:
+        return await self.pool.run(self._execute, self._sql(query), params, "one")
+
+    async def close(self):
+        await self.pool.close()
+
+    async def initialize(self):
+        """Legt fehlende Tabellen an und ergänzt Spalten älterer Schemata."""
+        statements = [
+            ("""
+            CREATE TABLE IF NOT EXISTS streamers (
+                twitch_username VARCHAR(64) PRIMARY KEY,
+                added_by BIGINT NULL,
+                added_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """, False),
+            # Ältere Tabellen kennen nur `twitch_username`
+            ("ALTER TABLE streamers ADD COLUMN added_by BIGINT NULL", True),
+            ("ALTER TABLE streamers ADD COLUMN added_at TIMESTAMP NULL", True),
+            ("""
+            CREATE TABLE IF NOT EXISTS notification_channel (
+                channel_id BIGINT NOT NULL
+            )
+            """, False),
+            ("""
+            CREATE TABLE IF NOT EXISTS notification_channels (
+                guild_id BIGINT NOT NULL,
+                streamer_name VARCHAR(64) NOT NULL DEFAULT '',
+                channel_id BIGINT NOT NULL,
+                PRIMARY KEY (guild_id, streamer_name)
+            )
+            """, False),
+            ("""
+            CREATE TABLE IF NOT EXISTS sent_notifications (
+                streamer_name VARCHAR(64) PRIMARY KEY,
+                message_id BIGINT NOT NULL,
+                channel_id BIGINT NOT NULL
+            )
+            """, False),
+            ("""
+            CREATE TABLE IF NOT EXISTS streams (
+                stream_id VARCHAR(32) PRIMARY KEY,
+                streamer_name VARCHAR(64) NOT NULL,
+                started_at BIGINT NOT NULL,
+                ended_at BIGINT NULL,
+                peak_viewers INT NOT NULL DEFAULT 0,
+                viewer_sum BIGINT NOT NULL DEFAULT 0,
+                sample_count INT NOT NULL DEFAULT 0,
+                title VARCHAR(255) NOT NULL DEFAULT ''
+            )
+            """, False),
+            ("CREATE INDEX idx_streams_streamer ON streams (streamer_name, started_at)", True),
+            ("""
+            CREATE TABLE IF NOT EXISTS stream_viewer_buckets (
+                stream_id VARCHAR(32) NOT NULL,
+                bucket_offset INT NOT NULL,
+                avg_viewers INT NOT NULL,
+                peak_viewers INT NOT NULL,
+                PRIMARY KEY (stream_id, bucket_offset)
+            )
+            """, False),
+            ("""
+            CREATE TABLE IF NOT EXISTS stream_segments (
+                stream_id VARCHAR(32) NOT NULL,
+                offset_seconds INT NOT NULL,
+                game VARCHAR(128) NOT NULL DEFAULT '',
+                title VARCHAR(255) NOT NULL DEFAULT '',
+                PRIMARY KEY (stream_id, offset_seconds)
+            )
+            """, False),
+        ]
+        tolerated = (sqlite3.Error,) if self.backend == "sqlite" else (pymysql.MySQLError,)
+        await self.pool.run(self._execute_script, statements, tolerated)
+
+    # Streamer
+
+    async def get_all_streamers(self) -> list:
+        """Liest alle Streamer samt Metadaten."""
+        rows = await self.fetchall("SELECT twitch_username, added_by, added_at FROM streamers")
+        return [StreamerEntry(name=row[0], added_by=row[1], added_at=row[2]) for row in rows]
+
+    async def add_streamer(self, entry: StreamerEntry):
+        """Speichert einen Streamer. Wirft ValueError, wenn er bereits existiert."""
+        existing = await self.fetchone("SELECT 1 FROM streamers WHERE twitch_username = %s", (entry.name,))
+        if existing:
+            raise ValueError(f"Streamer **{entry.name}** wird bereits überwacht.")
+        await self.execute(
+            "INSERT INTO streamers (twitch_username, added_by, added_at) VALUES (%s, %s, %s)",
+            (entry.name, entry.added_by, entry.added_at)
+        )
+
+    async def remove_streamer(self, streamer_name: str):
+        await self.execute("DELETE FROM streamers WHERE twitch_username = %s", (streamer_name,))
+
+    # Benachrichtigungskanäle
+
+    async def get_notification_channel(self) -> Optional[int]:
+        """Liest die alte, globale Benachrichtigungskanal-ID."""
+        result = await self.fetchone("SELECT channel_id FROM notification_channel LIMIT 1")
+        return result[0] if result else None
+
+    async def get_notification_routes(self) -> list:
+        """Liest alle Kanäle als Tupel (guild_id, streamer_name, channel_id); '' steht für alle Streamer."""
+        return await self.fetchall("SELECT guild_id, streamer_name, channel_id FROM notification_channels")
+
+    async def save_notification_route(self, guild_id: int, channel_id: int, streamer_name: Optional[str] = None):
+        await self.execute(
+            self._upsert("notification_channels", ("guild_id", "streamer_name", "channel_id"),
+                         ("guild_id", "streamer_name")),
+            (guild_id, (streamer_name or "").lower(), channel_id)
+        )
+
+    async def delete_notification_route(self, guild_id: int, streamer_name: Optional[str] = None):
+        await self.execute(
+            "DELETE FROM notification_channels WHERE guild_id = %s AND streamer_name = %s",
+            (guild_id, (streamer_name or "").lower())
+        )
+
+    # Gesendete Nachrichten
+
+    async def save_message(self, streamer_name: str, message_id: int, channel_id: int):
+        await self.execute(
+            self._upsert("sent_notifications", ("streamer_name", "message_id", "channel_id"), ("streamer_name",)),
+            (streamer_name, message_id, channel_id)
+        )
+
+    async def get_message(self, streamer_name: str) -> Optional[tuple]:
+        return await self.fetchone(
+            "SELECT message_id, channel_id FROM sent_notifications WHERE streamer_name = %s LIMIT 1",
+            (streamer_name,)
+        )
+
+    async def remove_message(self, streamer_name: str):
+        await self.execute("DELETE FROM sent_notifications WHERE streamer_name = %s", (streamer_name,))
+
+    # Zuschauerstatistiken
+
+    @staticmethod
+    def _execute_batches(connection, batches: list):
+        """Schreibt mehrere `executemany`-Stapel in einer einzigen Transaktion."""
+        cursor = connection.cursor()
+        try:
+            for query, rows in batches:
+                if rows:
+                    cursor.executemany(query, rows)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    async def save_viewer_stats(self, streams: list, buckets: list, segments: list):
+        """Schreibt Stream-Zusammenfassungen, verdichtete Zuschauer-Buckets und Spiel-Segmente gebündelt."""
+        batches = [
+            (self._upsert("streams", ("stream_id", "streamer_name", "started_at", "ended_at", "peak_viewers",
+                                      "viewer_sum", "sample_count", "title"), ("stream_id",)), streams),
+            (self._upsert("stream_viewer_buckets", ("stream_id", "bucket_offset", "avg_viewers", "peak_viewers"),
+                          ("stream_id", "bucket_offset")), buckets),
+            (self._upsert("stream_segments", ("stream_id", "offset_seconds", "game", "title"),
+                          ("stream_id", "offset_seconds")), segments),
+        ]
+        await self.pool.run(self._execute_batches, batches)
+
+    async def get_stream_totals(self, stream_id: str) -> Optional[tuple]:
+        """
+        Gespeicherter Stand eines Streams, um seine Statistik nach einem Neustart fortzuführen.
+
+        :return: (Spitze, Zuschauersumme, Anzahl Werte, Offset, Spiel, Titel des letzten Segments) oder None.
+        """
+        totals = await self.fetchone(
+            "SELECT peak_viewers, viewer_sum, sample_count FROM streams WHERE stream_id = %s", (stream_id,)
+        )
+        if totals is None:
+            return None
+        segment = await self.fetchone(
+            "SELECT offset_seconds, game, title FROM stream_segments WHERE stream_id = %s "
+            "ORDER BY offset_seconds DESC LIMIT 1",
+            (stream_id,)
+        )
+        return tuple(totals) + (tuple(segment) if segment else (None, None, None))
+
+    async def get_recent_streams(self, streamer_name: str, limit: int = 5) -> list:
+        """
+        Liest die letzten Streams eines Streamers samt Spiel-Segmenten.
+
+        :return: Liste von Dictionaries, neuester Stream zuerst.
+        """
+        rows = await self.fetchall(
+            """
+            SELECT stream_id, started_at, ended_at, peak_viewers, viewer_sum, sample_count, title
+            FROM streams WHERE streamer_name = %s ORDER BY started_at DESC LIMIT %s
+            """,
+            (streamer_name, limit)
+        )
+        streams = [
+            {"stream_id": row[0], "started_at": row[1], "ended_at": row[2], "peak": row[3],
+             "average": row[4] / row[5] if row[5] else 0, "title": row[6], "segments": []}
+            for row in rows
+        ]
+        if streams:
+            placeholders = ", ".join(["%s"] * len(streams))
+            segment_rows = await self.fetchall(
+                f"SELECT stream_id, offset_seconds, game FROM stream_segments WHERE stream_id IN ({placeholders}) "
+                f"ORDER BY stream_id, offset_seconds",
+                tuple(stream["stream_id"] for stream in streams)
+            )
+            by_id = {stream["stream_id"]: stream for stream in streams}
+            for stream_id, offset, game in segment_rows:
+                by_id[stream_id]["segments"].append((offset, game))
+        return streams
+
+    async def run(self, func, *args) -> Any:
+        """Führt eine eigene Funktion `func(connection, *args)` mit einer Pool-Verbindung aus."""
+        return await self.pool.run(func, *args)
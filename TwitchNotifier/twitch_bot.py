@@ -1,17 +1,33 @@
+import asyncio
 import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
-from TwitchNotifier.cogs.TwitchCommands import TwitchCommands
+from common.command_sync import sync_command_tree
+from common.logging_setup import setup_logging
+from common.http import acquire_http_client, release_http_client
+from common.metrics import LOOP_DURATION, instrument_bot
+from common.outbound import OutboundScheduler
+from TwitchNotifier.cogs.TwitchCommands import TwitchCommands, HELIX_BATCH_SIZE
+from TwitchNotifier.db import TwitchDatabase
+from TwitchNotifier.utils.registry import StreamerRegistry
+from TwitchNotifier.utils.routing import NotificationRouter
+from TwitchNotifier.utils.scheduler import StreamerScheduler
+from TwitchNotifier.utils.viewer_stats import ViewerStats
 import os
-import aiohttp
 import logging
+import time
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Umgebungsvariablen laden
 load_dotenv()
 
+POLL_TICK_SECONDS = 30  # Takt, in dem fällige Streamer abgefragt werden
+# Globales Budget für die Helix-Anfragen der Abfrage (/streams und /users)
+HELIX_REQUESTS_PER_MINUTE = int(os.getenv("TWITCH_HELIX_BUDGET", "30"))
+NOTIFY_CONCURRENCY = int(os.getenv("TWITCH_NOTIFY_CONCURRENCY", "8"))  # Gleichzeitige Discord-Aufrufe beim Fan-out
+STATS_FLUSH_SECONDS = 300  # Zuschauerstatistiken werden gesammelt in diesem Abstand gespeichert
+
 class TwitchBot(commands.Bot):
     def __init__(self, token):
         intents = discord.Intents.default()
@@ -21,129 +37,264 @@ class TwitchBot(commands.Bot):
 
         super().__init__(command_prefix="/", intents=intents)
         self.token = token
-        self.streamers = []  # Liste der zu überwachenden Streamer
-        self.session = None  # HTTP-Session wird in `setup_hook` initialisiert
-        self.sent_messages = {}  # Gesendete Nachrichten pro Streamer
+        self.streamers = StreamerRegistry()  # Überwachte Streamer (Write-through in die Datenbank)
+        self.http_client = acquire_http_client()  # Gemeinsamer HTTP-Connector des Prozesses
+        instrument_bot(self, "twitch")
+        self.db = TwitchDatabase.from_env()  # Verbindungen werden erst bei Bedarf aufgebaut
+        self.sent_messages = {}  # Gesendete Nachrichten pro Streamer und Kanal
+        self.notification_router = NotificationRouter()
+        self.outbound = OutboundScheduler("twitch", concurrency=NOTIFY_CONCURRENCY)  # Discord-REST-Aufrufe
+        self.viewer_stats = ViewerStats()
+        self.last_stats_flush = time.monotonic()
+        self.scheduler = StreamerScheduler(
+            live_interval=int(os.getenv("TWITCH_POLL_LIVE_SECONDS", "60")),
+            default_interval=int(os.getenv("TWITCH_POLL_DEFAULT_SECONDS", "300")),
+            dormant_interval=int(os.getenv("TWITCH_POLL_DORMANT_SECONDS", "1800"))
+        )
+        self.streamers.add_listener(self.scheduler)  # Neue/entfernte Streamer wirken im nächsten Tick
+        self.helix_overdraft = 0  # Anfragen über dem Budget des letzten Ticks, gehen vom nächsten ab
 
     async def setup_hook(self):
         """Setup für den Bot."""
-        print("Twitch Bot wird initialisiert...")
+        logger.info("Twitch Bot wird initialisiert...")
 
-        # HTTP-Session initialisieren
-        self.session = aiohttp.ClientSession()
+        # Fehlende Tabellen anlegen
+        await self.db.initialize()
 
         # Cogs hinzufügen
         await self.add_cog(TwitchCommands(self))
 
-        # Slash-Commands synchronisieren
-        synced = await self.tree.sync()
-        print(f"Slash-Commands wurden synchronisiert: {len(synced)} von {len(self.tree.get_commands())} Commands.")
-        for command in synced:
-            print(f" - {command.name}: {command.description}")
+        # Slash-Commands synchronisieren (nur bei Änderungen)
+        try:
+            await sync_command_tree(self, "twitch")
+        except Exception as e:
+            logger.error("Fehler beim Synchronisieren der Slash-Commands: %s", e)
 
-        # Streamer aus der Datenbank laden
+        # Streamer und Benachrichtigungskanäle aus der Datenbank laden
         await self.load_streamers_from_db()
+        await self.load_notification_routes()
 
         # Hintergrundtask starten
         self.check_twitch_streams.start()
 
     async def on_ready(self):
         """Event: Bot ist bereit."""
-        print(f"{self.user} ist bereit und eingeloggt!")
+        logger.info("%s ist bereit und eingeloggt!", self.user)
 
     async def load_streamers_from_db(self):
-        """Lädt die Streamer aus der Datenbank in die Liste."""
+        """Lädt die Streamer aus der Datenbank in das Verzeichnis."""
         cog = self.get_cog("TwitchCommands")
         if not cog:
             logger.error("Cog TwitchCommands nicht gefunden.")
             return
 
-        # Alle Streamer aus der Datenbank abrufen
-        self.streamers = cog.get_all_streamers()
-        print(f"Geladene Streamer: {self.streamers}")
+        # Alle Streamer aus der Datenbank abrufen; spätere Änderungen schreibt das Verzeichnis selbst zurück
+        self.streamers.writer = cog.add_streamer_to_db
+        self.streamers.deleter = cog.remove_streamer_from_db
+        self.streamers.load(await cog.get_all_streamers())
+        logger.info("%s Streamer geladen.", len(self.streamers))
+
+    async def load_notification_routes(self):
+        """Lädt die Benachrichtigungskanäle aller Guilds in den Speicher."""
+        cog = self.get_cog("TwitchCommands")
+        if not cog:
+            logger.error("Cog TwitchCommands nicht gefunden.")
+            return
+
+        routes = await cog.get_notification_routes()
+        try:
+            fallback_channel_id = await cog.get_notification_channel()
+        except Exception:
+            fallback_channel_id = None
+        self.notification_router.load(routes, fallback_channel_id)
+        logger.info("%s Benachrichtigungskanäle geladen.", len(routes))
 
     async def close(self):
-        """Schließt den Bot und die HTTP-Session."""
-        if self.session:
-            await self.session.close()
+        """Schließt den Bot, gibt den HTTP-Client frei und schließt den Datenbank-Pool."""
+        for streamer in list(self.viewer_stats.sessions):
+            self.viewer_stats.end(streamer)
+        await self.flush_viewer_stats()
+        await self.db.close()
+        await self.outbound.close()
         await super().close()
+        await release_http_client()
 
-    @tasks.loop(minutes=5)
+    @tasks.loop(seconds=POLL_TICK_SECONDS)
     async def check_twitch_streams(self):
-        """Überprüft alle 5 Minuten den Streaming-Status der Streamer."""
-        print("Überprüfe Twitch-Streamer...")
+        """Fragt die fälligen Streamer gebündelt ab – Häufigkeit pro Streamer bestimmt der Scheduler."""
+        with LOOP_DURATION.time(loop="check_twitch_streams"):
+            await self.poll_due_streamers()
+
+    async def poll_due_streamers(self):
+        """Ein Durchlauf von `check_twitch_streams`."""
         cog = self.get_cog("TwitchCommands")
         if not cog:
             logger.error("Cog TwitchCommands nicht gefunden. Breche Überprüfung ab.")
             return
 
-        for streamer in self.streamers:
-            print(f"Prüfe Streamer: {streamer}")
-            try:
-                live_status = await cog.is_streamer_live(streamer)
-                print(f"Live-Status für {streamer}: {live_status}")
-
-                if live_status:
-                    stream_info = await cog.get_stream_info(streamer)
-                    if stream_info:
-                        print(f"Stream Info für {streamer}: {stream_info}")
-                        # Nachricht senden oder aktualisieren
-                        await self.send_or_update_notification(cog, streamer, stream_info)
-                    else:
-                        logger.error(f"Keine Stream-Informationen für {streamer} verfügbar.")
-                else:
-                    # Nachricht entfernen, wenn der Streamer offline geht
-                    await self.remove_notification(cog, streamer)
-            except Exception as e:
-                logger.error(f"Fehler beim Überprüfen des Streamers {streamer}: {e}")
+        request_budget = max(1, HELIX_REQUESTS_PER_MINUTE * POLL_TICK_SECONDS // 60) - self.helix_overdraft
+        if request_budget <= 0:
+            self.helix_overdraft = -request_budget
+            return
+        self.helix_overdraft = 0
+        due = self.scheduler.pop_due(request_budget * HELIX_BATCH_SIZE)
+        if not due:
+            return
+
+        live_count = 0
+        requests = 0  # Helix-Anfragen dieses Ticks, /streams und /users
+        handled = 0  # Streamer aus `due`, die verbucht oder zurückgestellt wurden
+        try:
+            for offset in range(0, len(due), HELIX_BATCH_SIZE):
+                if requests >= request_budget:
+                    break  # Budget aufgebraucht, den Rest stellt `finally` zurück
+                batch = due[offset:offset + HELIX_BATCH_SIZE]
+                try:
+                    requests += 1
+                    live_streams = await cog.get_live_streams(batch)
+                    live_names = ([streamer for streamer in batch if streamer.lower() in live_streams]
+                                  if live_streams is not None else [])
+                    if cog.needs_user_lookup(live_names):
+                        # Höchstens eine Anfrage pro Batch; reicht das Budget nicht, zahlt der nächste Tick
+                        requests += 1
+                    user_infos = await cog.get_user_infos(live_names) if live_names else {}
+                except Exception as e:
+                    logger.error("Fehler beim Abrufen der Stream-Daten: %s", e)
+                    live_streams = None
+                if live_streams is None:
+                    # Im nächsten Tick erneut versuchen, ohne die Historie zu verfälschen
+                    for streamer in batch:
+                        self.scheduler.defer(streamer, POLL_TICK_SECONDS)
+                    handled += len(batch)
+                    continue
+
+                live_count += len(live_names)
+                await asyncio.gather(*(
+                    self.handle_stream_status(cog, streamer, live_streams.get(streamer.lower()),
+                                              user_infos.get(streamer.lower()))
+                    for streamer in batch
+                ))
+                handled += len(batch)
+        finally:
+            self.helix_overdraft = max(0, requests - request_budget)
+            # Vom Heap genommene, aber nicht verbuchte Streamer dürfen nicht aus der Abfrage herausfallen
+            for streamer in due[handled:]:
+                self.scheduler.defer(streamer, POLL_TICK_SECONDS)
+
+        logger.info("%s Streamer geprüft, %s live, %s Helix-Anfragen, %s überfällig von %s.",
+                    handled, live_count, requests, self.scheduler.backlog(), len(self.scheduler))
+
+        if time.monotonic() - self.last_stats_flush >= STATS_FLUSH_SECONDS:
+            await self.flush_viewer_stats()
+
+    async def flush_viewer_stats(self):
+        """Speichert die gesammelten Zuschauerstatistiken in einer Transaktion."""
+        self.last_stats_flush = time.monotonic()
+        if not self.viewer_stats.has_pending():
+            return
+        streams, buckets, segments = self.viewer_stats.drain()
+        try:
+            await self.db.save_viewer_stats(streams, buckets, segments)
+        except Exception as e:
+            logger.error("Fehler beim Speichern der Zuschauerstatistiken: %s", e)
+            self.viewer_stats.restore(streams, buckets, segments)
+
+    async def handle_stream_status(self, cog, streamer, stream, user):
+        """Verbucht das Abfrageergebnis eines Streamers und sendet bzw. entfernt seine Benachrichtigungen."""
+        if streamer not in self.streamers:
+            return  # Während der Abfrage entfernt
+        self.scheduler.record(streamer, stream is not None)
+        if stream:
+            resume = None
+            if self.viewer_stats.is_new(streamer, stream["id"]):
+                # Nach einem Neustart läuft der Stream weiter: gespeicherte Werte nicht überschreiben
+                try:
+                    resume = await self.db.get_stream_totals(stream["id"])
+                except Exception as e:
+                    logger.warning("Zuschauerstatistik von %s konnte nicht geladen werden: %s", streamer, e)
+            self.viewer_stats.record(streamer, stream, resume=resume)
+        else:
+            self.viewer_stats.end(streamer)
+        try:
+            if stream:
+                if not user:
+                    logger.error("Keine Stream-Informationen für %s verfügbar.", streamer)
+                    return
+                # Nachricht senden oder aktualisieren
+                await self.send_or_update_notification(cog, streamer, cog.build_stream_info(streamer, stream, user))
+            else:
+                # Nachricht entfernen, wenn der Streamer offline geht
+                await self.remove_notification(cog, streamer)
+        except Exception as e:
+            logger.error("Fehler beim Überprüfen des Streamers %s: %s", streamer, e)
 
     async def send_or_update_notification(self, cog, streamer, stream_info):
-        """Sendet oder aktualisiert die Benachrichtigung für einen Streamer."""
-        channel_id = cog.get_notification_channel()
-        if not channel_id:
+        """Sendet oder aktualisiert die Benachrichtigung eines Streamers in allen zugeordneten Kanälen."""
+        channel_ids = self.notification_router.channels_for(streamer)
+        if not channel_ids:
             logger.error("Kein Benachrichtigungskanal gesetzt.")
             return
 
-        channel = self.get_channel(channel_id)
-        if not channel:
-            logger.error(f"Kanal mit ID {channel_id} nicht gefunden oder keine Berechtigung.")
-            return
+        embed = cog.build_embed(stream_info)
+        view = cog.build_view(stream_info)
+        await asyncio.gather(*(
+            self.deliver_notification(streamer, channel_id, embed, view) for channel_id in channel_ids
+        ))
 
-        if streamer in self.sent_messages:
+    async def deliver_notification(self, streamer, channel_id, embed, view):
+        """Sendet oder aktualisiert die Benachrichtigung eines Streamers in einem Kanal."""
+        messages = self.sent_messages.setdefault(streamer, {})
+        if channel_id in messages:
             # Nachricht aktualisieren
-            message = self.sent_messages[streamer]
-            try:
-                await message.edit(embed=cog.build_embed(stream_info))
-                logger.info(f"Nachricht für {streamer} aktualisiert.")
-            except Exception as e:
-                logger.error(f"Fehler beim Aktualisieren der Nachricht für {streamer}: {e}")
-        else:
-            # Neue Nachricht senden
             try:
-                message = await channel.send(embed=cog.build_embed(stream_info), view=cog.build_view(stream_info))
-                self.sent_messages[streamer] = message
-                logger.info(f"Nachricht für {streamer} gesendet.")
+                await self.outbound.edit(messages[channel_id], embed=embed)
+                logger.debug("Nachricht für %s in Kanal %s aktualisiert.", streamer, channel_id)
+            except discord.NotFound:
+                messages.pop(channel_id, None)
             except Exception as e:
-                logger.error(f"Fehler beim Senden der Nachricht für {streamer}: {e}")
+                logger.error("Fehler beim Aktualisieren der Nachricht für %s: %s", streamer, e)
+                return
+            else:
+                return
+
+        channel = self.get_channel(channel_id)
+        if not channel:
+            logger.error("Kanal mit ID %s nicht gefunden oder keine Berechtigung.", channel_id)
+            return
+
+        # Neue Nachricht senden
+        try:
+            messages[channel_id] = await self.outbound.send(channel, embed=embed, view=view)
+            logger.debug("Nachricht für %s in Kanal %s gesendet.", streamer, channel_id)
+        except Exception as e:
+            logger.error("Fehler beim Senden der Nachricht für %s: %s", streamer, e)
 
     async def remove_notification(self, cog, streamer):
-        """Entfernt eine Benachrichtigung, wenn der Streamer offline geht."""
-        if streamer in self.sent_messages:
+        """Entfernt alle Benachrichtigungen, wenn der Streamer offline geht."""
+        messages = self.sent_messages.pop(streamer, None)
+        if not messages:
+            return
+
+        async def delete(message):
             try:
-                message = self.sent_messages.pop(streamer)
-                await message.delete()
-                logger.info(f"Nachricht für {streamer} entfernt.")
+                await self.outbound.delete(message)
+            except discord.NotFound:
+                pass
             except Exception as e:
-                logger.error(f"Fehler beim Entfernen der Nachricht für {streamer}: {e}")
+                logger.error("Fehler beim Entfernen der Nachricht für %s: %s", streamer, e)
+
+        await asyncio.gather(*(delete(message) for message in messages.values()))
+        logger.debug("Nachrichten für %s entfernt.", streamer)
 
     def start_bot(self):
-        """Bot starten."""
-        self.run(self.token)
+        """Bot starten. Das Logging richtet `setup_logging` ein, nicht discord.py."""
+        self.run(self.token, log_handler=None)
 
 # Falls diese Datei direkt ausgeführt wird
 if __name__ == "__main__":
     token = os.getenv("DISCORD_TOKEN_TWITCH")
     if not token:
         raise ValueError("Kein Token für den Twitch Bot gefunden!")
+    setup_logging("twitch_bot")
     bot = TwitchBot(token)
     bot.start_bot()
@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+
+@dataclass
+class StreamerEntry:
+    """Ein überwachter Streamer samt Metadaten."""
+    name: str
+    added_by: Optional[int] = None
+    added_at: Optional[datetime] = None
+    display_name: Optional[str] = None
+    twitch_id: Optional[str] = None
+
+
+@dataclass
+class StreamerRegistry:
+    """
+    In-Memory-Verzeichnis der überwachten Streamer.
+
+    Änderungen werden zuerst in die Datenbank geschrieben (`writer` / `deleter`) und erst danach
+    im Speicher übernommen. Listener (z. B. der Scheduler) werden sofort benachrichtigt, sodass eine
+    Änderung ohne weitere Abfragen im nächsten Prüfzyklus wirkt.
+    """
+    writer: Optional[Callable[[StreamerEntry], Awaitable[None]]] = None
+    deleter: Optional[Callable[[str], Awaitable[None]]] = None
+    entries: dict = field(default_factory=dict)
+    listeners: list = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def get(self, name: str) -> Optional[StreamerEntry]:
+        return self.entries.get(name.lower())
+
+    def names(self) -> list[str]:
+        return sorted(self.entries)
+
+    def add_listener(self, listener):
+        """Registriert ein Objekt mit `add(name)` und `remove(name)` und gleicht es sofort ab."""
+        self.listeners.append(listener)
+        for name in self.entries:
+            listener.add(name)
+
+    def load(self, entries: Iterable[StreamerEntry]):
+        """Ersetzt den Inhalt durch die Einträge aus der Datenbank (ohne Rückschreiben)."""
+        loaded = {entry.name.lower(): entry for entry in entries}
+        for name in set(self.entries) - set(loaded):
+            self._notify("remove", name)
+        added = set(loaded) - set(self.entries)
+        self.entries = loaded
+        for name in added:
+            self._notify("add", name)
+
+    async def add(self, entry: StreamerEntry) -> bool:
+        """Fügt einen Streamer hinzu. Gibt False zurück, wenn er bereits überwacht wird."""
+        entry.name = entry.name.lower()
+        if entry.name in self.entries:
+            return False
+        if entry.added_at is None:
+            entry.added_at = datetime.utcnow()
+        if self.writer:
+            await self.writer(entry)
+        self.entries[entry.name] = entry
+        self._notify("add", entry.name)
+        return True
+
+    async def remove(self, name: str) -> bool:
+        """Entfernt einen Streamer. Gibt False zurück, wenn er nicht überwacht wurde."""
+        name = name.lower()
+        if name not in self.entries:
+            return False
+        if self.deleter:
+            await self.deleter(name)
+        del self.entries[name]
+        self._notify("remove", name)
+        return True
+
+    def _notify(self, action: str, name: str):
+        for listener in self.listeners:
+            getattr(listener, action)(name)
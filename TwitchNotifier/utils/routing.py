@@ -0,0 +1,61 @@
+from typing import Iterable, Optional
+
+
+class NotificationRouter:
+    """
+    Hält die Benachrichtigungskanäle im Speicher.
+
+    Pro Guild gibt es einen Standardkanal für alle Streamer; zusätzlich kann pro Guild und Streamer
+    ein eigener Kanal gesetzt werden, der den Standardkanal dieser Guild ersetzt.
+    """
+
+    def __init__(self):
+        self.guild_channels: dict[int, int] = {}
+        self.streamer_channels: dict[str, dict[int, int]] = {}
+        self.fallback_channel_id: Optional[int] = None  # Alter, globaler Kanal aus `notification_channel`
+
+    def load(self, routes: Iterable[tuple], fallback_channel_id: Optional[int] = None):
+        """
+        Ersetzt alle Routen.
+
+        :param routes: Tupel (guild_id, streamer_name, channel_id); ein leerer Streamername steht für alle Streamer.
+        :param fallback_channel_id: Kanal, der nur genutzt wird, solange keine Guild-Routen existieren.
+        """
+        self.guild_channels.clear()
+        self.streamer_channels.clear()
+        for guild_id, streamer_name, channel_id in routes:
+            self.set_route(int(guild_id), int(channel_id), streamer_name or None)
+        self.fallback_channel_id = fallback_channel_id
+
+    def set_route(self, guild_id: int, channel_id: int, streamer_name: Optional[str] = None):
+        """Setzt den Kanal einer Guild, optional nur für einen Streamer."""
+        if streamer_name:
+            self.streamer_channels.setdefault(streamer_name.lower(), {})[guild_id] = channel_id
+        else:
+            self.guild_channels[guild_id] = channel_id
+
+    def remove_route(self, guild_id: int, streamer_name: Optional[str] = None) -> bool:
+        """Entfernt eine Route. Gibt zurück, ob eine Route existierte."""
+        if streamer_name:
+            overrides = self.streamer_channels.get(streamer_name.lower(), {})
+            removed = overrides.pop(guild_id, None) is not None
+            if not overrides:
+                self.streamer_channels.pop(streamer_name.lower(), None)
+            return removed
+        return self.guild_channels.pop(guild_id, None) is not None
+
+    def channels_for(self, streamer_name: str) -> list[int]:
+        """Liefert alle Kanäle, in denen ein Streamer angekündigt wird (höchstens einer pro Guild)."""
+        targets = dict(self.guild_channels)
+        targets.update(self.streamer_channels.get(streamer_name.lower(), {}))
+        if not targets and self.fallback_channel_id:
+            return [self.fallback_channel_id]
+        return list(dict.fromkeys(targets.values()))
+
+    def channel_for_guild(self, guild_id: int, streamer_name: Optional[str] = None) -> Optional[int]:
+        """Liefert den Kanal, der in einer Guild für einen Streamer gilt."""
+        if streamer_name:
+            channel_id = self.streamer_channels.get(streamer_name.lower(), {}).get(guild_id)
+            if channel_id:
+                return channel_id
+        return self.guild_channels.get(guild_id)
@@ -0,0 +1,156 @@
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Stunden pro Woche – Live-Historie wird pro Wochenstunde (Mo 00 Uhr = 0) gelernt
+HOURS_PER_WEEK = 168
+
+# Ab diesem Zähler werden die Slots halbiert, damit alte Gewohnheiten verblassen
+SLOT_DECAY_LIMIT = 64
+
+
+@dataclass
+class StreamerActivity:
+    """Gelernte Live-Historie eines Streamers."""
+    name: str
+    live_hits: list = field(default_factory=lambda: [0] * HOURS_PER_WEEK)
+    observations: list = field(default_factory=lambda: [0] * HOURS_PER_WEEK)
+    is_live: bool = False
+    last_live: Optional[float] = None
+    next_due: float = 0.0
+
+    def record(self, is_live: bool, now: float):
+        """Trägt eine Beobachtung in den Slot der aktuellen Wochenstunde ein."""
+        slot = hour_of_week(now)
+        self.observations[slot] += 1
+        if is_live:
+            self.live_hits[slot] += 1
+            self.last_live = now
+        self.is_live = is_live
+
+        if self.observations[slot] >= SLOT_DECAY_LIMIT:
+            self.observations[slot] //= 2
+            self.live_hits[slot] //= 2
+
+    def live_probability(self, now: float) -> float:
+        """Geschätzte Wahrscheinlichkeit, dass der Streamer in dieser (oder der nächsten) Stunde live ist."""
+        slot = hour_of_week(now)
+        best = 0.0
+        for candidate in (slot, (slot + 1) % HOURS_PER_WEEK):
+            if self.observations[candidate]:
+                best = max(best, self.live_hits[candidate] / self.observations[candidate])
+        return best
+
+
+def hour_of_week(timestamp: float) -> int:
+    """Liefert die Wochenstunde (0-167, UTC) für einen Unix-Zeitstempel."""
+    tm = time.gmtime(timestamp)
+    return tm.tm_wday * 24 + tm.tm_hour
+
+
+class StreamerScheduler:
+    """
+    Prioritätswarteschlange, die festlegt, welche Streamer als Nächstes abgefragt werden.
+
+    Live-Streamer und Streamer, die zur aktuellen Wochenstunde häufig live sind, werden oft
+    abgefragt, lange inaktive Streamer nur selten. Pro Tick wird höchstens so viel abgefragt,
+    wie das globale Helix-Budget erlaubt; was übrig bleibt, rückt im nächsten Tick nach vorne.
+    """
+
+    def __init__(self, live_interval: float = 60, likely_interval: float = 120,
+                 default_interval: float = 300, dormant_interval: float = 1800,
+                 dormant_after: float = 30 * 24 * 3600, likely_threshold: float = 0.3):
+        self.live_interval = live_interval
+        self.likely_interval = likely_interval
+        self.default_interval = default_interval
+        self.dormant_interval = dormant_interval
+        self.dormant_after = dormant_after
+        self.likely_threshold = likely_threshold
+        self.activity: dict[str, StreamerActivity] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.activity)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.activity
+
+    def add(self, name: str, now: Optional[float] = None):
+        """Nimmt einen Streamer auf; er wird sofort fällig."""
+        if name in self.activity:
+            return
+        now = time.time() if now is None else now
+        activity = StreamerActivity(name=name, next_due=now)
+        self.activity[name] = activity
+        heapq.heappush(self._heap, (now, name))
+
+    def remove(self, name: str):
+        """Entfernt einen Streamer. Veraltete Heap-Einträge werden beim Abholen verworfen."""
+        self.activity.pop(name, None)
+
+    def sync(self, names, now: Optional[float] = None):
+        """Gleicht die geplanten Streamer mit der übergebenen Menge ab."""
+        names = set(names)
+        for name in list(self.activity):
+            if name not in names:
+                self.remove(name)
+        for name in names:
+            self.add(name, now)
+
+    def interval_for(self, activity: StreamerActivity, now: float) -> float:
+        """Berechnet das nächste Abfrageintervall anhand der gelernten Historie."""
+        if activity.is_live:
+            return self.live_interval
+        if activity.live_probability(now) >= self.likely_threshold:
+            return self.likely_interval
+        if activity.last_live is None or now - activity.last_live > self.dormant_after:
+            # Noch nie live gesehen: erst nach genügend Beobachtungen als inaktiv einstufen
+            if activity.last_live is None and sum(activity.observations) < HOURS_PER_WEEK:
+                return self.default_interval
+            return self.dormant_interval
+        return self.default_interval
+
+    def pop_due(self, limit: int, now: Optional[float] = None) -> list[str]:
+        """Holt bis zu `limit` fällige Streamer, die am längsten warten, zuerst."""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and len(due) < limit:
+            next_due, name = self._heap[0]
+            activity = self.activity.get(name)
+            if activity is None or activity.next_due != next_due:
+                heapq.heappop(self._heap)  # veralteter Eintrag
+                continue
+            if next_due > now:
+                break
+            heapq.heappop(self._heap)
+            due.append(name)
+        return due
+
+    def record(self, name: str, is_live: bool, now: Optional[float] = None):
+        """Verbucht ein Abfrageergebnis und plant den Streamer neu ein."""
+        activity = self.activity.get(name)
+        if activity is None:
+            return
+        now = time.time() if now is None else now
+        activity.record(is_live, now)
+        activity.next_due = now + self.interval_for(activity, now)
+        heapq.heappush(self._heap, (activity.next_due, name))
+
+    def defer(self, name: str, delay: float, now: Optional[float] = None):
+        """Plant einen Streamer ohne Beobachtung neu ein, z. B. nach einem API-Fehler."""
+        activity = self.activity.get(name)
+        if activity is None:
+            return
+        now = time.time() if now is None else now
+        activity.next_due = now + delay
+        heapq.heappush(self._heap, (activity.next_due, name))
+
+    def is_live(self, name: str) -> bool:
+        activity = self.activity.get(name)
+        return bool(activity and activity.is_live)
+
+    def backlog(self, now: Optional[float] = None) -> int:
+        """Anzahl der Streamer, deren Abfrage überfällig ist."""
+        now = time.time() if now is None else now
+        return sum(1 for activity in self.activity.values() if activity.next_due <= now)
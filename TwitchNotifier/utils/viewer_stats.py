@@ -0,0 +1,200 @@
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+# Rohwerte im Speicher: bei einer Abfrage pro Minute reichen 720 Plätze für 12 Stunden
+RING_CAPACITY = 720
+
+# Für die Langzeitspeicherung werden Rohwerte zu Buckets dieser Länge zusammengefasst
+BUCKET_SECONDS = 300
+
+
+class ViewerRing:
+    """Ringpuffer fester Größe für (Sekunden seit Streamstart, Zuschauer) auf Basis von `array`."""
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self.offsets = array("I", bytes(4 * capacity))
+        self.viewers = array("I", bytes(4 * capacity))
+        self.count = 0  # Anzahl aller je geschriebenen Werte
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, offset: int, viewers: int):
+        index = self.count % self.capacity
+        self.offsets[index] = offset
+        self.viewers[index] = viewers
+        self.count += 1
+
+    def _newest_first(self):
+        for position in range(self.count - 1, self.count - 1 - len(self), -1):
+            index = position % self.capacity
+            yield self.offsets[index], self.viewers[index]
+
+    def samples(self, since: int = 0) -> list[tuple[int, int]]:
+        """Gepufferte Werte ab Offset `since` in zeitlicher Reihenfolge; liest nur den betroffenen Teil."""
+        recent = []
+        for offset, viewers in self._newest_first():
+            if offset < since:
+                break
+            recent.append((offset, viewers))
+        recent.reverse()
+        return recent
+
+    def recent(self, count: int) -> list[tuple[int, int]]:
+        """Die letzten `count` Werte in zeitlicher Reihenfolge."""
+        recent = [sample for _, sample in zip(range(count), self._newest_first())]
+        recent.reverse()
+        return recent
+
+
+@dataclass
+class StreamSession:
+    """Laufende Statistik eines einzelnen Streams."""
+    stream_id: str
+    streamer: str
+    started_at: int
+    title: str = ""
+    ended_at: Optional[int] = None
+    peak: int = 0
+    viewer_sum: int = 0
+    sample_count: int = 0
+    ring: ViewerRing = field(default_factory=ViewerRing)
+    segments: list = field(default_factory=list)  # (Offset, Spiel, Titel)
+    bucket_start: Optional[int] = None  # Beginn des offenen Buckets; seine Werte liegen im Ringpuffer
+
+    @property
+    def average(self) -> float:
+        return self.viewer_sum / self.sample_count if self.sample_count else 0.0
+
+    def duration(self, now: Optional[float] = None) -> int:
+        end = self.ended_at if self.ended_at is not None else int(now if now is not None else time.time())
+        return max(0, end - self.started_at)
+
+
+def parse_started_at(value: str) -> int:
+    """Wandelt Twitchs `started_at` (ISO 8601, UTC) in einen Unix-Zeitstempel."""
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+class ViewerStats:
+    """
+    Sammelt Zuschauerzahlen aller Live-Streams im Speicher.
+
+    Rohwerte landen in Ringpuffern; für die Datenbank werden sie zu Buckets (Durchschnitt, Spitze)
+    verdichtet und gesammelt über `drain()` abgeholt, damit pro Flush nur eine Transaktion nötig ist.
+    """
+
+    def __init__(self, bucket_seconds: int = BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.sessions: dict[str, StreamSession] = {}
+        self.pending_buckets: list[tuple] = []   # (stream_id, bucket_offset, avg, peak)
+        self.pending_segments: list[tuple] = []  # (stream_id, offset, game, title)
+        self.dirty: dict[str, StreamSession] = {}
+
+    def is_new(self, streamer: str, stream_id: str) -> bool:
+        """True, wenn für diesen Stream noch keine laufende Statistik im Speicher liegt."""
+        session = self.sessions.get(streamer)
+        return session is None or session.stream_id != stream_id
+
+    def record(self, streamer: str, stream: dict, now: Optional[float] = None, resume: Optional[tuple] = None):
+        """
+        Verbucht einen Helix-Stream-Datensatz (`id`, `viewer_count`, `game_name`, `title`, `started_at`).
+
+        :param resume: Gespeicherter Stand eines bereits bekannten Streams (z. B. nach einem Neustart) aus
+                       `TwitchDatabase.get_stream_totals`; die Statistik wird darauf fortgeführt statt neu begonnen.
+        """
+        now = int(now if now is not None else time.time())
+        session = self.sessions.get(streamer)
+        if session is None or session.stream_id != stream["id"]:
+            if session is not None:
+                self.end(streamer, now)
+            session = self.dirty.get(stream["id"])
+            if session is not None and session.ended_at is not None:
+                # Kurz offline gemeldeter Stream, dessen Abschluss noch nicht gespeichert ist
+                session.ended_at = None
+            else:
+                session = StreamSession(stream_id=stream["id"], streamer=streamer,
+                                        started_at=parse_started_at(stream["started_at"]))
+                if resume is not None:
+                    session.peak, session.viewer_sum, session.sample_count, *segment = resume
+                    if segment[0] is not None:
+                        session.segments.append(tuple(segment))
+            self.sessions[streamer] = session
+
+        offset = max(0, now - session.started_at)
+        viewers = int(stream.get("viewer_count", 0))
+        game = stream.get("game_name") or ""
+        title = stream.get("title") or ""
+
+        if not session.segments or session.segments[-1][1] != game:
+            segment = (offset, game, title)
+            session.segments.append(segment)
+            self.pending_segments.append((session.stream_id,) + segment)
+        session.title = title
+
+        bucket_start = offset - offset % self.bucket_seconds
+        if session.bucket_start is not None and bucket_start != session.bucket_start:
+            self._close_bucket(session)
+        session.bucket_start = bucket_start
+
+        session.ring.append(offset, viewers)
+        session.peak = max(session.peak, viewers)
+        session.viewer_sum += viewers
+        session.sample_count += 1
+        self.dirty[session.stream_id] = session
+
+    def end(self, streamer: str, now: Optional[float] = None) -> Optional[StreamSession]:
+        """Schließt den Stream eines Streamers ab, der offline gegangen ist."""
+        session = self.sessions.pop(streamer, None)
+        if session is None:
+            return None
+        session.ended_at = int(now if now is not None else time.time())
+        self._close_bucket(session)
+        self.dirty[session.stream_id] = session
+        return session
+
+    def _close_bucket(self, session: StreamSession):
+        """Verdichtet die Werte des offenen Buckets aus dem Ringpuffer zu Durchschnitt und Spitze."""
+        if session.bucket_start is not None:
+            viewers = [value for _, value in session.ring.samples(since=session.bucket_start)]
+            if viewers:
+                self.pending_buckets.append((session.stream_id, session.bucket_start,
+                                             round(sum(viewers) / len(viewers)), max(viewers)))
+        session.bucket_start = None
+
+    def has_pending(self) -> bool:
+        return bool(self.dirty or self.pending_buckets or self.pending_segments)
+
+    def drain(self) -> tuple[list, list, list]:
+        """
+        Holt alle seit dem letzten Flush angefallenen Daten ab.
+
+        :return: (Stream-Zeilen, Bucket-Zeilen, Segment-Zeilen) für die Datenbank.
+        """
+        streams = [
+            (s.stream_id, s.streamer, s.started_at, s.ended_at, s.peak, s.viewer_sum, s.sample_count, s.title[:255])
+            for s in self.dirty.values()
+        ]
+        buckets, segments = self.pending_buckets, [
+            (stream_id, offset, game[:128], title[:255]) for stream_id, offset, game, title in self.pending_segments
+        ]
+        self.dirty, self.pending_buckets, self.pending_segments = {}, [], []
+        return streams, buckets, segments
+
+    def restore(self, streams: list, buckets: list, segments: list):
+        """Gibt abgeholte Daten nach einem fehlgeschlagenen Flush zurück, damit nichts verloren geht."""
+        for row in streams:
+            session = next((s for s in self.sessions.values() if s.stream_id == row[0]), None)
+            if session is not None:
+                self.dirty.setdefault(row[0], session)
+            else:
+                # Bereits beendeter Stream: Zeile unverändert erneut schreiben
+                self.dirty.setdefault(row[0], StreamSession(
+                    stream_id=row[0], streamer=row[1], started_at=row[2], ended_at=row[3],
+                    peak=row[4], viewer_sum=row[5], sample_count=row[6], title=row[7]))
+        self.pending_buckets = buckets + self.pending_buckets
+        self.pending_segments = segments + self.pending_segments
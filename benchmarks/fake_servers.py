@@ -0,0 +1,198 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import unquote
+
+from aiohttp import web
+
+GAMES = ["Just Chatting", "Clash of Clans", "Minecraft", "Valorant", "League of Legends", "Fortnite"]
+
+
+def player_tag(index: int) -> str:
+    return f"#P{index:07d}"
+
+
+def clan_tag(index: int) -> str:
+    return f"#C{index:07d}"
+
+
+def coc_timestamp(moment: datetime) -> str:
+    """Zeitformat der Clash of Clans API, z. B. `20250101T120000.000Z`."""
+    return moment.strftime("%Y%m%dT%H%M%S.000Z")
+
+
+def build_member(index: int, rng: random.Random, with_attacks: bool = True) -> dict:
+    attacks = []
+    if with_attacks:
+        for order in range(rng.randint(0, 2)):
+            attacks.append({
+                "attackerTag": player_tag(index),
+                "defenderTag": f"#O{rng.randint(0, 49):07d}",
+                "stars": rng.randint(0, 3),
+                "destructionPercentage": rng.randint(30, 100),
+                "order": index * 2 + order,
+                "duration": rng.randint(60, 180),
+            })
+    return {
+        "tag": player_tag(index),
+        "name": f"Spieler {index}",
+        "townhallLevel": rng.randint(9, 17),
+        "mapPosition": index + 1,
+        "attacks": attacks,
+        "opponentAttacks": rng.randint(0, 3),
+        "stars": sum(attack["stars"] for attack in attacks),
+    }
+
+
+def build_war(tag: str, size: int, rng: random.Random) -> dict:
+    """Ein laufender Krieg `size` gegen `size` mit zufälligen Angriffen."""
+    now = datetime.now(timezone.utc)
+    clan_members = [build_member(i, rng) for i in range(size)]
+    opponent_members = [dict(build_member(i, rng), tag=f"#O{i:07d}", name=f"Gegner {i}") for i in range(size)]
+    return {
+        "state": "inWar",
+        "teamSize": size,
+        "attacksPerMember": 2,
+        "preparationStartTime": coc_timestamp(now - timedelta(hours=30)),
+        "startTime": coc_timestamp(now - timedelta(hours=6)),
+        "endTime": coc_timestamp(now + timedelta(hours=18)),
+        "clan": {"tag": tag, "name": "Benchmark-Clan", "members": clan_members,
+                 "stars": sum(m["stars"] for m in clan_members),
+                 "attacks": sum(len(m["attacks"]) for m in clan_members)},
+        "opponent": {"tag": "#OPPONENT", "name": "Gegner-Clan", "members": opponent_members,
+                     "stars": sum(m["stars"] for m in opponent_members),
+                     "attacks": sum(len(m["attacks"]) for m in opponent_members)},
+    }
+
+
+def build_league_group(tag: str, rng: random.Random) -> dict:
+    """CWL-Gruppe mit acht Clans à 30 Spielern und sieben Runden."""
+    clans = [{"tag": tag if i == 0 else clan_tag(i), "name": f"CWL-Clan {i}",
+              "members": [{"tag": player_tag(i * 100 + j), "name": f"Spieler {i * 100 + j}",
+                           "townhallLevel": rng.randint(9, 17)} for j in range(30)]}
+             for i in range(8)]
+    rounds = [{"warTags": [f"#W{r}{w:06d}" for w in range(4)]} for r in range(7)]
+    return {"state": "inWar", "season": datetime.now(timezone.utc).strftime("%Y-%m"), "clans": clans, "rounds": rounds}
+
+
+class FakeCocApi:
+    """Lokaler Ersatz für die Clash of Clans API mit realistischen Antwortgrößen."""
+
+    def __init__(self, members: int = 50, war_size: int = 50, latency: float = 0.0, seed: int = 1):
+        self.members = members
+        self.war_size = war_size
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.requests = Counter()  # Route -> Anzahl Anfragen
+        self.wars = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/clans/{tag}", self.clan)
+        app.router.add_get("/v1/clans/{tag}/currentwar", self.current_war)
+        app.router.add_get("/v1/clans/{tag}/currentwarleaguegroup", self.league_group)
+        app.router.add_get("/v1/players/{tag}", self.player)
+        return app
+
+    async def respond(self, route: str, payload: dict) -> web.Response:
+        self.requests[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(payload)
+
+    async def clan(self, request: web.Request) -> web.Response:
+        tag = unquote(request.match_info["tag"])
+        # Die letzten Plätze sind neue Spieler: so entfernt der Verifizierungslauf regelmäßig Rollen
+        member_list = [{"tag": player_tag(i), "name": f"Spieler {i}", "role": "member", "trophies": 5000 - i}
+                       for i in range(self.members)]
+        return await self.respond("clan", {"tag": tag, "name": "Benchmark-Clan", "members": len(member_list),
+                                           "memberList": member_list})
+
+    async def current_war(self, request: web.Request) -> web.Response:
+        tag = unquote(request.match_info["tag"])
+        war = self.wars.get(tag)
+        if war is None:
+            war = self.wars[tag] = build_war(tag, self.war_size, self.rng)
+        return await self.respond("currentwar", war)
+
+    async def league_group(self, request: web.Request) -> web.Response:
+        return await self.respond("currentwarleaguegroup",
+                                  build_league_group(unquote(request.match_info["tag"]), self.rng))
+
+    async def player(self, request: web.Request) -> web.Response:
+        tag = unquote(request.match_info["tag"])
+        index = int(tag.lstrip("#P") or 0)
+        return await self.respond("player", {"tag": tag, "name": f"Spieler {index}", "townhallLevel": 16,
+                                             "clan": {"tag": "#BENCH", "name": "Benchmark-Clan"}})
+
+
+class FakeTwitchApi:
+    """Lokaler Ersatz für Twitch OAuth und Helix (`/streams`, `/users`)."""
+
+    def __init__(self, streamers: int = 500, live_ratio: float = 0.2, latency: float = 0.0, seed: int = 1):
+        self.streamers = [f"streamer{i:04d}" for i in range(streamers)]
+        self.live_ratio = live_ratio
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.requests = Counter()
+        self.started = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/oauth2/token", self.token)
+        app.router.add_get("/helix/streams", self.streams)
+        app.router.add_get("/helix/users", self.users)
+        return app
+
+    async def respond(self, route: str, payload: dict) -> web.Response:
+        self.requests[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(payload)
+
+    async def token(self, request: web.Request) -> web.Response:
+        return await self.respond("token", {"access_token": "benchmark", "expires_in": 3600})
+
+    def stream(self, login: str) -> dict:
+        started = self.started.setdefault(
+            login, datetime.now(timezone.utc) - timedelta(minutes=self.rng.randint(1, 300)))
+        return {
+            "id": f"{login}-{int(started.timestamp())}",
+            "user_login": login,
+            "user_name": login.capitalize(),
+            "game_name": self.rng.choice(GAMES),
+            "title": f"Benchmark-Stream von {login}",
+            "viewer_count": self.rng.randint(0, 20000),
+            "started_at": started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "thumbnail_url": f"https://static-cdn.jtvnw.net/previews-ttv/live_user_{login}-{{width}}x{{height}}.jpg",
+        }
+
+    async def streams(self, request: web.Request) -> web.Response:
+        logins = request.query.getall("user_login", [])
+        # Jeder Abruf würfelt neu: Streamer gehen live, bleiben live oder gehen offline
+        live = []
+        for login in logins:
+            if self.rng.random() < self.live_ratio:
+                live.append(self.stream(login))
+            else:
+                self.started.pop(login, None)
+        return await self.respond("streams", {"data": live, "pagination": {}})
+
+    async def users(self, request: web.Request) -> web.Response:
+        logins = request.query.getall("login", [])
+        return await self.respond("users", {"data": [
+            {"id": str(abs(hash(login)) % 10 ** 9), "login": login, "display_name": login.capitalize(),
+             "profile_image_url": f"https://static-cdn.jtvnw.net/user-default-pictures/{login}.png"}
+            for login in logins
+        ]})
+
+
+async def start_server(app: web.Application, host: str = "127.0.0.1") -> tuple[web.AppRunner, str]:
+    """Startet eine App auf einem freien Port und liefert Runner und Basis-URL."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
@@ -0,0 +1,349 @@
+"""
+Offline-Benchmarks der Bot-Hintergrundarbeit.
+
+Startet lokale Ersatzserver für die Clash of Clans API und Twitch (Helix + OAuth), ersetzt Discord durch
+Stubs mit fester Latenz und treibt die echten Code-Pfade an:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenario twitch --streamers 1000 --iterations 50 --json bench.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from benchmarks.fake_servers import FakeCocApi, FakeTwitchApi, player_tag, start_server
+
+logger = logging.getLogger("benchmarks")
+
+BENCH_CLAN_TAG = "#BENCH"
+BENCH_GUILD_ID = 424242
+CLAN_ROLE_NAME = "Clan-Mitglied"
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    durations: list = field(default_factory=list)  # Sekunden pro Durchlauf
+    http_requests: Counter = field(default_factory=Counter)  # Route -> Anfragen an die Ersatzserver
+    discord_calls: Counter = field(default_factory=Counter)  # Art -> simulierte Discord-Aufrufe
+    faked: tuple = ()  # Bot-Attribute, die nur der Stub bereitstellt (siehe `ClashScenario`)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.durations)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        iterations = len(self.durations)
+        total = sum(self.durations)
+        return {
+            "scenario": self.name,
+            "iterations": iterations,
+            "throughput_per_s": round(iterations / total, 2) if total else None,
+            "mean_ms": round(statistics.fmean(self.durations) * 1000, 2),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(max(self.durations) * 1000, 2),
+            "http_requests": dict(self.http_requests),
+            "http_requests_per_iteration": round(sum(self.http_requests.values()) / iterations, 2),
+            "discord_calls": dict(self.discord_calls),
+            "faked": list(self.faked),
+        }
+
+
+class Harness:
+    """Ersatzserver, Discord-Stubs und temporäres Arbeitsverzeichnis für alle Szenarien."""
+
+    def __init__(self, args):
+        self.args = args
+        self.coc = FakeCocApi(members=args.members, war_size=args.war_size, latency=args.api_latency_ms / 1000)
+        self.twitch = FakeTwitchApi(streamers=args.streamers, live_ratio=args.live_ratio,
+                                    latency=args.api_latency_ms / 1000)
+        self.runners = []
+        self.workdir = tempfile.TemporaryDirectory(prefix="bot-bench-")
+        self.original_cwd = os.getcwd()
+
+    async def start(self):
+        coc_runner, coc_url = await start_server(self.coc.app())
+        twitch_runner, twitch_url = await start_server(self.twitch.app())
+        self.runners = [coc_runner, twitch_runner]
+
+        # Muss vor dem Import der Bot-Module gesetzt sein, die die Werte beim Import lesen
+        os.environ.update({
+            "COC_API_BASE_URL": f"{coc_url}/v1",
+            "COC_API_TOKEN": "benchmark",
+            "CLAN_TAG": BENCH_CLAN_TAG,
+            "CLASH_GUILD_ID": str(BENCH_GUILD_ID),
+            "TWITCH_HELIX_BASE_URL": f"{twitch_url}/helix",
+            "TWITCH_TOKEN_URL": f"{twitch_url}/oauth2/token",
+            "TWITCH_CLIENT_ID": "benchmark",
+            "TWITCH_CLIENT_SECRET": "benchmark",
+            "TWITCH_DB_BACKEND": "sqlite",
+            "TWITCH_SQLITE_PATH": os.path.join(self.workdir.name, "twitch.db"),
+        })
+        # Die Verifizierung öffnet `clash_bot.db` relativ zum Arbeitsverzeichnis
+        os.chdir(self.workdir.name)
+
+    async def stop(self):
+        for runner in self.runners:
+            await runner.cleanup()
+        os.chdir(self.original_cwd)
+        self.workdir.cleanup()
+
+    def request_counts(self) -> Counter:
+        counts = Counter()
+        counts.update({f"coc:{route}": n for route, n in self.coc.requests.items()})
+        counts.update({f"twitch:{route}": n for route, n in self.twitch.requests.items()})
+        return counts
+
+    async def measure(self, name: str, scenario) -> ScenarioResult:
+        """Führt `scenario.prepare()` (ungemessen) und `scenario.run()` (gemessen) wiederholt aus."""
+        result = ScenarioResult(name, faked=getattr(scenario, "faked", ()))
+        requests_before = self.request_counts()
+        calls_before = Counter(scenario.calls.counts)
+        for _ in range(self.args.iterations):
+            await scenario.prepare()
+            started = time.perf_counter()
+            await scenario.run()
+            result.durations.append(time.perf_counter() - started)
+        result.http_requests = self.request_counts() - requests_before
+        result.discord_calls = Counter(scenario.calls.counts) - calls_before
+        await scenario.close()
+        return result
+
+
+class TwitchScenario:
+    """`TwitchBot.check_twitch_streams` über alle Streamer mit Fan-out in mehrere Guilds."""
+
+    def __init__(self, harness: Harness):
+        from benchmarks.stubs import DiscordCalls, StubClient
+        from TwitchNotifier.cogs.TwitchCommands import TwitchCommands
+        from TwitchNotifier.twitch_bot import TwitchBot
+        from TwitchNotifier.utils.registry import StreamerEntry
+
+        self.calls = DiscordCalls(harness.args.discord_latency_ms / 1000)
+        self.stubs = StubClient(self.calls)
+        self.bot = TwitchBot("benchmark")
+        self.stubs.bind(self.bot)
+        self.cog_class = TwitchCommands
+        self.entries = [StreamerEntry(name=name) for name in harness.twitch.streamers]
+        for guild_id in range(1, harness.args.guilds + 1):
+            guild = self.stubs.add_guild(guild_id)
+            self.bot.notification_router.set_route(guild_id, self.stubs.add_channel(guild).id)
+
+    async def setup(self):
+        await self.bot.db.initialize()
+        await self.bot.add_cog(self.cog_class(self.bot))
+        self.bot.streamers.load(self.entries)
+
+    async def prepare(self):
+        # Jeder Durchlauf prüft alle Streamer, unabhängig von den Intervallen des Schedulers
+        for name in self.bot.streamers:
+            self.bot.scheduler.defer(name, 0)
+
+    async def run(self):
+        await self.bot.check_twitch_streams()
+
+    async def close(self):
+        from common.http import release_http_client
+        await self.bot.flush_viewer_stats()
+        await self.bot.db.close()
+        await self.bot.outbound.close()
+        await release_http_client()
+
+
+class ClashScenario:
+    """
+    Gemeinsame Einrichtung der CoC-Szenarien: Stub-Bot mit echter CoC-API und SQLite als `db_connection`.
+
+    Achtung: `bot.db_connection` ist gefälscht. Der echte `ClashBot` hat kein solches Attribut, nur `bot.db`
+    (`ClashDatabase`); die Datenbankmethoden von CK, CWL und Clanspiele (`get_event_channel`,
+    `get_stored_embed_data`, `save_embed_data`, ...) scheitern im Betrieb daher mit einem AttributeError.
+    Szenarien, die diese Pfade nutzen, führen das Attribut in `faked` und werden in der Ausgabe markiert;
+    ihre Zahlen messen den Code hinter dem Datenbankzugriff, nicht das heutige Verhalten des Bots.
+    """
+
+    faked = ()
+
+    def __init__(self, harness: Harness):
+        from benchmarks.stubs import CLASH_SCHEMA, DiscordCalls, SqliteConnection, StubBot
+        from common.http import acquire_http_client
+        from CoCBot.utils.coc_api import CocApi
+
+        self.harness = harness
+        self.calls = DiscordCalls(harness.args.discord_latency_ms / 1000)
+        self.db = SqliteConnection(os.path.join(harness.workdir.name, "clash_bot.db"))
+        self.db.executescript(CLASH_SCHEMA)
+        self.bot = StubBot(self.calls, CocApi(acquire_http_client()), self.db)
+        self.guild = self.bot.add_guild(BENCH_GUILD_ID, role_names=(CLAN_ROLE_NAME,))
+        self.channel = self.bot.add_channel(self.guild)
+
+    async def setup(self):
+        pass
+
+    async def prepare(self):
+        pass
+
+    async def close(self):
+        from common.http import release_http_client
+        await self.bot.event_bus.close()
+        await self.bot.outbound.close()
+        self.db.close()
+        await release_http_client()
+
+
+class WarEmbedScenario(ClashScenario):
+    """`CK.post_or_update_war_embed`: Krieg abrufen, Embed bauen, gespeicherte Nachricht bearbeiten."""
+
+    faked = ("bot.db_connection",)
+
+    async def setup(self):
+        from CoCBot.cogs.clanwar import CK
+        self.cog = CK(self.bot)
+        with self.db.cursor() as cursor:
+            cursor.execute("INSERT INTO event_channels (event_type, channel_id) VALUES ('clan-war', %s)",
+                           (self.channel.id,))
+        self.db.commit()
+
+    async def run(self):
+        # Wie ein Durchlauf des Pollers: neuer Abruf, danach das Embed des Abonnenten
+        from CoCBot.utils.event_bus import CURRENT_WAR
+        await self.cog.post_or_update_war_embed(await self.bot.event_bus.refresh(CURRENT_WAR, BENCH_CLAN_TAG))
+
+
+class VerificationScenario(ClashScenario):
+    """`Verification.verify_clan_members`: Mitgliederabgleich, Rollen entziehen, Datenbank bereinigen."""
+
+    async def setup(self):
+        from CoCBot.cogs.verification import Verification
+        self.cog = Verification(self.bot)
+        self.role = self.guild.roles[0]
+
+    async def prepare(self):
+        # Die Hälfte der verifizierten Spieler ist nicht (mehr) im Clan und verliert die Rolle
+        rows = [(1000 + i, player_tag(i), f"Spieler {i}") for i in range(self.harness.args.members * 2)]
+        with self.db.cursor() as cursor:
+            cursor.execute("DELETE FROM verified_players")
+            cursor.executemany("INSERT INTO verified_players (discord_id, player_tag, coc_name) VALUES (%s, %s, %s)",
+                               rows)
+        self.db.commit()
+        for discord_id, _, _ in rows:
+            self.guild.add_member(discord_id, [self.role])
+        # Der tägliche Abgleich findet nie eine frische Clan-Antwort vor
+        from CoCBot.utils.event_bus import CLAN
+        self.bot.event_bus.snapshots.pop((CLAN, BENCH_CLAN_TAG), None)
+
+    async def run(self):
+        await self.cog.verify_clan_members()
+
+
+class UpdatePointsScenario(ClashScenario):
+    """`Clanspiele.update_points`: Punkte speichern, Summe neu berechnen, Embed bearbeiten."""
+
+    faked = ("bot.db_connection",)
+
+    async def setup(self):
+        from benchmarks.stubs import FakeInteraction
+        from CoCBot.cogs.clanspiele import Clanspiele
+        self.cog = Clanspiele(self.bot)
+        self.interaction_class = FakeInteraction
+        members = self.harness.args.members
+        message = await self.channel.send(embed=None)
+        with self.db.cursor() as cursor:
+            cursor.executemany("INSERT INTO users (player_tag, coc_name, discord_id) VALUES (%s, %s, %s)",
+                               [(player_tag(i), f"Spieler {i}", 1000 + i) for i in range(members)])
+            cursor.execute("INSERT INTO clanspiele (start_time, end_time, message_id, channel_id) "
+                           "VALUES ('2025-01-22', '2025-01-28', %s, %s)", (message.id, self.channel.id))
+        self.db.commit()
+        self.round = 0
+
+    async def run(self):
+        self.round += 1
+        tag = player_tag(self.round % self.harness.args.members)
+        interaction = self.interaction_class(self.calls, self.guild, self.channel)
+        await self.cog.update_points.callback(self.cog, interaction, tag, self.round * 10 % 4000)
+
+
+SCENARIOS = {
+    "twitch": TwitchScenario,
+    "war_embed": WarEmbedScenario,
+    "verification": VerificationScenario,
+    "update_points": UpdatePointsScenario,
+}
+
+
+def format_table(summaries: list[dict]) -> str:
+    header = f"{'Szenario':<15}{'Läufe':>7}{'Läufe/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}" \
+             f"{'max ms':>10}{'HTTP/Lauf':>11}  Discord-Aufrufe"
+    lines = [header, "-" * len(header)]
+    for s in summaries:
+        calls = ", ".join(f"{kind}={count}" for kind, count in sorted(s["discord_calls"].items()))
+        name = s["scenario"] + ("*" if s["faked"] else "")
+        lines.append(f"{name:<15}{s['iterations']:>7}{s['throughput_per_s'] or 0:>10}{s['p50_ms']:>10}"
+                     f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}{s['http_requests_per_iteration']:>11}"
+                     f"  {calls}")
+    for s in summaries:
+        if s["faked"]:
+            lines.append(f"* {s['scenario']}: {', '.join(s['faked'])} gibt es nur im Stub, nicht im echten Bot")
+    return "\n".join(lines)
+
+
+async def run_benchmarks(args) -> list[dict]:
+    harness = Harness(args)
+    await harness.start()
+    summaries = []
+    try:
+        for name in args.scenario:
+            scenario = SCENARIOS[name](harness)
+            await scenario.setup()
+            result = await harness.measure(name, scenario)
+            summaries.append(result.summary())
+            logger.info("Szenario %s abgeschlossen.", name)
+    finally:
+        await harness.stop()
+    return summaries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline-Benchmarks mit lokalen CoC-, Twitch- und Discord-Stubs.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Nur dieses Szenario ausführen (mehrfach möglich, Standard: alle)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--streamers", type=int, default=500, help="Anzahl überwachter Streamer")
+    parser.add_argument("--live-ratio", type=float, default=0.2, help="Anteil der Streamer, die live sind")
+    parser.add_argument("--guilds", type=int, default=5, help="Guilds, in die Twitch-Benachrichtigungen gehen")
+    parser.add_argument("--members", type=int, default=50, help="Clan-Mitglieder")
+    parser.add_argument("--war-size", type=int, default=50, help="Kriegsgröße (50 = 50 gegen 50)")
+    parser.add_argument("--api-latency-ms", type=float, default=20, help="Antwortzeit der Ersatz-APIs")
+    parser.add_argument("--discord-latency-ms", type=float, default=50, help="Dauer eines Discord-Aufrufs")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+    return args
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format="[%(levelname)s] %(name)s: %(message)s")
+    logger.setLevel(logging.INFO)
+    args = parse_args(argv)
+    if args.json:
+        args.json = os.path.abspath(args.json)  # vor dem Wechsel ins temporäre Arbeitsverzeichnis
+    summaries = asyncio.run(run_benchmarks(args))
+    print(format_table(summaries))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(summaries, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+import asyncio
+import itertools
+import re
+import sqlite3
+from collections import Counter
+from typing import Optional
+
+import discord
+
+from common.outbound import OutboundScheduler
+from CoCBot.utils.event_bus import EventBus
+
+_ids = itertools.count(10 ** 17)
+
+
+class DiscordCalls:
+    """Zählt die simulierten Discord-REST-Aufrufe und verzögert sie um eine feste Latenz."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.counts = Counter()
+
+    async def call(self, kind: str):
+        self.counts[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeMessage:
+    def __init__(self, calls: DiscordCalls, channel: "FakeChannel", embed=None):
+        self.calls = calls
+        self.channel = channel
+        self.id = next(_ids)
+        self.embed = embed
+
+    async def edit(self, embed=None, **kwargs):
+        await self.calls.call("edit")
+        self.embed = embed
+
+    async def delete(self):
+        await self.calls.call("delete")
+        self.channel.messages.pop(self.id, None)
+
+
+class FakeChannel:
+    def __init__(self, calls: DiscordCalls, channel_id: Optional[int] = None, name: str = "benchmark"):
+        self.calls = calls
+        self.id = channel_id or next(_ids)
+        self.name = name
+        self.messages: dict[int, FakeMessage] = {}
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        await self.calls.call("send")
+        message = FakeMessage(self.calls, self, embed)
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id: int):
+        await self.calls.call("fetch_message")
+        message = self.messages.get(message_id)
+        if message is None:
+            # discord.NotFound erwartet eine Response; für die Cogs zählt nur der Typ
+            raise discord.NotFound(_FakeResponse(404), "Unknown Message")
+        return message
+
+
+class _FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "Not Found"
+
+
+class FakeRole:
+    def __init__(self, name: str):
+        self.id = next(_ids)
+        self.name = name
+
+
+class FakeMember:
+    def __init__(self, calls: DiscordCalls, guild: "FakeGuild", member_id: int, roles: list):
+        self.calls = calls
+        self.guild = guild
+        self.id = member_id
+        self.roles = list(roles)
+
+    async def add_roles(self, *roles):
+        await self.calls.call("add_roles")
+        self.roles.extend(role for role in roles if role not in self.roles)
+
+    async def remove_roles(self, *roles):
+        await self.calls.call("remove_roles")
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+class FakeGuild:
+    def __init__(self, calls: DiscordCalls, guild_id: int, role_names: tuple = ()):
+        self.calls = calls
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.roles = [FakeRole(name) for name in role_names]
+        self.members: dict[int, FakeMember] = {}
+        self.channels: dict[int, FakeChannel] = {}
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self.members.get(member_id)
+
+    def add_member(self, member_id: int, roles: list) -> FakeMember:
+        member = self.members[member_id] = FakeMember(self.calls, self, member_id, roles)
+        return member
+
+    async def fetch_channel(self, channel_id: int):
+        await self.calls.call("fetch_channel")
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Channel")
+        return channel
+
+
+class StubClient:
+    """
+    Stellt die Teile von `commands.Bot` bereit, die die Cogs außerhalb von Slash-Commands nutzen
+    (`get_channel`, `get_guild`, `guilds`, ...), ohne Gateway-Verbindung.
+    """
+
+    def __init__(self, calls: DiscordCalls):
+        self.calls = calls
+        self.guild_map: dict[int, FakeGuild] = {}
+        self.channel_map: dict[int, FakeChannel] = {}
+
+    @property
+    def guilds(self) -> list:
+        return list(self.guild_map.values())
+
+    def add_guild(self, guild_id: int, role_names: tuple = ()) -> FakeGuild:
+        guild = self.guild_map[guild_id] = FakeGuild(self.calls, guild_id, role_names)
+        return guild
+
+    def add_channel(self, guild: Optional[FakeGuild] = None, channel_id: Optional[int] = None) -> FakeChannel:
+        channel = FakeChannel(self.calls, channel_id)
+        self.channel_map[channel.id] = channel
+        if guild is not None:
+            guild.channels[channel.id] = channel
+        return channel
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self.guild_map.get(guild_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channel_map.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int) -> FakeChannel:
+        await self.calls.call("fetch_channel")
+        channel = self.channel_map.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Channel")
+        return channel
+
+    def bind(self, bot):
+        """Leitet die Kanal- und Guild-Abfragen eines echten Bot-Objekts auf die Stubs um."""
+        bot.get_channel = self.get_channel
+        bot.get_guild = self.get_guild
+        bot.fetch_channel = self.fetch_channel
+
+
+class StubBot(StubClient):
+    """
+    Ersatz für `ClashBot` in den CoC-Szenarien: Stubs für Discord, echte API- und Datenbankzugriffe.
+
+    `db_connection` ist eine Zugabe des Stubs, die der echte `ClashBot` nicht hat.
+    """
+
+    def __init__(self, calls: DiscordCalls, coc_api, db_connection: "SqliteConnection"):
+        super().__init__(calls)
+        self.coc_api = coc_api
+        self.db_connection = db_connection
+        self.outbound = OutboundScheduler("benchmark")
+        self.event_bus = EventBus(coc_api)
+
+    def defer_until_ready(self, cog: str, coroutine_function):
+        """Aufwärmarbeit übernimmt im Benchmark das Szenario selbst."""
+        return None
+
+    async def wait_until_ready(self):
+        return None
+
+    def is_ready(self) -> bool:
+        return True
+
+
+class FakeInteractionResponse:
+    def __init__(self, calls: DiscordCalls):
+        self.calls = calls
+        self.messages = []
+
+    async def send_message(self, content=None, **kwargs):
+        await self.calls.call("interaction_response")
+        self.messages.append(content)
+
+    async def defer(self, **kwargs):
+        await self.calls.call("interaction_defer")
+
+
+class FakeInteraction:
+    """Minimale `discord.Interaction` für den direkten Aufruf von Command-Callbacks."""
+
+    def __init__(self, calls: DiscordCalls, guild: Optional[FakeGuild] = None, channel=None, user=None):
+        self.id = next(_ids)
+        self.guild = guild
+        self.channel = channel
+        self.user = user
+        self.response = FakeInteractionResponse(calls)
+
+
+_DUPLICATE_KEY = re.compile(r"ON DUPLICATE KEY UPDATE\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_VALUES = re.compile(r"VALUES\((\w+)\)", re.IGNORECASE)
+
+
+def mysql_to_sqlite(sql: str) -> str:
+    """Übersetzt die MySQL-Eigenheiten der CoC-Cogs (`%s`, `ON DUPLICATE KEY UPDATE`) nach SQLite."""
+    sql = sql.replace("%s", "?")
+    match = _DUPLICATE_KEY.search(sql)
+    if match:
+        assignments = _VALUES.sub(r"excluded.\1", match.group(1))
+        sql = sql[:match.start()] + "ON CONFLICT DO UPDATE SET " + assignments
+    return sql
+
+
+class SqliteCursor:
+    """Cursor mit der Schnittstelle von PyMySQL (Platzhalter `%s`, nutzbar als Context-Manager)."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cursor.close()
+
+    def execute(self, sql: str, params: tuple = ()):
+        return self.cursor.execute(mysql_to_sqlite(sql), params)
+
+    def executemany(self, sql: str, rows):
+        return self.cursor.executemany(mysql_to_sqlite(sql), rows)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+    def close(self):
+        self.cursor.close()
+
+
+class SqliteConnection:
+    """
+    Stellt eine SQLite-Datenbank als `bot.db_connection` bereit, wie sie die CoC-Cogs mit PyMySQL erwarten.
+
+    Nur für die Benchmarks: Der echte `ClashBot` setzt `db_connection` nicht (siehe `benchmarks.run.ClashScenario`).
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+
+    def cursor(self) -> SqliteCursor:
+        return SqliteCursor(self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+    def executescript(self, script: str):
+        self.connection.executescript(script)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+CLASH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS event_channels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT UNIQUE NOT NULL,
+    channel_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clanwar_embed (
+    message_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS users (
+    player_tag TEXT PRIMARY KEY,
+    coc_name TEXT NOT NULL,
+    discord_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS clanspiele (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start_time TEXT,
+    end_time TEXT,
+    progress INTEGER DEFAULT 0,
+    message_id INTEGER,
+    channel_id INTEGER,
+    sort_order TEXT DEFAULT 'desc',
+    current_page INTEGER DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS clanspiele_players (
+    clanspiele_id INTEGER NOT NULL,
+    player_tag TEXT NOT NULL,
+    coc_name TEXT NOT NULL,
+    points INTEGER DEFAULT 0,
+    discord_id INTEGER,
+    PRIMARY KEY (clanspiele_id, player_tag)
+);
+CREATE TABLE IF NOT EXISTS verified_players (
+    discord_id INTEGER PRIMARY KEY,
+    player_tag TEXT NOT NULL,
+    coc_name TEXT
+);
+"""
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Hier wird pro Bot der Hash des zuletzt synchronisierten Command-Trees abgelegt
+SYNC_STATE_DIR = os.getenv("COMMAND_SYNC_STATE_DIR", ".command_sync")
+
+
+def serialize_commands(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> list:
+    """Serialisiert die Commands eines Scopes (global oder eine Guild) so, wie sie an Discord gesendet werden."""
+    payload = []
+    for command in tree.get_commands(guild=guild):
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError:  # discord.py < 2.4 erwartet keinen Tree
+            payload.append(command.to_dict())
+    return sorted(payload, key=lambda item: (item.get("type", 1), item["name"]))
+
+
+def command_tree_hash(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """Stabiler Hash über die serialisierten Commands eines Scopes."""
+    serialized = json.dumps(serialize_commands(tree, guild), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _state_path(bot_name: str) -> str:
+    return os.path.join(SYNC_STATE_DIR, f"{bot_name}.json")
+
+
+def _load_state(bot_name: str) -> dict:
+    try:
+        with open(_state_path(bot_name), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(bot_name: str, state: dict):
+    os.makedirs(SYNC_STATE_DIR, exist_ok=True)
+    temp_path = _state_path(bot_name) + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+    os.replace(temp_path, _state_path(bot_name))
+
+
+async def sync_command_tree(bot: discord.Client, bot_name: str, guild_ids: Iterable[int] = (),
+                            force: Optional[bool] = None) -> dict:
+    """
+    Synchronisiert den Command-Tree nur, wenn er sich seit dem letzten Sync geändert hat.
+
+    Globale Commands und die Commands jeder übergebenen Guild werden getrennt gehasht und
+    synchronisiert. Mit `force=True` oder `FORCE_COMMAND_SYNC=1` wird immer synchronisiert.
+
+    :return: Dictionary Scope -> Anzahl synchronisierter Commands (nur tatsächlich synchronisierte Scopes).
+    """
+    if force is None:
+        force = os.getenv("FORCE_COMMAND_SYNC", "0").lower() in ("1", "true", "yes")
+
+    state = _load_state(bot_name)
+    if state.get("application_id") != bot.application_id:
+        # Anderer Bot-Account (z. B. Test-Token): alter Stand ist wertlos
+        state = {"application_id": bot.application_id, "scopes": {}}
+    scopes = state.setdefault("scopes", {})
+
+    synced = {}
+    for guild_id in [None, *dict.fromkeys(guild_ids)]:
+        guild = discord.Object(id=guild_id) if guild_id else None
+        scope = str(guild_id) if guild_id else "global"
+        digest = command_tree_hash(bot.tree, guild)
+        if not force and scopes.get(scope) == digest:
+            logger.info("Command-Tree (%s) unverändert, Synchronisation übersprungen.", scope)
+            continue
+
+        commands = await bot.tree.sync(guild=guild)
+        synced[scope] = len(commands)
+        scopes[scope] = digest
+        _save_state(bot_name, state)
+        logger.info("%s Befehle (%s) synchronisiert: %s", len(commands), scope, ', '.join(c.name for c in commands))
+    return synced
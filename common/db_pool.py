@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import sqlite3
+import time
+
+from common.metrics import DB_DURATION
+
+try:
+    import pymysql
+except ImportError:  # Nur für das SQLite-Backend nicht erforderlich
+    pymysql = None
+
+logger = logging.getLogger(__name__)
+
+# Verbindungen, die länger ungenutzt waren, werden vor der Nutzung geprüft
+HEALTH_CHECK_AFTER = 60
+
+
+class ConnectionPool:
+    """
+    Pool synchroner DB-API-Verbindungen, deren Abfragen in Worker-Threads laufen.
+
+    Der Event-Loop wartet nur auf freie Verbindungen und Ergebnisse; die eigentlichen
+    Abfragen blockieren ihn nie. Defekte Verbindungen werden verworfen und neu aufgebaut.
+    """
+
+    def __init__(self, connect, ping, errors: tuple, size: int = 4, name: str = "db"):
+        self.name = name
+        self._connect = connect
+        self._ping = ping
+        self._errors = errors
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+        self._last_used: dict[int, float] = {}
+        self._in_use: dict[int, object] = {}  # Ausgegebene Verbindungen; `close` schließt sie bei der Rückgabe
+        self._closed = False
+        self._lock = asyncio.Lock()
+
+    async def _acquire(self):
+        async with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                try:
+                    connection = await asyncio.to_thread(self._connect)
+                except BaseException:
+                    self._created -= 1
+                    raise
+                self._in_use[id(connection)] = connection
+                return connection
+        connection = await self._idle.get()
+        self._in_use[id(connection)] = connection
+        if time.monotonic() - self._last_used.get(id(connection), 0) > HEALTH_CHECK_AFTER:
+            try:
+                await self._in_thread(connection, self._ping, connection)
+            except self._errors as e:
+                logger.warning("Datenbankverbindung defekt, baue neu auf: %s", e)
+                self._discard(connection)
+                return await self._acquire()
+            except asyncio.CancelledError:
+                raise
+            except BaseException:
+                self._release(connection)
+                raise
+        return connection
+
+    def _release(self, connection):
+        if self._closed:
+            self._discard(connection)
+            return
+        self._in_use.pop(id(connection), None)
+        self._last_used[id(connection)] = time.monotonic()
+        self._idle.put_nowait(connection)
+
+    def _discard(self, connection):
+        self._created -= 1
+        self._in_use.pop(id(connection), None)
+        self._last_used.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _settle(self, connection, task: asyncio.Future):
+        """Gibt eine Verbindung zurück, nachdem ein abgebrochener Aufrufer ihren Thread zurückgelassen hat."""
+        error = None if task.cancelled() else task.exception()
+        if task.cancelled() or (isinstance(error, self._errors) and _is_connection_error(error)):
+            self._discard(connection)
+        else:
+            self._release(connection)
+
+    async def _in_thread(self, connection, func, *args):
+        """
+        Führt `func(*args)` in einem Worker-Thread aus. Wird der Aufrufer abgebrochen, läuft der Thread weiter;
+        die Verbindung kommt dann erst nach seinem Ende zurück in den Pool, nie während sie noch benutzt wird.
+        """
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(lambda done: self._settle(connection, done))
+            raise
+
+    async def run(self, func, *args):
+        """Führt `func(connection, *args)` in einem Worker-Thread aus; bei Verbindungsfehlern einmal erneut."""
+        for attempt in (1, 2):
+            connection = await self._acquire()
+            try:
+                with DB_DURATION.time(db=self.name, operation=func.__name__):
+                    result = await self._in_thread(connection, func, connection, *args)
+            except self._errors as e:
+                if not _is_connection_error(e):
+                    self._release(connection)
+                    raise
+                self._discard(connection)
+                if attempt == 2:
+                    raise
+                logger.warning("Datenbankverbindung verloren, neuer Versuch: %s", e)
+                continue
+            except asyncio.CancelledError:
+                # Rückgabe übernimmt `_in_thread`, sobald der Thread fertig ist
+                raise
+            except BaseException:
+                self._release(connection)
+                raise
+            self._release(connection)
+            return result
+
+    async def close(self):
+        """Schließt freie Verbindungen sofort und alle noch benutzten, sobald sie zurückgegeben werden."""
+        self._closed = True
+        while not self._idle.empty():
+            self._discard(self._idle.get_nowait())
+
+
+def _is_connection_error(error: Exception) -> bool:
+    if pymysql is not None and isinstance(error, (pymysql.OperationalError, pymysql.InterfaceError)):
+        return True
+    return isinstance(error, sqlite3.ProgrammingError) and "closed" in str(error)
@@ -0,0 +1,134 @@
+import asyncio
+import contextlib
+import logging
+import os
+import ssl
+import time
+from collections import Counter
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import certifi
+
+from common.metrics import API_DURATION, API_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+HTTP_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))  # Offene Verbindungen insgesamt
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))  # Offene Verbindungen pro Host
+HTTP_DNS_TTL = 300  # Sekunden, die DNS-Antworten zwischengespeichert werden
+HTTP_KEEPALIVE = 60  # Sekunden, die ungenutzte Verbindungen offen bleiben
+HTTP_TIMEOUT = 20  # Gesamtzeit pro Anfrage
+
+
+class HttpClient:
+    """
+    Prozessweiter HTTP-Client für alle Bots und Cogs.
+
+    Alle Anfragen teilen sich einen Connector mit Verbindungslimit pro Host, Keep-Alive und DNS-Cache,
+    sodass TLS-Handshakes und DNS-Abfragen nur einmal pro Host anfallen. Die Session wird erst beim
+    ersten Request im laufenden Event-Loop erzeugt.
+    """
+
+    def __init__(self, limit: int = HTTP_LIMIT, limit_per_host: int = HTTP_LIMIT_PER_HOST,
+                 dns_ttl: int = HTTP_DNS_TTL, keepalive_timeout: float = HTTP_KEEPALIVE,
+                 timeout: float = HTTP_TIMEOUT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = Counter()  # Host -> Anzahl Anfragen
+        self.errors = Counter()  # Host -> Anzahl Verbindungsfehler
+        self.in_flight = Counter()  # Host -> laufende Anfragen
+        self.peak_in_flight = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+                ssl=ssl.create_default_context(cafile=certifi.where())
+            )
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """Wie `aiohttp.ClientSession.request`, zählt aber Anfragen und Auslastung pro Host."""
+        host = urlsplit(url).netloc
+        self.requests[host] += 1
+        self.in_flight[host] += 1
+        self.peak_in_flight = max(self.peak_in_flight, sum(self.in_flight.values()))
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with self.session.request(method, url, **kwargs) as response:
+                status = str(response.status)
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.errors[host] += 1
+            raise
+        finally:
+            self.in_flight[host] -= 1
+            API_REQUESTS.inc(host=host, status=status)
+            API_DURATION.observe(time.perf_counter() - started, host=host)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """Auslastung des Pools: Anfragen, Fehler und laufende Anfragen pro Host sowie offene Verbindungen."""
+        connector = self._session.connector if self._session and not self._session.closed else None
+        # `_conns` enthält die ungenutzten Keep-Alive-Verbindungen; eine öffentliche API gibt es dafür nicht
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values()) if connector else 0
+        return {
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+            "in_flight": sum(self.in_flight.values()),
+            "peak_in_flight": self.peak_in_flight,
+            "idle_connections": idle,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_users = 0
+
+
+def acquire_http_client() -> HttpClient:
+    """Liefert den gemeinsamen Client dieses Prozesses; jeder Aufruf braucht ein `release_http_client()`."""
+    global _shared_client, _shared_users
+    if _shared_client is None:
+        _shared_client = HttpClient()
+    _shared_users += 1
+    return _shared_client
+
+
+async def release_http_client():
+    """Gibt den gemeinsamen Client frei und schließt ihn, wenn ihn niemand mehr nutzt."""
+    global _shared_client, _shared_users
+    _shared_users = max(0, _shared_users - 1)
+    if _shared_users == 0 and _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
+
+
+def get_http_stats() -> dict:
+    """Pool-Statistik des gemeinsamen Clients (leer, wenn keiner existiert)."""
+    return _shared_client.stats() if _shared_client is not None else {}
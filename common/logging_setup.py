@@ -0,0 +1,73 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional
+
+LOG_FORMAT = "[%(asctime)s] [%(processName)s] [%(levelname)s] %(name)s: %(message)s"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Größe, ab der rotiert wird
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))  # Anzahl aufbewahrter rotierter Dateien
+# Pro Modul abweichende Level, z. B. "discord=WARNING,TwitchNotifier.twitch_bot=DEBUG"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "discord=WARNING,discord.gateway=INFO")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_levels(spec: str) -> dict[str, str]:
+    """Wandelt `"modul=LEVEL,..."` in ein Dictionary um; ungültige Einträge werden übersprungen."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(log_name: Optional[str] = "bots", level: str = LOG_LEVEL,
+                  module_levels: Optional[dict] = None) -> logging.handlers.QueueListener:
+    """
+    Richtet nicht blockierendes Logging für den ganzen Prozess ein.
+
+    Aufrufer schreiben nur in eine Queue (`QueueHandler`); Konsole und rotierende Logdatei bedient ein
+    Hintergrund-Thread (`QueueListener`). So läuft keine Datei-I/O auf dem Event-Loop.
+
+    :param log_name: Name der Logdatei in `LOG_DIR` (ohne Endung) oder None für nur Konsole.
+    :param level: Level des Root-Loggers.
+    :param module_levels: Abweichende Level pro Logger, Standard aus `LOG_LEVELS`.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_name:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            os.path.join(LOG_DIR, f"{log_name}.log"), maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    for name, module_level in (module_levels if module_levels is not None else parse_levels(LOG_LEVELS)).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Schreibt alle noch gepufferten Einträge und beendet den Writer-Thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
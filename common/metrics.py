@@ -0,0 +1,255 @@
+import bisect
+import contextlib
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 deaktiviert den Endpunkt
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metric:
+    """Basis für alle Metriken: Werte pro Label-Kombination, geschützt durch den Lock der Registry."""
+    kind = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: tuple):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": self.labelnames,
+            "values": {key: (dict(value) if isinstance(value, dict) else value) for key, value in self.values.items()},
+        }
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self.registry.lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Misst die Dauer des `with`-Blocks in Sekunden."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = self.buckets
+        snapshot["values"] = {key: {"counts": list(state["counts"]), "sum": state["sum"], "count": state["count"]}
+                              for key, state in self.values.items()}
+        return snapshot
+
+
+class MetricsRegistry:
+    """Sammelt alle Metriken eines Prozesses."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, tuple(labelnames)))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, tuple(labelnames)))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, tuple(labelnames), buckets))
+
+    def snapshot(self) -> dict:
+        """Kopie aller Werte, z. B. um sie aus einem Worker-Prozess an den Launcher zu schicken."""
+        with self.lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+
+REGISTRY = MetricsRegistry()
+
+COMMAND_DURATION = REGISTRY.histogram(
+    "discord_command_duration_seconds", "Laufzeit von Slash-Commands", ("bot", "command", "status"))
+API_REQUESTS = REGISTRY.counter(
+    "http_client_requests_total", "Ausgehende HTTP-Anfragen (CoC, Twitch, ...)", ("host", "status"))
+API_DURATION = REGISTRY.histogram(
+    "http_client_request_duration_seconds", "Dauer ausgehender HTTP-Anfragen", ("host",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total", "Cache-Zugriffe nach Ergebnis (hit/miss)", ("cache", "result"))
+DISCORD_CALLS = REGISTRY.counter(
+    "discord_rest_calls_total", "Discord-REST-Aufrufe der Cogs (send, edit, delete, ...)", ("kind",))
+DB_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "Dauer von Datenbankabfragen", ("db", "operation"))
+LOOP_DURATION = REGISTRY.histogram(
+    "background_loop_duration_seconds", "Dauer eines Durchlaufs der Hintergrund-Loops", ("loop",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+
+
+def record_cache(cache: str, hit: bool, amount: int = 1):
+    if amount:
+        CACHE_REQUESTS.inc(amount, cache=cache, result="hit" if hit else "miss")
+
+
+def record_discord_call(kind: str):
+    DISCORD_CALLS.inc(kind=kind)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: Optional[dict] = None) -> str:
+    pairs = [(name, value) for name, value in zip(names, values)]
+    if extra:
+        pairs = list(extra.items()) + pairs
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def render(snapshots: Iterable[tuple[dict, Optional[dict]]]) -> str:
+    """
+    Erzeugt das Prometheus-Textformat.
+
+    :param snapshots: Paare aus Registry-Snapshot und zusätzlichen Labels (z. B. `{"worker": "twitch"}`).
+    """
+    families: dict[str, list] = {}
+    for snapshot, extra in snapshots:
+        for name, metric in snapshot.items():
+            families.setdefault(name, []).append((metric, extra))
+
+    lines = []
+    for name in sorted(families):
+        first = families[name][0][0]
+        lines.append(f"# HELP {name} {first['help']}")
+        lines.append(f"# TYPE {name} {first['type']}")
+        for metric, extra in families[name]:
+            labelnames = metric["labelnames"]
+            for key, value in metric["values"].items():
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_format_labels(labelnames, key, extra)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(metric["buckets"]) + ["+Inf"], value["counts"]):
+                    cumulative += count
+                    labels = _format_labels(tuple(labelnames) + ("le",), tuple(key) + (bound,), extra)
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, key, extra)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(labelnames, key, extra)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(collect: Callable[[], str], host: str = METRICS_HOST,
+                         port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """Startet den Metrik-Endpunkt (`/metrics`) in einem Hintergrund-Thread."""
+    if not port:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = collect().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Scrapes nicht ins Log schreiben
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        logger.error("Metrik-Endpunkt konnte nicht auf %s:%s gestartet werden: %s", host, port, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Metrik-Endpunkt läuft auf http://%s:%s/metrics", host, port)
+    return server
+
+
+def instrument_bot(bot, bot_name: str):
+    """Misst die Laufzeit aller Slash-Commands eines Bots (Erfolg und Fehler getrennt)."""
+    started: dict[int, float] = {}
+
+    def observe(interaction, status: str):
+        start = started.pop(interaction.id, None)
+        command = getattr(interaction, "command", None)
+        if start is not None:
+            COMMAND_DURATION.observe(time.perf_counter() - start, bot=bot_name,
+                                     command=getattr(command, "qualified_name", "unbekannt"), status=status)
+
+    async def on_interaction(interaction):
+        if getattr(interaction.type, "value", None) == 2:  # InteractionType.application_command
+            started[interaction.id] = time.perf_counter()
+            if len(started) > 1000:  # Interaktionen ohne Abschluss nicht endlos sammeln
+                started.pop(next(iter(started)))
+
+    async def on_app_command_completion(interaction, command):
+        observe(interaction, "ok")
+
+    previous_on_error = bot.tree.on_error
+
+    async def on_error(interaction, error):
+        observe(interaction, "error")
+        await previous_on_error(interaction, error)
+
+    bot.add_listener(on_interaction)
+    bot.add_listener(on_app_command_completion)
+    bot.tree.on_error = on_error
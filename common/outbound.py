@@ -0,0 +1,231 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+from common.metrics import REGISTRY, record_discord_call
+
+logger = logging.getLogger(__name__)
+
+# Prioritätsklassen: kleinere Zahl wird zuerst ausgeführt
+INTERACTION = 0  # Antworten auf Slash-Commands und Buttons (Discord erwartet sie innerhalb von 3 Sekunden)
+USER_VISIBLE = 1  # Sichtbare Nachrichten und Embed-Aktualisierungen
+BULK = 2  # Wartungsarbeit wie Rollenabgleich
+
+PRIORITY_NAMES = {INTERACTION: "interaction", USER_VISIBLE: "user_visible", BULK: "bulk"}
+
+OUTBOUND_CONCURRENCY = int(os.getenv("DISCORD_OUTBOUND_CONCURRENCY", "4"))  # Gleichzeitige REST-Aufrufe pro Bot
+# Höchstens so viele Worker dürfen gleichzeitig Bulk-Arbeit erledigen; der Rest bleibt für Dringendes frei
+OUTBOUND_BULK_SLOTS = int(os.getenv("DISCORD_OUTBOUND_BULK_SLOTS", "1"))
+# Nach einem 429 wird die Route mindestens so lange pausiert, falls Discord keine Wartezeit nennt
+ROUTE_BACKOFF_SECONDS = 1.0
+
+OUTBOUND_QUEUE_DEPTH = REGISTRY.gauge(
+    "discord_outbound_queue_depth", "Wartende Discord-REST-Aufrufe", ("bot", "priority"))
+OUTBOUND_WAIT = REGISTRY.histogram(
+    "discord_outbound_wait_seconds", "Wartezeit in der Outbound-Queue bis zur Ausführung", ("bot", "priority"))
+
+
+class OutboundJob:
+    __slots__ = ("priority", "route", "kind", "factory", "future", "queued_at")
+
+    def __init__(self, priority: int, route: str, kind: str, factory: Callable[[], Awaitable],
+                 future: asyncio.Future):
+        self.priority = priority
+        self.route = route
+        self.kind = kind
+        self.factory = factory
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class OutboundScheduler:
+    """
+    Reiht alle Discord-REST-Aufrufe eines Bots nach Priorität ein.
+
+    Pro Route (entspricht grob einem Rate-Limit-Bucket von Discord, z. B. ein Kanal oder die Rollen einer Guild)
+    läuft höchstens ein Aufruf gleichzeitig; nach einem 429 wird nur diese Route pausiert. Bulk-Arbeit belegt
+    höchstens `bulk_slots` Worker, sodass Interaktionen und sichtbare Änderungen auch während eines großen
+    Rollenabgleichs sofort drankommen.
+    """
+
+    def __init__(self, bot_name: str, concurrency: int = OUTBOUND_CONCURRENCY, bulk_slots: int = OUTBOUND_BULK_SLOTS):
+        self.bot_name = bot_name
+        self.concurrency = max(1, concurrency)
+        self.bulk_slots = max(1, min(bulk_slots, self.concurrency))
+        # Ein Heap (Reihenfolge, Auftrag) pro Prioritätsklasse, dringendste Klasse zuerst
+        self._queues: dict[int, list[tuple[int, OutboundJob]]] = {priority: [] for priority in sorted(PRIORITY_NAMES)}
+        # Aufträge, deren Route belegt oder pausiert ist, warten hier statt in der Klasse: (Priorität, Reihenfolge,
+        # Auftrag). Wird die Route frei, kehrt nur der dringendste in seine Klasse zurück.
+        self._parked: dict[str, list[tuple[int, int, OutboundJob]]] = {}
+        self._depth = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._counter = itertools.count()
+        self._busy_routes: set[str] = set()
+        self._blocked_until: dict[str, float] = {}
+        self._bulk_running = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return sum(self._depth.values())
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker(), name=f"outbound-{self.bot_name}-{i}")
+                         for i in range(self.concurrency)]
+
+    def submit(self, factory: Callable[[], Awaitable], priority: int = USER_VISIBLE, route: str = "global",
+               kind: str = "other") -> asyncio.Future:
+        """
+        Reiht einen Aufruf ein.
+
+        :param factory: Erzeugt die Coroutine erst bei Ausführung, z. B. `lambda: channel.send(embed=embed)`.
+        :param priority: `INTERACTION`, `USER_VISIBLE` oder `BULK`.
+        :param route: Schlüssel des Rate-Limit-Buckets, z. B. `channel:123`.
+        :param kind: Art des Aufrufs für die Metriken (send, edit, ...).
+        :return: Future mit dem Ergebnis bzw. der Exception des Aufrufs.
+        """
+        self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        job = OutboundJob(priority, route, kind, factory, future)
+        heapq.heappush(self._queues[priority], (next(self._counter), job))
+        self._change_depth(priority, 1)
+        self._wakeup.set()
+        return future
+
+    def _change_depth(self, priority: int, delta: int):
+        self._depth[priority] += delta
+        OUTBOUND_QUEUE_DEPTH.set(self._depth[priority], bot=self.bot_name, priority=PRIORITY_NAMES[priority])
+
+    def _release(self, route: str):
+        """Gibt den dringendsten wartenden Auftrag einer frei gewordenen Route an seine Prioritätsklasse zurück."""
+        parked = self._parked.get(route)
+        while parked:
+            priority, order, job = heapq.heappop(parked)
+            if job.future.cancelled():
+                self._change_depth(priority, -1)
+                continue
+            heapq.heappush(self._queues[priority], (order, job))
+            break
+        if not parked:
+            self._parked.pop(route, None)
+
+    def _next_job(self) -> tuple[Optional[OutboundJob], Optional[float]]:
+        """Höchstpriorisierter ausführbarer Auftrag bzw. die Wartezeit bis eine blockierte Route frei wird."""
+        now = time.monotonic()
+        wait = None
+        for route, blocked_until in list(self._blocked_until.items()):
+            if blocked_until <= now:
+                del self._blocked_until[route]
+                if route not in self._busy_routes:
+                    self._release(route)
+            elif route in self._parked:
+                wait = blocked_until - now if wait is None else min(wait, blocked_until - now)
+
+        for priority, queue in self._queues.items():
+            if priority == BULK and self._bulk_running >= self.bulk_slots:
+                continue
+            while queue:
+                order, job = heapq.heappop(queue)
+                if job.future.cancelled():
+                    self._change_depth(priority, -1)
+                    # Der Auftrag kann der zurückgegebene einer freien Route gewesen sein: den nächsten nachziehen
+                    if job.route not in self._busy_routes and job.route not in self._blocked_until:
+                        self._release(job.route)
+                    continue
+                if job.route in self._busy_routes or job.route in self._blocked_until:
+                    heapq.heappush(self._parked.setdefault(job.route, []), (priority, order, job))
+                    continue
+                self._change_depth(priority, -1)
+                return job, wait
+        return None, wait
+
+    async def _worker(self):
+        while True:
+            job, wait = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._busy_routes.add(job.route)
+            if job.priority == BULK:
+                self._bulk_running += 1
+            priority_name = PRIORITY_NAMES[job.priority]
+            OUTBOUND_WAIT.observe(time.monotonic() - job.queued_at, bot=self.bot_name, priority=priority_name)
+            record_discord_call(job.kind)
+            try:
+                result = await job.factory()
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if getattr(e, "status", None) == 429 or retry_after is not None:
+                    self._blocked_until[job.route] = time.monotonic() + (retry_after or ROUTE_BACKOFF_SECONDS)
+                    logger.warning("Rate-Limit auf Route %s (%s).", job.route, self.bot_name)
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._busy_routes.discard(job.route)
+                if job.route not in self._blocked_until:
+                    self._release(job.route)
+                if job.priority == BULK:
+                    self._bulk_running -= 1
+                # Andere Worker warten evtl. auf genau diese Route
+                self._wakeup.set()
+
+    # Hilfsmethoden für die häufigsten Aufrufe
+
+    def send(self, channel, priority: int = USER_VISIBLE, **kwargs) -> asyncio.Future:
+        return self.submit(lambda: channel.send(**kwargs), priority, f"channel:{channel.id}", "send")
+
+    def edit(self, message, priority: int = USER_VISIBLE, **kwargs) -> asyncio.Future:
+        return self.submit(lambda: message.edit(**kwargs), priority, f"channel:{message.channel.id}", "edit")
+
+    def delete(self, message, priority: int = USER_VISIBLE) -> asyncio.Future:
+        return self.submit(lambda: message.delete(), priority, f"channel:{message.channel.id}:delete", "delete")
+
+    def add_reaction(self, message, emoji, priority: int = USER_VISIBLE) -> asyncio.Future:
+        return self.submit(lambda: message.add_reaction(emoji), priority,
+                           f"channel:{message.channel.id}:reactions", "add_reaction")
+
+    def add_roles(self, member, *roles, priority: int = USER_VISIBLE) -> asyncio.Future:
+        return self.submit(lambda: member.add_roles(*roles), priority, f"guild:{member.guild.id}:roles", "add_roles")
+
+    def remove_roles(self, member, *roles, priority: int = BULK) -> asyncio.Future:
+        return self.submit(lambda: member.remove_roles(*roles), priority,
+                           f"guild:{member.guild.id}:roles", "remove_roles")
+
+    def followup(self, interaction, **kwargs) -> asyncio.Future:
+        return self.submit(lambda: interaction.followup.send(**kwargs), INTERACTION,
+                           f"interaction:{interaction.id}", "followup")
+
+    async def close(self):
+        """Bricht die Worker ab; noch wartende Aufträge werden verworfen."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for queue in self._queues.values():
+            for _, job in queue:
+                job.future.cancel()
+            queue.clear()
+        for parked in self._parked.values():
+            for _, _, job in parked:
+                job.future.cancel()
+        self._parked.clear()
+        for priority in PRIORITY_NAMES:
+            self._change_depth(priority, -self._depth[priority])
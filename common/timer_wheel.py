@@ -0,0 +1,101 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    __slots__ = ("key", "deadline", "tick", "callback")
+
+    def __init__(self, key: Hashable, deadline: float, tick: int, callback: Callable[[], Any]):
+        self.key = key
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+
+
+class TimerWheel:
+    """
+    Hashed Timer Wheel für viele langlebige Fristen (SLA, Erinnerungen).
+
+    Jeder Timer liegt im Fach `tick % slots`; Einfügen und Abbrechen sind O(1). Ein einziger Task rückt
+    pro Tick ein Fach weiter und löst die fälligen Timer aus, statt pro Frist einen schlafenden Task zu
+    halten. Fristen sind Unix-Zeitstempel und überstehen daher einen Neustart, wenn sie erneut eingeplant
+    werden; bereits abgelaufene Fristen lösen im nächsten Tick aus.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 3600, name: str = "timers"):
+        self.tick = tick
+        self.name = name
+        self._slots: list[dict] = [{} for _ in range(slots)]
+        self._timers: dict[Hashable, Timer] = {}
+        self._current = int(time.time() // tick)  # Zuletzt verarbeiteter Tick
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        timer = self._timers.get(key)
+        return timer.deadline if timer is not None else None
+
+    def schedule(self, key: Hashable, deadline: float, callback: Callable[[], Any]):
+        """
+        Plant `callback()` für `deadline` ein; ein Timer mit gleichem Schlüssel wird ersetzt.
+
+        :param callback: Funktion ohne Argumente; gibt sie eine Coroutine zurück, läuft diese als eigener Task.
+        """
+        self.cancel(key)
+        tick = max(int(deadline // self.tick), self._current + 1)
+        timer = Timer(key, deadline, tick, callback)
+        self._timers[key] = timer
+        self._slots[tick % len(self._slots)][key] = timer
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"timer-wheel-{self.name}")
+
+    def cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del self._slots[timer.tick % len(self._slots)][key]
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(max(0.0, (self._current + 1) * self.tick - time.time()))
+            now = int(time.time() // self.tick)
+            # Nach einer Verzögerung alle übersprungenen Ticks nachholen, jedes Fach aber höchstens einmal
+            for tick in range(max(self._current + 1, now - len(self._slots) + 1), now + 1):
+                self._expire(tick, now)
+            self._current = max(self._current, now)
+
+    def _expire(self, tick: int, now: int):
+        slot = self._slots[tick % len(self._slots)]
+        due = [timer for timer in slot.values() if timer.tick <= now]
+        for timer in due:
+            del slot[timer.key]
+            del self._timers[timer.key]
+        for timer in due:
+            try:
+                result = timer.callback()
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result).add_done_callback(self._log_failure)
+            except Exception as e:
+                logger.error("Fehler im Timer %s: %s", timer.key, e)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Fehler im Timer-Callback: %s", task.exception())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from common.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG", "0").lower() in ("1", "true", "yes")
+# Ab dieser Blockadedauer wird der Stack des Event-Loop-Threads festgehalten
+WATCHDOG_THRESHOLD = float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "250")) / 1000
+# Takt des Heartbeats im Event-Loop und der Prüfung im Watchdog-Thread
+WATCHDOG_INTERVAL = 0.05
+# Abstand der zusammengefassten Auswertung im Log
+WATCHDOG_REPORT_INTERVAL = 300
+
+# Module, denen eine Blockade zugeordnet wird; alles andere (asyncio, discord, pymysql, ...) wird übersprungen
+PROJECT_PACKAGES = ("CoCBot", "TwitchNotifier", "SupportBot", "common")
+
+LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds", "Verspätung des Event-Loop-Heartbeats",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_STALLS = REGISTRY.counter(
+    "event_loop_stalls_total", "Blockaden des Event-Loops über dem Schwellwert nach Aufrufstelle", ("site",))
+LOOP_STALL_WORST = REGISTRY.gauge(
+    "event_loop_stall_worst_seconds", "Längste Blockade des Event-Loops nach Aufrufstelle", ("site",))
+
+
+def describe_frame(frame) -> str:
+    """`clanwar.CK.fetch_current_war` statt des vollen Modulpfads."""
+    module = frame.f_globals.get("__name__", "?").rsplit(".", 1)[-1]
+    return f"{module}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+
+
+def find_call_site(frame) -> Optional[str]:
+    """Innerster Frame aus dem eigenen Code – dort wurde der blockierende Aufruf abgesetzt."""
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.split(".", 1)[0] in PROJECT_PACKAGES and module != __name__:
+            return describe_frame(frame)
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    """
+    Erkennt Blockaden des Event-Loops.
+
+    Ein Heartbeat im Loop stempelt regelmäßig die Zeit; ein Hintergrund-Thread prüft, ob der Stempel älter
+    als der Schwellwert ist, und hält dann den Stack des Loop-Threads fest. Läuft der Loop wieder, wird die
+    gesamte Dauer der Blockade der gefundenen Aufrufstelle zugerechnet.
+    """
+
+    def __init__(self, threshold: float = WATCHDOG_THRESHOLD, interval: float = WATCHDOG_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.loop_thread_id: Optional[int] = None
+        self.last_beat = time.monotonic()
+        self.pending: Optional[tuple[str, str]] = None  # (Aufrufstelle, Stack) der laufenden Blockade
+        self.stats: dict[str, list] = {}  # Aufrufstelle -> [Anzahl, längste Dauer, Gesamtdauer]
+        self.lock = threading.Lock()
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Muss im laufenden Event-Loop aufgerufen werden."""
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.running = True
+        self.task = asyncio.get_running_loop().create_task(self.heartbeat())
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+        logger.info("Event-Loop-Watchdog aktiv (Schwellwert %.0f ms).", self.threshold * 1000)
+
+    def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+
+    async def heartbeat(self):
+        last_report = time.monotonic()
+        while self.running:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            LOOP_LAG.observe(lag)
+            with self.lock:
+                self.last_beat = now
+                pending, self.pending = self.pending, None
+            if pending is not None:
+                self.record(*pending, lag)
+            if now - last_report >= WATCHDOG_REPORT_INTERVAL:
+                self.report()
+                last_report = now
+
+    def watch(self):
+        while self.running:
+            time.sleep(self.interval / 2)
+            with self.lock:
+                stalled = self.pending is None and time.monotonic() - self.last_beat > self.threshold
+            if not stalled:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            site = find_call_site(frame) or describe_frame(frame)
+            stack = "".join(traceback.format_stack(frame))
+            with self.lock:
+                self.pending = (site, stack)
+
+    def record(self, site: str, stack: str, duration: float):
+        entry = self.stats.setdefault(site, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[2] += duration
+        LOOP_STALLS.inc(site=site)
+        if duration > entry[1]:
+            entry[1] = duration
+            LOOP_STALL_WORST.set(round(duration, 3), site=site)
+            # Nur neue Höchstwerte mit Stack loggen, sonst flutet eine wiederkehrende Blockade das Log
+            logger.warning("Event-Loop %.0f ms blockiert in %s:\n%s", duration * 1000, site, stack)
+
+    def report(self):
+        if not self.stats:
+            return
+        top = sorted(self.stats.items(), key=lambda item: item[1][2], reverse=True)[:5]
+        logger.info("Event-Loop-Blockaden: %s", " | ".join(
+            f"{site}: {count}x, max {worst * 1000:.0f} ms" for site, (count, worst, _) in top))
+
+
+_watchdogs: dict[int, LoopWatchdog] = {}
+
+
+def install_watchdog() -> Optional[LoopWatchdog]:
+    """Startet den Watchdog für den laufenden Loop, sofern `LOOP_WATCHDOG` gesetzt ist (einmal pro Loop)."""
+    if not WATCHDOG_ENABLED:
+        return None
+    loop = asyncio.get_running_loop()
+    watchdog = _watchdogs.get(id(loop))
+    if watchdog is None:
+        watchdog = _watchdogs[id(loop)] = LoopWatchdog()
+        watchdog.start()
+    return watchdog
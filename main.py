@@ -1,22 +1,31 @@
+import argparse
 import asyncio
-from dotenv import load_dotenv
+import logging
+import logging.handlers
+import multiprocessing
 import os
-from CoCBot.clashofclans_bot import ClashOfClansBot
-from SupportBot.support_bot import SupportBot
-from TwitchNotifier.twitch_bot import TwitchBot
-import sys
-from db import initialize_database
-initialize_database()
-
-
-# Füge den spezifischen Cogs-Pfad zum Python-Pfad hinzu
-bot_cogs_path = os.path.join(os.path.dirname(__file__), "cogs")  # Passe "cogs" an, wenn dein Ordner anders heißt
-if bot_cogs_path not in sys.path:
-    sys.path.append(bot_cogs_path)
+import queue
+import signal
+import time
+from dotenv import load_dotenv
 
 # Umgebungsvariablen laden
 load_dotenv()
 
+logger = logging.getLogger("launcher")
+
+# Sekunden zwischen zwei Lebenszeichen eines Worker-Prozesses
+HEARTBEAT_INTERVAL = 15
+# Ohne Lebenszeichen gilt ein Worker nach dieser Zeit als hängend und wird neu gestartet
+HEARTBEAT_TIMEOUT = 120
+# Wartezeit vor einem Neustart: verdoppelt sich bis zum Maximum, solange ein Worker schnell wieder abstürzt
+RESTART_BACKOFF_START = 2
+RESTART_BACKOFF_MAX = 300
+# Läuft ein Worker so lange stabil, beginnt der Backoff beim nächsten Absturz wieder von vorn
+STABLE_AFTER = 600
+# Abstand der zusammengefassten Statusmeldung im Elternprozess
+HEALTH_REPORT_INTERVAL = 300
+
 
 def get_bot_token(bot_name):
     """
@@ -30,25 +39,274 @@ def get_bot_token(bot_name):
     return token
 
 
-async def main():
+# Die Bot-Module werden erst in den Factories importiert, damit jeder Worker-Prozess
+# nur seinen eigenen Bot lädt und das Logging vorher konfiguriert ist.
+
+def create_clash_bot():
+    from CoCBot.clashofclans_bot import ClashBot, COMMAND_PREFIX, INTENTS, DATABASE_FILE
+    from CoCBot.db import initialize_database
+    initialize_database()
+    return ClashBot(command_prefix=COMMAND_PREFIX, intents=INTENTS, database_file=DATABASE_FILE), \
+        get_bot_token("CLASH")
+
+
+def create_support_bot():
+    from SupportBot.support_bot import SupportBot
+    token = get_bot_token("SUPPORT")
+    return SupportBot(token), token
+
+
+def create_twitch_bot():
+    from TwitchNotifier.twitch_bot import TwitchBot
+    token = get_bot_token("TWITCH")
+    return TwitchBot(token), token
+
+
+BOT_FACTORIES = {
+    "clash": create_clash_bot,
+    "support": create_support_bot,
+    "twitch": create_twitch_bot,
+}
+
+
+async def run_bot(name, status_queue=None):
+    """Startet einen Bot und meldet – falls ein Status-Queue übergeben wurde – regelmäßig seinen Zustand."""
+    from common.http import get_http_stats
+    from common.metrics import REGISTRY
+    from common.watchdog import install_watchdog
+
+    bot, token = BOT_FACTORIES[name]()
+    started = time.time()
+    install_watchdog()  # Nur mit LOOP_WATCHDOG=1
+
+    async def heartbeat():
+        while True:
+            status_queue.put(("health", name, {
+                "pid": os.getpid(),
+                "ready": bot.is_ready(),
+                "latency": None if bot.latency != bot.latency else round(bot.latency * 1000),  # NaN vor dem Login
+                "guilds": len(bot.guilds),
+                "uptime": round(time.time() - started),
+                "http": get_http_stats(),
+                "metrics": REGISTRY.snapshot(),
+            }))
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    closing = []
+
+    def close_on_sigterm():
+        # Der Elternprozess beendet Worker mit terminate(): sauber abmelden statt hart abzubrechen
+        if not closing:
+            logging.getLogger(name).info("SIGTERM erhalten, beende Bot %s...", name)
+            closing.append(asyncio.create_task(bot.close()))
+
+    async with bot:
+        heartbeat_task = None
+        if status_queue is not None:
+            heartbeat_task = asyncio.create_task(heartbeat())
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, close_on_sigterm)
+        try:
+            await bot.start(token)
+        finally:
+            if heartbeat_task:
+                heartbeat_task.cancel()
+            if closing:
+                await closing[0]
+
+
+def worker_main(name, status_queue):
+    """Einstiegspunkt eines Worker-Prozesses: Logs und Status gehen über die Queue an den Elternprozess."""
+    from common.logging_setup import LOG_LEVEL, LOG_LEVELS, parse_levels
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(status_queue)]
+    root.setLevel(LOG_LEVEL)
+    for module, level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(module).setLevel(level)
+    # Beenden übernimmt der Elternprozess
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    try:
+        asyncio.run(run_bot(name, status_queue))
+    except Exception:
+        logging.getLogger(name).exception("Bot %s ist abgestürzt.", name)
+        raise SystemExit(1)
+
+
+class Worker:
+    """Zustand eines überwachten Worker-Prozesses im Elternprozess."""
+
+    def __init__(self, name):
+        self.name = name
+        self.process = None
+        self.started_at = 0.0
+        self.last_heartbeat = 0.0
+        self.health = {}
+        self.metrics = {}  # Letzter Registry-Snapshot des Workers
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF_START
+        self.restart_at = 0.0
+
+
+class Supervisor:
+    """Startet jeden Bot in einem eigenen Prozess, überwacht ihn und startet ihn bei Bedarf mit Backoff neu."""
+
+    def __init__(self, names):
+        self.context = multiprocessing.get_context("spawn")
+        self.status_queue = self.context.Queue()
+        self.workers = {name: Worker(name) for name in names}
+        self.running = True
+
+    def spawn(self, worker):
+        worker.process = self.context.Process(target=worker_main, args=(worker.name, self.status_queue),
+                                              name=f"bot-{worker.name}", daemon=True)
+        worker.process.start()
+        worker.started_at = worker.last_heartbeat = time.monotonic()
+        logger.info("Bot %s gestartet (PID %s).", worker.name, worker.process.pid)
+
+    def schedule_restart(self, worker, reason):
+        now = time.monotonic()
+        if now - worker.started_at >= STABLE_AFTER:
+            worker.backoff = RESTART_BACKOFF_START
+        worker.restart_at = now + worker.backoff
+        logger.error("Bot %s %s. Neustart in %s Sekunden.", worker.name, reason, worker.backoff)
+        worker.backoff = min(worker.backoff * 2, RESTART_BACKOFF_MAX)
+        worker.process = None
+        worker.health = {}
+
+    def handle_message(self, message):
+        if isinstance(message, logging.LogRecord):
+            logging.getLogger(message.name).handle(message)
+            return
+        kind, name, payload = message
+        worker = self.workers.get(name)
+        if worker and kind == "health":
+            worker.last_heartbeat = time.monotonic()
+            worker.metrics = payload.pop("metrics", worker.metrics)
+            worker.health = payload
+
+    def check_workers(self):
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker.process is None:
+                if now >= worker.restart_at:
+                    worker.restarts += 1
+                    self.spawn(worker)
+                continue
+            if not worker.process.is_alive():
+                self.schedule_restart(worker, f"wurde mit Code {worker.process.exitcode} beendet")
+            elif now - worker.last_heartbeat > HEARTBEAT_TIMEOUT:
+                worker.process.terminate()
+                worker.process.join(5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                self.schedule_restart(worker, f"hat seit {HEARTBEAT_TIMEOUT} Sekunden kein Lebenszeichen gesendet")
+
+    def report_health(self):
+        parts = []
+        for worker in self.workers.values():
+            health = worker.health
+            http = health.get("http") or {}
+            if worker.process is None:
+                parts.append(f"{worker.name}: wartet auf Neustart")
+            else:
+                parts.append(f"{worker.name}: {'bereit' if health.get('ready') else 'startet'}, "
+                             f"Latenz {health.get('latency')} ms, {health.get('guilds', 0)} Guilds, "
+                             f"HTTP {sum(http.get('requests', {}).values())} Anfragen / "
+                             f"{http.get('in_flight', 0)} laufend / {http.get('idle_connections', 0)} Keep-Alive, "
+                             f"{worker.restarts} Neustarts")
+        logger.info("Status: %s", " | ".join(parts))
+
+    def collect_metrics(self):
+        """Metriken aller Worker (mit Label `worker`) plus Zustand des Launchers im Prometheus-Format."""
+        from common.metrics import MetricsRegistry, render
+
+        launcher = MetricsRegistry()
+        up = launcher.gauge("bot_worker_up", "1, wenn der Worker-Prozess läuft und bereit ist", ("worker",))
+        restarts = launcher.counter("bot_worker_restarts_total", "Neustarts des Worker-Prozesses", ("worker",))
+        for worker in list(self.workers.values()):
+            up.set(1 if worker.process is not None and worker.health.get("ready") else 0, worker=worker.name)
+            restarts.inc(worker.restarts, worker=worker.name)
+        snapshots = [(worker.metrics, {"worker": worker.name}) for worker in list(self.workers.values())]
+        return render(snapshots + [(launcher.snapshot(), None)])
+
+    def stop(self, *_):
+        self.running = False
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        from common.metrics import start_metrics_server
+        metrics_server = start_metrics_server(self.collect_metrics)
+        for worker in self.workers.values():
+            self.spawn(worker)
+
+        last_report = time.monotonic()
+        try:
+            while self.running:
+                try:
+                    self.handle_message(self.status_queue.get(timeout=1))
+                except queue.Empty:
+                    pass
+                self.check_workers()
+                if time.monotonic() - last_report >= HEALTH_REPORT_INTERVAL:
+                    self.report_health()
+                    last_report = time.monotonic()
+        finally:
+            if metrics_server is not None:
+                metrics_server.shutdown()
+            self.shutdown()
+
+    def shutdown(self):
+        logger.info("Beende alle Bots...")
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers.values():
+            if worker.process is not None:
+                worker.process.join(10)
+                if worker.process.is_alive():
+                    worker.process.kill()
+
+
+async def main(names):
     """
-    Hauptfunktion, die alle Bots initialisiert und startet.
+    Entwicklungsmodus: startet alle Bots gemeinsam auf einem Event-Loop.
     """
+    from common.metrics import REGISTRY, render, start_metrics_server
+    start_metrics_server(lambda: render([(REGISTRY.snapshot(), None)]))
     try:
-        # Bots initialisieren
-        coc_bot = ClashOfClansBot(get_bot_token("CLASH"))
-        support_bot = SupportBot(get_bot_token("SUPPORT"))
-        twitch_bot = TwitchBot(get_bot_token("TWITCH"))
-
         # Alle Bots parallel starten
-        await asyncio.gather(
-            coc_bot.start(coc_bot.token),
-            support_bot.start(support_bot.token),
-            twitch_bot.start(twitch_bot.token)
-        )
+        await asyncio.gather(*(run_bot(name) for name in names))
     except Exception as e:
-        print(f"Fehler beim Starten der Bots: {e}")
+        logger.exception("Fehler beim Starten der Bots: %s", e)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Startet die Discord-Bots.")
+    parser.add_argument("--mode", choices=("multi", "single"), default=os.getenv("BOT_LAUNCH_MODE", "multi"),
+                        help="multi: ein überwachter Prozess pro Bot (Standard), single: ein Prozess für die Entwicklung")
+    parser.add_argument("--bots", default=",".join(BOT_FACTORIES),
+                        help="Kommagetrennte Liste der zu startenden Bots (clash, support, twitch)")
+    parser.add_argument("--sync-commands", action="store_true",
+                        help="Slash-Commands auch ohne Änderung mit Discord synchronisieren")
+    args = parser.parse_args()
+    if args.sync_commands:
+        # Wird von den Worker-Prozessen geerbt
+        os.environ["FORCE_COMMAND_SYNC"] = "1"
+    args.bots = [name.strip() for name in args.bots.split(",") if name.strip()]
+    unknown = set(args.bots) - set(BOT_FACTORIES)
+    if unknown:
+        parser.error(f"Unbekannte Bots: {', '.join(sorted(unknown))}")
+    return args
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Der Elternprozess schreibt auch die Logs aller Worker (über die Status-Queue)
+    from common.logging_setup import setup_logging
+    setup_logging("bots")
+    args = parse_args()
+    if args.mode == "single":
+        asyncio.run(main(args.bots))
+    else:
+        Supervisor(args.bots).run()